@@ -5,6 +5,17 @@ Public API:
       ``shutil_ignore`` as the ``ignore=`` callback of ``shutil.copytree``.
     * :class:`IncludeParser` - the inverse (whitelist / include) mode, directory
       aware, with ``shutil_include`` for ``shutil.copytree``.
+    * :func:`walk` - ``os.walk`` that prunes ignored directories instead of
+      descending into them (also ``walk`` / ``iter_files`` on both parsers).
+    * :class:`RuleSet` - an immutable, picklable snapshot of a parser's rules
+      (``parser.freeze()``); ``IgnoreParser.from_ruleset`` matches with it.
+    * :class:`SharedMatcher` - match from many threads against one rule set,
+      with atomic ``publish`` of a new one.
+    * :class:`RuleFileCache` - on-disk cache of parsed rule files
+      (``IgnoreParser(rule_cache=RuleFileCache())``).
+    * :class:`RulesetFormatError` - raised by ``load_ruleset`` for a file that
+      is not a ruleset of this version (``igittigitt compile``).
+    * :func:`posix_path` - normalize a path once for the ``match_str`` fast path.
     * :data:`conf_igittigitt` - runtime configuration.
     * :func:`print_info` - render package metadata (used by the CLI ``info``).
 """
@@ -14,12 +25,21 @@ from __future__ import annotations
 from . import __init__conf__
 from .__init__conf__ import print_info
 from .conf_igittigitt import conf_igittigitt
-from .igittigitt import IgnoreParser, IncludeParser
+from .igittigitt import IgnoreParser, IncludeParser, RuleSet, posix_path, walk
+from .matcher import SharedMatcher
+from .rule_cache import RuleFileCache
+from .ruleset_file import RulesetFormatError
 
 __all__ = [
     "IgnoreParser",
     "IncludeParser",
+    "RuleFileCache",
+    "RuleSet",
+    "RulesetFormatError",
+    "SharedMatcher",
     "__init__conf__",
     "conf_igittigitt",
+    "posix_path",
     "print_info",
+    "walk",
 ]
@@ -4,12 +4,14 @@ from __future__ import annotations
 
 from .commands import (
     cli_check,
+    cli_compile,
     cli_config,
     cli_config_deploy,
     cli_config_generate_examples,
     cli_filter,
     cli_info,
     cli_logdemo,
+    cli_serve,
 )
 from .constants import CLICK_CONTEXT_SETTINGS, TRACEBACK_SUMMARY_LIMIT, TRACEBACK_VERBOSE_LIMIT
 from .context import (
@@ -40,12 +42,14 @@ __all__ = [
     "cli",
     # Commands
     "cli_check",
+    "cli_compile",
     "cli_config",
     "cli_config_deploy",
     "cli_config_generate_examples",
     "cli_filter",
     "cli_info",
     "cli_logdemo",
+    "cli_serve",
     "get_cli_context",
     "main",
     "restore_traceback_state",
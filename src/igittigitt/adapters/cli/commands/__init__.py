@@ -3,17 +3,21 @@
 from __future__ import annotations
 
 from .check import cli_check
+from .compile import cli_compile
 from .config import cli_config, cli_config_deploy, cli_config_generate_examples
 from .filter import cli_filter
 from .info import cli_info
 from .logging import cli_logdemo
+from .serve import cli_serve
 
 __all__ = [
     "cli_check",
+    "cli_compile",
     "cli_config",
     "cli_config_deploy",
     "cli_config_generate_examples",
     "cli_filter",
     "cli_info",
     "cli_logdemo",
+    "cli_serve",
 ]
@@ -7,10 +7,11 @@ work on inputs of millions of paths without buffering them.
 
 from __future__ import annotations
 
+import codecs
+import io
 import os
-import pathlib
 import sys
-from typing import TYPE_CHECKING, TextIO
+from typing import TYPE_CHECKING, Any, TextIO
 
 import rich_click as click
 
@@ -19,12 +20,14 @@ from igittigitt.adapters.config.performance import (
     apply_process_wide,
     load_performance_settings,
 )
-from igittigitt.igittigitt import IgnoreParser, IncludeParser
+from igittigitt.igittigitt import IgnoreParser, IgnoreRule, IncludeParser, posix_path
+from igittigitt.rule_cache import RuleFileCache
+from igittigitt.ruleset_file import RulesetFormatError
 
 from ..context import get_cli_context
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from collections.abc import Callable, Iterator
 
 _CHUNK = 65536
 #: Upper bound for a single input token (path) while no separator has been seen.
@@ -32,6 +35,15 @@ _CHUNK = 65536
 _MAX_TOKEN_BYTES = 1 << 20  # 1 MiB
 
 
+def _parser_options(perf: PerformanceSettings) -> dict[str, Any]:
+    """The parser constructor arguments the ``[performance]`` knobs select."""
+    return {
+        "dir_cache_max": perf.dir_cache_max,
+        "engine": perf.engine,
+        "rule_cache": RuleFileCache() if perf.rule_cache else None,
+    }
+
+
 def build_ignore_parser(
     base_dir: str,
     *,
@@ -39,12 +51,20 @@ def build_ignore_parser(
     rules: tuple[str, ...],
     scan: bool,
     add_default_patterns: bool,
-    dir_cache_max: int | None = None,
+    perf: PerformanceSettings | None = None,
+    lazy: bool = False,
+    rulesets: tuple[str, ...] = (),
 ) -> IgnoreParser:
-    """Assemble an :class:`IgnoreParser` from CLI inputs (order: scan, files, rules)."""
-    parser = IgnoreParser() if dir_cache_max is None else IgnoreParser(dir_cache_max=dir_cache_max)
+    """Assemble an :class:`IgnoreParser` from CLI inputs (order: compiled
+    rulesets, scan, files, rules).
+
+    With *lazy*, the scan reads only the ``.gitignore`` files along the queried
+    paths' ancestor chains, on demand - for a few queries in a huge tree.
+    """
+    parser = IgnoreParser() if perf is None else IgnoreParser(**_parser_options(perf))
+    load_rulesets(parser, rulesets, base_dir)
     if scan:
-        parser.parse_rule_files(base_dir, add_default_patterns=add_default_patterns)
+        parser.parse_rule_files(base_dir, add_default_patterns=add_default_patterns, lazy=lazy)
     elif add_default_patterns:
         parser.load_default_patterns(base_dir)
     for ignore_file in ignore_files:
@@ -58,10 +78,13 @@ def build_include_parser(
     base_dir: str,
     include_files: tuple[str, ...],
     rules: tuple[str, ...],
-    dir_cache_max: int | None = None,
+    perf: PerformanceSettings | None = None,
+    rulesets: tuple[str, ...] = (),
 ) -> IncludeParser:
-    """Assemble an :class:`IncludeParser` from CLI inputs (files then rules)."""
-    parser = IncludeParser() if dir_cache_max is None else IncludeParser(dir_cache_max=dir_cache_max)
+    """Assemble an :class:`IncludeParser` from CLI inputs (compiled rulesets,
+    files, then rules)."""
+    parser = IncludeParser() if perf is None else IncludeParser(**_parser_options(perf))
+    load_rulesets(parser, rulesets, base_dir)
     for include_file in include_files:
         parser.parse_rule_file(include_file, base_dir=base_dir)
     for rule in rules:
@@ -69,7 +92,21 @@ def build_include_parser(
     return parser
 
 
-def iter_input_paths(
+def load_rulesets(parser: IgnoreParser | IncludeParser, rulesets: tuple[str, ...], base_dir: str) -> None:
+    """Load ``--ruleset`` files (``igittigitt compile`` output) into *parser*.
+
+    Raises:
+        click.BadParameter: a file is unreadable, not a ruleset of this version,
+            or compiled for another base directory.
+    """
+    try:
+        for ruleset in rulesets:
+            parser.load_ruleset(ruleset, base_dir=base_dir)
+    except (OSError, RulesetFormatError) as exc:
+        raise click.BadParameter(str(exc), param_hint="--ruleset") from exc
+
+
+def iter_input_batches(
     paths: tuple[str, ...],
     *,
     use_stdin: bool,
@@ -77,8 +114,13 @@ def iter_input_paths(
     stream: TextIO | None = None,
     chunk_bytes: int = _CHUNK,
     max_token_bytes: int = _MAX_TOKEN_BYTES,
-) -> Iterator[str]:
-    """Yield input path tokens, streamed from args or stdin.
+) -> Iterator[list[str]]:
+    """Yield input path tokens in batches, streamed from args or stdin.
+
+    A stdin batch holds the tokens of one read, and a read returns what is
+    available instead of waiting for a full chunk - so a co-process caller that
+    writes a path and waits for its answer gets it (the commands flush their
+    output after every batch).
 
     Args:
         paths: Positional path arguments (used when not reading stdin).
@@ -91,44 +133,76 @@ def iter_input_paths(
     if use_stdin:
         sep = "\0" if zero else "\n"
         source = stream if stream is not None else sys.stdin
-        yield from _iter_stream_tokens(source, sep, chunk_bytes, max_token_bytes)
-    else:
-        yield from paths
+        yield from _iter_stream_batches(source, sep, chunk_bytes, max_token_bytes)
+    elif paths:
+        yield list(paths)
+
 
+def _chunk_reader(stream: TextIO, chunk_bytes: int) -> Callable[[], str]:
+    """A read of at most *chunk_bytes* that returns as soon as input is available
+    (one ``read1`` on the binary buffer, decoded incrementally); a stream
+    without a binary buffer is read with plain ``read``."""
+    binary = getattr(stream, "buffer", None)
+    if not isinstance(binary, io.BufferedIOBase):
+        return lambda: stream.read(chunk_bytes)
+    read1 = binary.read1
+    decoder = codecs.getincrementaldecoder(stream.encoding or "utf-8")(errors=stream.errors or "strict")
 
-def _iter_stream_tokens(stream: TextIO, sep: str, chunk_bytes: int, max_token_bytes: int) -> Iterator[str]:
-    """Stream tokens from *stream* split on *sep* without buffering all input.
+    def read() -> str:
+        data = read1(chunk_bytes)
+        return decoder.decode(data, final=not data)
+
+    return read
+
+
+def _iter_stream_batches(stream: TextIO, sep: str, chunk_bytes: int, max_token_bytes: int) -> Iterator[list[str]]:
+    """Stream the tokens of *stream* split on *sep*, one batch per read, without
+    buffering all input.
 
     Raises:
         click.UsageError: if a single token grows past *max_token_bytes* without
             a separator - this keeps memory bounded even for a pathological
             separator-less stream.
     """
+    read = _chunk_reader(stream, chunk_bytes)
     buffer = ""
     while True:
-        chunk = stream.read(chunk_bytes)
+        chunk = read()
         if not chunk:
             break
         buffer += chunk
         parts = buffer.split(sep)
         buffer = parts.pop()
-        for part in parts:
-            token = part.rstrip("\r") if sep == "\n" else part
-            if token:
-                yield token
+        batch = [token for token in (part.rstrip("\r") if sep == "\n" else part for part in parts) if token]
+        if batch:
+            yield batch
         if len(buffer) > max_token_bytes:
             raise click.UsageError(f"input path token exceeds {max_token_bytes} bytes; missing separator?")
     tail = buffer.rstrip("\r") if sep == "\n" else buffer
     if tail:
-        yield tail
+        yield [tail]
 
 
-def resolve_path(token: str, base_dir: str) -> pathlib.Path:
-    """Resolve an input token against *base_dir* (absolute tokens kept as-is)."""
-    candidate = pathlib.Path(token)
-    if candidate.is_absolute():
-        return candidate
-    return pathlib.Path(base_dir) / candidate
+def resolve_path(token: str, base_dir: str) -> str:
+    """Resolve an input token against *base_dir* (absolute tokens kept as-is).
+
+    Returns the :func:`~igittigitt.igittigitt.posix_path` string the parsers'
+    ``match_str`` methods take, so no ``pathlib`` object is built per token.
+    """
+    return posix_path(os.path.join(base_dir, token))  # noqa: PTH118 - stays a str, no Path per token
+
+
+def dir_hint(token: str) -> bool | None:
+    """``True`` for a token spelled as a directory (``build/``), else ``None``
+    (unknown - the parser ``stat``-s the path)."""
+    return True if token.endswith(("/", os.sep)) else None
+
+
+def format_rule(rule: IgnoreRule) -> str:
+    """``source:line:pattern`` of a deciding rule, as ``check -v`` prints it."""
+    source = str(rule.source_file) if rule.source_file is not None else ""
+    line = rule.source_line_number if rule.source_line_number is not None else ""
+    return f"{source}:{line}:{rule.pattern_original}"
 
 
 def emit(value: str, *, zero: bool, out: TextIO) -> None:
@@ -144,6 +218,13 @@ def resolve_performance(ctx: click.Context) -> PerformanceSettings:
     return settings
 
 
+def save_rule_order(parser: IgnoreParser | IncludeParser | None) -> None:
+    """Keep the rule order the in-process *parser* learned (``adaptive`` engine),
+    for the next run over the same rules; ``None`` (the daemon decided) is skipped."""
+    if parser is not None:
+        parser.save_rule_order()
+
+
 def silence_broken_pipe() -> None:
     """Redirect stdout to the null device so the interpreter shutdown flush does
     not re-raise ``BrokenPipeError`` after a downstream reader (e.g. ``head``)
@@ -155,9 +236,13 @@ def silence_broken_pipe() -> None:
 __all__ = [
     "build_ignore_parser",
     "build_include_parser",
+    "dir_hint",
     "emit",
-    "iter_input_paths",
+    "format_rule",
+    "iter_input_batches",
+    "load_rulesets",
     "resolve_path",
     "resolve_performance",
+    "save_rule_order",
     "silence_broken_pipe",
 ]
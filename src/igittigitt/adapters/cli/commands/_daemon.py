@@ -0,0 +1,491 @@
+"""The ``serve`` daemon and its client (``check --daemon`` / ``filter --daemon``).
+
+A CLI run pays for interpreter start-up, imports and rule discovery before the
+first path is decided. The daemon keeps one warm parser per rule spec
+(repository root, rule files, inline rules, rulesets) - with its directory
+decisions, engine and compiled patterns - and answers batches of paths over a
+local Unix domain socket.
+
+Protocol: every message is a 4-byte big-endian length followed by a UTF-8 JSON
+object. A request is ``{"protocol": 1, "spec": [...], "paths": [...],
+"dirs": [...], "rules": bool}`` with the paths already resolved to
+:func:`~igittigitt.igittigitt.posix_path` form and one directory hint
+(``true`` / ``null``) per path; the reply is ``{"decisions": [...],
+"rules": [...]}`` (``rules`` holds the ``source:line:pattern`` of the last matching
+rule - for a re-included path the negation - or ``null`` per path, and is only
+filled on request) or ``{"error": "..."}``. One connection carries
+any number of requests.
+
+A warm parser is rebuilt when one of the rule files it has read or looked for
+changes, appears or disappears (checked at most every :data:`_CHECK_SECONDS`),
+and after ``max_age`` seconds.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import getpass
+import json
+import os
+import pathlib
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import rich_click as click
+
+from igittigitt.igittigitt import IgnoreParser, IncludeParser
+
+from ._common import build_ignore_parser, build_include_parser, dir_hint, format_rule, resolve_path
+
+if TYPE_CHECKING:
+    import io
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+
+    from igittigitt.adapters.config.performance import PerformanceSettings
+
+PROTOCOL = 1
+#: Unix domain sockets are not available everywhere (Windows): no daemon there.
+DAEMON_SUPPORTED = hasattr(socket, "AF_UNIX")
+#: paths per request; bounds the memory of both sides
+_BATCH = 1024
+#: refuse messages above this size instead of buffering them
+_MAX_MESSAGE = 64 << 20
+#: minimum interval between two checks of a warm parser's rule files
+_CHECK_SECONDS = 1.0
+_LENGTH = struct.Struct(">I")
+
+
+class DaemonError(RuntimeError):
+    """The daemon refused a request or broke the protocol."""
+
+
+class ParserSpec(NamedTuple):
+    """Everything that selects the rules of a parser - the daemon's cache key.
+
+    Paths are absolute, so clients in different working directories share a
+    warm parser."""
+
+    mode: str  # "ignore" or "include"
+    base_dir: str
+    rule_files: tuple[str, ...]
+    rules: tuple[str, ...]
+    rulesets: tuple[str, ...]
+    scan: bool
+    default_patterns: bool
+
+    @classmethod
+    def create(
+        cls,
+        mode: str,
+        base_dir: str,
+        *,
+        rule_files: tuple[str, ...] = (),
+        rules: tuple[str, ...] = (),
+        rulesets: tuple[str, ...] = (),
+        scan: bool = False,
+        default_patterns: bool = False,
+    ) -> ParserSpec:
+        """A spec from CLI inputs, resolving the paths against the current directory."""
+        return cls(
+            mode,
+            os.path.abspath(base_dir),  # noqa: PTH100 - the spec holds plain strings
+            tuple(os.path.abspath(path) for path in rule_files),  # noqa: PTH100
+            rules,
+            tuple(os.path.abspath(path) for path in rulesets),  # noqa: PTH100
+            scan,
+            default_patterns,
+        )
+
+    @classmethod
+    def from_json(cls, raw: list[Any]) -> ParserSpec:
+        mode, base_dir, rule_files, rules, rulesets, scan, default_patterns = raw
+        if mode not in ("ignore", "include"):
+            raise ValueError(f"unknown mode {mode!r}")
+        return cls(
+            str(mode),
+            str(base_dir),
+            tuple(str(path) for path in rule_files),
+            tuple(str(rule) for rule in rules),
+            tuple(str(path) for path in rulesets),
+            bool(scan),
+            bool(default_patterns),
+        )
+
+
+def default_socket_path() -> str:
+    """``$IGITTIGITT_DAEMON_SOCKET``, else ``daemon.sock`` in the per-user
+    :func:`socket directory <_socket_dir>`."""
+    override = os.environ.get("IGITTIGITT_DAEMON_SOCKET")
+    if override:
+        return override
+    return str(_socket_dir() / "daemon.sock")
+
+
+def _socket_dir() -> pathlib.Path:
+    """``$XDG_RUNTIME_DIR/igittigitt``, else ``igittigitt-<user>`` below the temp dir."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return pathlib.Path(runtime_dir) / "igittigitt"
+    return pathlib.Path(tempfile.gettempdir()) / f"igittigitt-{getpass.getuser()}"
+
+
+def _untrusted_socket_dir(socket_path: str) -> str | None:
+    """Why the per-user socket directory holding *socket_path* must not be used,
+    or ``None``.
+
+    The directory name is predictable and may sit in the shared temp dir: if
+    someone else created it (or a symlink in its place), they could answer in the
+    daemon's stead or read the paths sent to it. So it has to be a real directory
+    of this user that nobody else can enter. A socket outside that directory is
+    where its user explicitly put it and is not checked.
+    """
+    directory = pathlib.Path(socket_path).absolute().parent
+    if directory != _socket_dir().absolute():
+        return None
+    try:
+        status = directory.lstat()
+    except OSError as exc:
+        return f"{directory}: {exc.strerror}"
+    if not stat.S_ISDIR(status.st_mode):
+        return f"{directory} is not a directory"
+    if status.st_uid != os.getuid():
+        return f"{directory} belongs to another user"
+    if status.st_mode & 0o077:
+        return f"{directory} is accessible to other users"
+    return None
+
+
+def claim_socket_path(socket_path: str) -> None:
+    """Prepare *socket_path* for a new daemon: create its directory (owner only)
+    and remove a stale socket left by a daemon that is gone.
+
+    Raises:
+        click.ClickException: the per-user socket directory is not private to
+            this user, or another daemon is listening there.
+    """
+    path = pathlib.Path(socket_path)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    reason = _untrusted_socket_dir(socket_path)
+    if reason is not None:
+        raise click.ClickException(f"refusing to listen on {socket_path}: {reason}")
+    if not path.exists():
+        return
+    client = DaemonClient.connect(socket_path)
+    if client is not None:
+        client.close()
+        raise click.ClickException(f"a daemon is already listening on {socket_path}")
+    path.unlink()
+
+
+def send_message(stream: io.BufferedIOBase, message: dict[str, Any]) -> None:
+    """Write one length-prefixed JSON message and flush it."""
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    stream.write(_LENGTH.pack(len(payload)) + payload)
+    stream.flush()
+
+
+def recv_message(stream: io.BufferedIOBase) -> dict[str, Any] | None:
+    """Read one length-prefixed JSON message; ``None`` at a clean end of stream.
+
+    Raises:
+        DaemonError: a truncated, oversized or malformed message.
+    """
+    header = stream.read(_LENGTH.size)
+    if not header:
+        return None
+    if len(header) < _LENGTH.size:
+        raise DaemonError("connection closed inside a message header")
+    (size,) = _LENGTH.unpack(header)
+    if size > _MAX_MESSAGE:
+        raise DaemonError(f"message of {size} bytes exceeds {_MAX_MESSAGE}")
+    payload = stream.read(size)
+    if len(payload) < size:
+        raise DaemonError("connection closed inside a message")
+    try:
+        message = json.loads(payload)
+    except ValueError as exc:
+        raise DaemonError(f"malformed message: {exc}") from exc
+    if not isinstance(message, dict):
+        raise DaemonError("a message must be a JSON object")
+    return message  # pyright: ignore[reportUnknownVariableType]
+
+
+def _fingerprint(path: str) -> tuple[int, int] | None:
+    try:
+        stat = pathlib.Path(path).stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class _WarmParser:
+    """A parser kept warm by the daemon, with the fingerprints of the rule files
+    it has read. Matching and staleness checks hold :attr:`lock` - the parser's
+    caches are not thread-safe."""
+
+    def __init__(self, spec: ParserSpec, parser: IgnoreParser | IncludeParser) -> None:
+        self.spec = spec
+        self.parser = parser
+        self.lock = threading.Lock()
+        self.built = self.checked = time.monotonic()
+        self.fingerprints: dict[str, tuple[int, int] | None] = {}
+        self._rules_seen = -1
+        # the rule files lazy discovery looks for - also where there is none yet
+        self._probes: list[str] = []
+        parser._rule_file_probes = self._probes  # pyright: ignore[reportPrivateUsage]
+        self.record_new_files()
+
+    def _rule_files(self) -> set[str]:
+        files = {str(rule.source_file) for rule in self.parser.rules if rule.source_file is not None}
+        files.update(self.spec.rule_files)
+        files.update(self.spec.rulesets)
+        return files
+
+    def record_new_files(self) -> None:
+        """Fingerprint the rule files looked for since the last call - lazy
+        discovery looks for them while matching. A missing one is recorded as
+        missing, so creating it later is noticed (caller holds :attr:`lock`)."""
+        paths = set(self._probes)
+        self._probes.clear()
+        if len(self.parser.rules) != self._rules_seen:
+            self._rules_seen = len(self.parser.rules)
+            paths.update(self._rule_files())
+        for path in paths - self.fingerprints.keys():
+            self.fingerprints[path] = _fingerprint(path)
+
+    def is_current(self, max_age: float) -> bool:
+        """Whether the parser may keep serving (caller holds :attr:`lock`)."""
+        now = time.monotonic()
+        if max_age and now - self.built > max_age:
+            return False
+        if now - self.checked >= _CHECK_SECONDS:
+            self.checked = now
+            if any(_fingerprint(path) != fingerprint for path, fingerprint in self.fingerprints.items()):
+                return False
+        return True
+
+
+# the server classes need Unix domain sockets; without them ``socketserver`` lacks
+# their base class, and only the client side (which then never connects) is defined
+if DAEMON_SUPPORTED:
+
+    class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """The ``igittigitt serve`` server: one thread per connection, up to
+        *max_roots* warm parsers (least recently used dropped first)."""
+
+        daemon_threads = True
+
+        def __init__(
+            self, socket_path: str, perf: PerformanceSettings, max_roots: int = 16, max_age: float = 60.0
+        ) -> None:
+            self.perf = perf
+            self.max_roots = max_roots
+            self.max_age = max_age
+            self._roots: OrderedDict[ParserSpec, _WarmParser] = OrderedDict()
+            self._roots_lock = threading.Lock()
+            super().__init__(socket_path, _DaemonHandler)
+
+        def _build(self, spec: ParserSpec) -> IgnoreParser | IncludeParser:
+            if spec.mode == "include":
+                return build_include_parser(
+                    spec.base_dir, spec.rule_files, spec.rules, perf=self.perf, rulesets=spec.rulesets
+                )
+            # lazy: the warm parser reads the rule files of the directories actually queried
+            return build_ignore_parser(
+                spec.base_dir,
+                ignore_files=spec.rule_files,
+                rules=spec.rules,
+                scan=spec.scan,
+                add_default_patterns=spec.default_patterns,
+                perf=self.perf,
+                lazy=spec.scan,
+                rulesets=spec.rulesets,
+            )
+
+        def _warm_parser(self, spec: ParserSpec) -> _WarmParser:
+            with self._roots_lock:
+                warm = self._roots.get(spec)
+                if warm is not None:
+                    self._roots.move_to_end(spec)
+            if warm is not None:
+                with warm.lock:
+                    if warm.is_current(self.max_age):
+                        return warm
+            warm = _WarmParser(spec, self._build(spec))
+            with self._roots_lock:
+                self._roots[spec] = warm
+                self._roots.move_to_end(spec)
+                while len(self._roots) > self.max_roots:
+                    self._roots.popitem(last=False)
+            return warm
+
+        def answer(self, request: dict[str, Any]) -> dict[str, Any]:
+            """The reply to one request (errors are replied, not raised)."""
+            try:
+                if request.get("protocol") != PROTOCOL:
+                    return {"error": f"unsupported protocol {request.get('protocol')!r}, expected {PROTOCOL}"}
+                spec = ParserSpec.from_json(request["spec"])
+                paths = [str(path) for path in request["paths"]]
+                dirs = [True if is_dir else None for is_dir in request["dirs"]]
+                with_rules = bool(request.get("rules"))
+                warm = self._warm_parser(spec)
+                with warm.lock:
+                    parser = warm.parser
+                    if with_rules and isinstance(parser, IgnoreParser):
+                        results = [
+                            parser.match_str_with_rule(path, is_dir=is_dir)
+                            for path, is_dir in zip(paths, dirs, strict=True)
+                        ]
+                        decisions = [ignored for ignored, _rule in results]
+                        rules = [format_rule(rule) if rule is not None else None for _ignored, rule in results]
+                    else:
+                        decisions = [
+                            parser.match_str(path, is_dir=is_dir) for path, is_dir in zip(paths, dirs, strict=True)
+                        ]
+                        rules = [None] * len(decisions)
+                    warm.record_new_files()
+            except (KeyError, TypeError, ValueError, OSError, click.ClickException) as exc:
+                return {"error": f"{type(exc).__name__}: {exc}"}
+            return {"decisions": decisions, "rules": rules}
+
+    class _DaemonHandler(socketserver.StreamRequestHandler):
+        """Answers the requests of one connection until the client closes it."""
+
+        def handle(self) -> None:
+            server = self.server
+            if not isinstance(server, DaemonServer):  # pragma: no cover - only registered there
+                return
+            try:
+                while (request := recv_message(self.rfile)) is not None:
+                    send_message(self.wfile, server.answer(request))
+            except (DaemonError, OSError):
+                return
+
+
+class DaemonClient:
+    """A connection to a running daemon."""
+
+    def __init__(self, connection: socket.socket) -> None:
+        self._connection = connection
+        self._reader = connection.makefile("rb")
+        self._writer = connection.makefile("wb")
+
+    @classmethod
+    def connect(cls, socket_path: str | None = None) -> DaemonClient | None:
+        """Connect to the daemon, or ``None`` if none is listening (or its
+        socket directory is not private to this user)."""
+        if not DAEMON_SUPPORTED:
+            return None
+        socket_path = socket_path or default_socket_path()
+        if _untrusted_socket_dir(socket_path) is not None:
+            return None
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(socket_path)
+        except OSError:
+            connection.close()
+            return None
+        return cls(connection)
+
+    def decide(
+        self, spec: ParserSpec, paths: list[str], dirs: list[bool | None], with_rules: bool = False
+    ) -> tuple[list[bool], list[str | None]]:
+        """The decisions (and ``source:line:pattern`` of the deciding rules) for *paths*.
+
+        Raises:
+            DaemonError: the daemon replied with an error or broke the protocol.
+            OSError: the connection failed.
+        """
+        request = {"protocol": PROTOCOL, "spec": list(spec), "paths": paths, "dirs": dirs, "rules": with_rules}
+        send_message(self._writer, request)
+        reply = recv_message(self._reader)
+        if reply is None:
+            raise DaemonError("the daemon closed the connection")
+        if "error" in reply:
+            raise DaemonError(str(reply["error"]))
+        decisions = [bool(decision) for decision in reply["decisions"]]
+        rules = [None if rule is None else str(rule) for rule in reply["rules"]]
+        if len(decisions) != len(paths) or len(rules) != len(paths):
+            raise DaemonError("the daemon answered a different number of paths")
+        return decisions, rules
+
+    def close(self) -> None:
+        with contextlib.suppress(OSError):
+            self._reader.close()
+            self._writer.close()
+        self._connection.close()
+
+
+class Decider:
+    """Decides batches of ``check`` / ``filter`` input tokens: through the daemon
+    when *client* is given (in requests of at most :data:`_BATCH` paths), in-process
+    (*decide_local*) without one - and from the first request the daemon fails on."""
+
+    def __init__(
+        self,
+        base_dir: str,
+        decide_local: Callable[[str, bool | None], tuple[bool, str | None]],
+        *,
+        client: DaemonClient | None = None,
+        spec: ParserSpec | None = None,
+        with_rules: bool = False,
+    ) -> None:
+        self._base_dir = base_dir
+        self._decide_local = decide_local
+        self._client = client if spec is not None else None
+        self._spec = spec
+        self._with_rules = with_rules
+
+    def decide(self, tokens: Sequence[str]) -> list[tuple[str, bool, str | None]]:
+        """``(token, decision, rule)`` per token, in input order."""
+        results: list[tuple[str, bool, str | None]] = []
+        for start in range(0, len(tokens), _BATCH):
+            batch = tokens[start : start + _BATCH]
+            paths = [resolve_path(token, self._base_dir) for token in batch]
+            dirs = [dir_hint(token) for token in batch]
+            if self._client is not None and self._spec is not None:
+                try:
+                    decisions, rules = self._client.decide(self._spec, paths, dirs, self._with_rules)
+                except (DaemonError, OSError, KeyError, TypeError):
+                    self.close()
+                else:
+                    results.extend(zip(batch, decisions, rules, strict=True))
+                    continue
+            decide_local = self._decide_local
+            results.extend(
+                (token, *decide_local(path, is_dir)) for token, path, is_dir in zip(batch, paths, dirs, strict=True)
+            )
+        return results
+
+    def run(self, batches: Iterable[list[str]]) -> Iterator[list[tuple[str, bool, str | None]]]:
+        """:meth:`decide` each of *batches* in turn."""
+        for batch in batches:
+            yield self.decide(batch)
+
+    def close(self) -> None:
+        """Close the daemon connection (later batches are decided in-process)."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+__all__ = [
+    "DAEMON_SUPPORTED",
+    "PROTOCOL",
+    "DaemonClient",
+    "DaemonError",
+    "DaemonServer",
+    "Decider",
+    "ParserSpec",
+    "claim_socket_path",
+    "default_socket_path",
+    "recv_message",
+    "send_message",
+]
@@ -0,0 +1,175 @@
+"""Process-pool matching for ``check --jobs`` / ``filter --jobs``.
+
+The parent process builds the parser once and ships its frozen
+:class:`~igittigitt.igittigitt.RuleSet` to every worker - once per worker, in the
+pool initializer; nothing is parsed, translated or classified again there.
+The input is then streamed to the workers in chunks of at most
+:data:`_CHUNK_PATHS` tokens, and at most ``max_in_flight`` chunks are submitted
+but not yet written (config knob ``performance.max_in_flight_chunks``) - so
+memory stays bounded by that knob, not by the input.
+
+Results come back in input order; ``unordered`` writes each chunk as soon as
+its worker finishes it.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import os
+from collections import deque
+from typing import TYPE_CHECKING, NamedTuple
+
+import rich_click as click
+
+from igittigitt.engine import set_pattern_cache_size
+from igittigitt.igittigitt import IgnoreParser, IncludeParser, RuleSet
+
+from ._common import dir_hint, format_rule, resolve_path
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from igittigitt.adapters.config.performance import PerformanceSettings
+
+#: Tokens per task - large enough that pickling and the round trip cost little
+#: per path, small enough that the workers share a short input evenly.
+_CHUNK_PATHS = 2048
+
+
+class _WorkerSpec(NamedTuple):
+    """What a worker rebuilds the parent's parser from (pickled once per worker)."""
+
+    mode: str
+    base_dir: str
+    ruleset: RuleSet
+    dir_cache_max: int
+    engine: str
+    pattern_cache_max: int
+    with_rules: bool
+
+
+#: The worker's parser, base directory and whether ``check -v`` wants the rules.
+_worker: tuple[IgnoreParser | IncludeParser, str, bool] | None = None
+
+
+def _init_worker(spec: _WorkerSpec) -> None:
+    """Pool initializer: the worker's parser, from the parent's rule snapshot."""
+    global _worker  # noqa: PLW0603 - one parser per worker process
+    set_pattern_cache_size(spec.pattern_cache_max)
+    parser_class = IncludeParser if spec.mode == "include" else IgnoreParser
+    parser = parser_class.from_ruleset(spec.ruleset, dir_cache_max=spec.dir_cache_max, engine=spec.engine)
+    _worker = (parser, spec.base_dir, spec.with_rules)
+
+
+def _decide_chunk(tokens: list[str]) -> list[tuple[bool, str | None]]:
+    """Pool task: ``(decision, rule)`` per token, like the in-process path."""
+    if _worker is None:  # pragma: no cover - the initializer always ran
+        raise RuntimeError("worker not initialised")
+    parser, base_dir, with_rules = _worker
+    if with_rules and isinstance(parser, IgnoreParser):
+        results: list[tuple[bool, str | None]] = []
+        for token in tokens:
+            ignored, rule = parser.match_str_with_rule(resolve_path(token, base_dir), is_dir=dir_hint(token))
+            results.append((ignored, None if rule is None else format_rule(rule)))
+        return results
+    return [(parser.match_str(resolve_path(token, base_dir), is_dir=dir_hint(token)), None) for token in tokens]
+
+
+def default_jobs(jobs: int) -> int:
+    """*jobs*, or one per available CPU for ``0``."""
+    if jobs:
+        return jobs
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class ParallelDecider:
+    """Decides ``check`` / ``filter`` input batches in a process pool.
+
+    The counterpart of :class:`~._daemon.Decider` for ``--jobs``: :meth:`run`
+    yields ``(token, decision, rule)`` lists, one per chunk.
+    """
+
+    def __init__(
+        self,
+        parser: IgnoreParser | IncludeParser,
+        base_dir: str,
+        *,
+        perf: PerformanceSettings,
+        jobs: int,
+        with_rules: bool = False,
+        ordered: bool = True,
+    ) -> None:
+        mode = "include" if isinstance(parser, IncludeParser) else "ignore"
+        self._max_in_flight = perf.max_in_flight_chunks
+        self._ordered = ordered
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(
+                _WorkerSpec(
+                    mode,
+                    base_dir,
+                    parser.freeze(),
+                    perf.dir_cache_max,
+                    perf.engine,
+                    perf.pattern_cache_max,
+                    with_rules,
+                ),
+            ),
+        )
+
+    def run(self, batches: Iterable[list[str]]) -> Iterator[list[tuple[str, bool, str | None]]]:
+        """Stream *batches* through the pool; yield each chunk's results."""
+        chunks = self._chunks(batches)
+        try:
+            if self._ordered:
+                yield from self._run_ordered(chunks)
+            else:
+                yield from self._run_unordered(chunks)
+        except concurrent.futures.process.BrokenProcessPool as exc:
+            raise click.ClickException(f"a --jobs worker process died: {exc}") from exc
+
+    @staticmethod
+    def _chunks(batches: Iterable[list[str]]) -> Iterator[list[str]]:
+        for batch in batches:
+            for start in range(0, len(batch), _CHUNK_PATHS):
+                yield batch[start : start + _CHUNK_PATHS]
+
+    def _run_ordered(self, chunks: Iterator[list[str]]) -> Iterator[list[tuple[str, bool, str | None]]]:
+        pending: deque[tuple[list[str], concurrent.futures.Future[list[tuple[bool, str | None]]]]] = deque()
+        for chunk in chunks:
+            pending.append((chunk, self._pool.submit(_decide_chunk, chunk)))
+            # write what is finished in order; block only at the in-flight bound
+            while pending and (len(pending) >= self._max_in_flight or pending[0][1].done()):
+                tokens, future = pending.popleft()
+                yield _joined(tokens, future)
+        while pending:
+            tokens, future = pending.popleft()
+            yield _joined(tokens, future)
+
+    def _run_unordered(self, chunks: Iterator[list[str]]) -> Iterator[list[tuple[str, bool, str | None]]]:
+        pending: dict[concurrent.futures.Future[list[tuple[bool, str | None]]], list[str]] = {}
+        for chunk in chunks:
+            pending[self._pool.submit(_decide_chunk, chunk)] = chunk
+            if len(pending) < self._max_in_flight:
+                continue
+            done, _running = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield _joined(pending.pop(future), future)
+        for future in concurrent.futures.as_completed(pending):
+            yield _joined(pending[future], future)
+
+    def close(self) -> None:
+        """Stop the workers; chunks not yet started are dropped."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _joined(
+    tokens: list[str], future: concurrent.futures.Future[list[tuple[bool, str | None]]]
+) -> list[tuple[str, bool, str | None]]:
+    return [(token, decision, rule) for token, (decision, rule) in zip(tokens, future.result(), strict=True)]
+
+
+__all__ = ["ParallelDecider", "default_jobs"]
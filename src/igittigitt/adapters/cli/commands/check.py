@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import sys
+from typing import TYPE_CHECKING
 
 import rich_click as click
 
@@ -12,11 +13,17 @@ from ..typed_click import argument, option
 from ._common import (
     build_ignore_parser,
     emit,
-    iter_input_paths,
-    resolve_path,
+    format_rule,
+    iter_input_batches,
     resolve_performance,
+    save_rule_order,
     silence_broken_pipe,
 )
+from ._daemon import DaemonClient, Decider, ParserSpec
+from ._pool import ParallelDecider, default_jobs
+
+if TYPE_CHECKING:
+    from igittigitt.igittigitt import IgnoreParser
 
 
 @click.command("check", context_settings=CLICK_CONTEXT_SETTINGS)
@@ -25,11 +32,17 @@ from ._common import (
 )
 @option("--gitignore", "-f", "ignore_files", multiple=True, help="Ignore file to parse (repeatable).")
 @option("--rule", "-r", "rules", multiple=True, help="Inline ignore rule (repeatable).")
+@option(
+    "--ruleset",
+    "rulesets",
+    multiple=True,
+    help="Precompiled ruleset (igittigitt compile) to load first (repeatable).",
+)
 @option(
     "--scan/--no-scan",
     "scan",
     default=None,
-    help="Recursively discover .gitignore files under base-dir. Default: only when no -f/-r given.",
+    help="Recursively discover .gitignore files under base-dir. Default: only when no -f/-r/--ruleset given.",
 )
 @option(
     "--default-patterns/--no-default-patterns",
@@ -44,8 +57,39 @@ from ._common import (
     default=False,
     help="Read paths from stdin (one per line, or NUL-separated with -z).",
 )
+@option(
+    "--jobs",
+    "-j",
+    "jobs",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Match in N worker processes (0: one per CPU) - for throughput on large inputs.",
+)
+@option(
+    "--unordered",
+    "unordered",
+    is_flag=True,
+    default=False,
+    help="With --jobs: write each chunk when it is done instead of in input order.",
+)
 @option("-z", "--zero", "zero", is_flag=True, default=False, help="Input and output are NUL-separated.")
+@option(
+    "--daemon",
+    "daemon",
+    is_flag=True,
+    default=False,
+    help="Ask a running 'igittigitt serve' daemon; decide in-process if none answers.",
+)
 @option("-v", "--verbose", "verbose", is_flag=True, default=False, help="Also print the matching source:line:pattern.")
+@option(
+    "-n",
+    "--non-matching",
+    "non_matching",
+    is_flag=True,
+    default=False,
+    help="With -v: one record per input path, '::' for paths no rule matched (co-process mode).",
+)
 @argument("paths", nargs=-1)
 @click.pass_context
 def cli_check(
@@ -54,50 +98,98 @@ def cli_check(
     base_dir: str,
     ignore_files: tuple[str, ...],
     rules: tuple[str, ...],
+    rulesets: tuple[str, ...],
     scan: bool | None,
     default_patterns: bool,
     stdin_flag: bool,
     zero: bool,
+    jobs: int,
+    unordered: bool,
     verbose: bool,
+    non_matching: bool,
+    daemon: bool,
     paths: tuple[str, ...],
 ) -> None:
     """Print the paths that are ignored. Exit 0 if any matched, 1 if none."""
+    if non_matching and not verbose:
+        raise click.UsageError("--non-matching is only valid with --verbose")
     perf = resolve_performance(ctx)
-    do_scan = scan if scan is not None else not (ignore_files or rules)
-    parser = build_ignore_parser(
+    do_scan = scan if scan is not None else not (ignore_files or rules or rulesets)
+    client = DaemonClient.connect() if daemon else None
+    workers = default_jobs(jobs)
+    parser: IgnoreParser | None = None
+
+    def build() -> IgnoreParser:
+        return build_ignore_parser(
+            base_dir,
+            ignore_files=ignore_files,
+            rules=rules,
+            scan=do_scan,
+            add_default_patterns=default_patterns,
+            perf=perf,
+            # the workers get a snapshot of all rules, a lazy parser has none yet
+            lazy=workers == 1,
+            rulesets=rulesets,
+        )
+
+    if client is None:
+        parser = build()
+
+    def decide_local(path: str, is_dir: bool | None) -> tuple[bool, str | None]:
+        nonlocal parser
+        if parser is None:  # the daemon failed: fall back to in-process matching
+            parser = build()
+        if not verbose:  # the deciding rule is looked up only for -v
+            return parser.match_str(path, is_dir=is_dir), None
+        ignored, rule = parser.match_str_with_rule(path, is_dir=is_dir)
+        return ignored, format_rule(rule) if rule is not None else None
+
+    spec = ParserSpec.create(
+        "ignore",
         base_dir,
-        ignore_files=ignore_files,
+        rule_files=ignore_files,
         rules=rules,
+        rulesets=rulesets,
         scan=do_scan,
-        add_default_patterns=default_patterns,
-        dir_cache_max=perf.dir_cache_max,
+        default_patterns=default_patterns,
     )
-
+    decider: Decider | ParallelDecider
+    if parser is not None and workers > 1:
+        decider = ParallelDecider(parser, base_dir, perf=perf, jobs=workers, with_rules=verbose, ordered=not unordered)
+    else:
+        decider = Decider(base_dir, decide_local, client=client, spec=spec, with_rules=verbose)
     use_stdin = stdin_flag or not paths or tuple(paths) == ("-",)
     out = sys.stdout
     any_match = False
     try:
-        for token in iter_input_paths(
+        batches = iter_input_batches(
             paths,
             use_stdin=use_stdin,
             zero=zero,
             chunk_bytes=perf.stdin_chunk_bytes,
             max_token_bytes=perf.max_token_bytes,
-        ):
-            ignored, rule = parser.match_with_rule(resolve_path(token, base_dir))
-            if not ignored:
-                continue
-            any_match = True
-            if verbose and rule is not None:
-                source = str(rule.source_file) if rule.source_file is not None else ""
-                line = rule.source_line_number if rule.source_line_number is not None else ""
-                emit(f"{source}:{line}:{rule.pattern_original}\t{token}", zero=zero, out=out)
-            else:
-                emit(token, zero=zero, out=out)
-        out.flush()
+        )
+        for results in decider.run(batches):
+            for token, ignored, rule in results:
+                any_match = any_match or ignored
+                if non_matching:
+                    # like ``git check-ignore -v -n``: the last matching rule
+                    # (a negation for a re-included path), or "::"
+                    emit(f"{rule or '::'}\t{token}", zero=zero, out=out)
+                elif not ignored:
+                    continue
+                elif verbose and rule is not None:
+                    emit(f"{rule}\t{token}", zero=zero, out=out)
+                else:
+                    emit(token, zero=zero, out=out)
+            # one flush per input batch (or --jobs chunk): a co-process caller gets its answers
+            out.flush()
     except BrokenPipeError:
         silence_broken_pipe()
         raise SystemExit(ExitCode.BROKEN_PIPE) from None
+    finally:
+        decider.close()
+        save_rule_order(parser)
 
     raise SystemExit(ExitCode.SUCCESS if any_match else ExitCode.GENERAL_ERROR)
 
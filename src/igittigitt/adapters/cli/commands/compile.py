@@ -0,0 +1,67 @@
+"""The ``compile`` command - precompile the rules into a ruleset file.
+
+Build the ruleset once (at image build time, in CI) and let every later
+``check`` / ``filter`` load it instead of discovering and parsing the rule files:
+
+    igittigitt compile -C repo -o rules.igc
+    find repo | igittigitt filter -C repo --ruleset rules.igc
+"""
+
+from __future__ import annotations
+
+import rich_click as click
+
+from ..constants import CLICK_CONTEXT_SETTINGS
+from ..typed_click import option
+from ._common import build_ignore_parser, resolve_performance
+
+
+@click.command("compile", context_settings=CLICK_CONTEXT_SETTINGS)
+@option(
+    "--base-dir", "-C", "base_dir", default=".", show_default=True, help="Base directory the patterns are relative to."
+)
+@option("--gitignore", "-f", "ignore_files", multiple=True, help="Ignore file to parse (repeatable).")
+@option("--rule", "-r", "rules", multiple=True, help="Inline ignore rule (repeatable).")
+@option(
+    "--scan/--no-scan",
+    "scan",
+    default=None,
+    help="Recursively discover .gitignore files under base-dir. Default: only when no -f/-r given.",
+)
+@option(
+    "--default-patterns/--no-default-patterns",
+    "default_patterns",
+    default=False,
+    help="Also compile git's default patterns from the user home.",
+)
+@option("--output", "-o", "output", required=True, help="Ruleset file to write.")
+@click.pass_context
+def cli_compile(
+    ctx: click.Context,
+    *,
+    base_dir: str,
+    ignore_files: tuple[str, ...],
+    rules: tuple[str, ...],
+    scan: bool | None,
+    default_patterns: bool,
+    output: str,
+) -> None:
+    """Write the rules as a ruleset file for check/filter --ruleset."""
+    perf = resolve_performance(ctx)
+    do_scan = scan if scan is not None else not (ignore_files or rules)
+    parser = build_ignore_parser(
+        base_dir,
+        ignore_files=ignore_files,
+        rules=rules,
+        scan=do_scan,
+        add_default_patterns=default_patterns,
+        perf=perf,
+    )
+    try:
+        parser.save_ruleset(output, base_dir)
+    except OSError as exc:
+        raise click.FileError(output, hint=exc.strerror) from exc
+    click.echo(f"compiled {len(parser.rules)} rules into {output}")
+
+
+__all__ = ["cli_compile"]
@@ -21,14 +21,16 @@ from ._common import (
     build_ignore_parser,
     build_include_parser,
     emit,
-    iter_input_paths,
-    resolve_path,
+    iter_input_batches,
     resolve_performance,
+    save_rule_order,
     silence_broken_pipe,
 )
+from ._daemon import DaemonClient, Decider, ParserSpec
+from ._pool import ParallelDecider, default_jobs
 
 if TYPE_CHECKING:
-    import pathlib
+    from igittigitt.igittigitt import IgnoreParser, IncludeParser
 
 
 @click.command("filter", context_settings=CLICK_CONTEXT_SETTINGS)
@@ -37,6 +39,12 @@ if TYPE_CHECKING:
 )
 @option("--gitignore", "-f", "rule_files", multiple=True, help="Ignore/include file to parse (repeatable).")
 @option("--rule", "-r", "rules", multiple=True, help="Inline rule (repeatable).")
+@option(
+    "--ruleset",
+    "rulesets",
+    multiple=True,
+    help="Precompiled ruleset (igittigitt compile) to load first (repeatable).",
+)
 @option(
     "--include",
     "-i",
@@ -49,7 +57,7 @@ if TYPE_CHECKING:
     "--scan/--no-scan",
     "scan",
     default=None,
-    help="Recursively discover .gitignore files under base-dir (ignore mode). Default: only when no -f/-r given.",
+    help="Recursively discover .gitignore files under base-dir (ignore mode). Default: without -f/-r/--ruleset.",
 )
 @option(
     "--default-patterns/--no-default-patterns",
@@ -57,6 +65,29 @@ if TYPE_CHECKING:
     default=False,
     help="Also load git's default patterns (ignore mode).",
 )
+@option(
+    "--daemon",
+    "daemon",
+    is_flag=True,
+    default=False,
+    help="Ask a running 'igittigitt serve' daemon; decide in-process if none answers.",
+)
+@option(
+    "--jobs",
+    "-j",
+    "jobs",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Match in N worker processes (0: one per CPU) - for throughput on large inputs.",
+)
+@option(
+    "--unordered",
+    "unordered",
+    is_flag=True,
+    default=False,
+    help="With --jobs: write each chunk when it is done instead of in input order.",
+)
 @option("-z", "--zero", "zero", is_flag=True, default=False, help="Input and output are NUL-separated.")
 @argument("paths", nargs=-1)
 @click.pass_context
@@ -66,49 +97,82 @@ def cli_filter(
     base_dir: str,
     rule_files: tuple[str, ...],
     rules: tuple[str, ...],
+    rulesets: tuple[str, ...],
     include_mode: bool,
     scan: bool | None,
     default_patterns: bool,
     zero: bool,
+    jobs: int,
+    unordered: bool,
+    daemon: bool,
     paths: tuple[str, ...],
 ) -> None:
     """Print the surviving paths (not ignored, or - with --include - kept)."""
     perf = resolve_performance(ctx)
-    if include_mode:
-        include_parser = build_include_parser(base_dir, rule_files, rules, dir_cache_max=perf.dir_cache_max)
+    do_scan = not include_mode and (scan if scan is not None else not (rule_files or rules or rulesets))
+    client = DaemonClient.connect() if daemon else None
+    workers = default_jobs(jobs)
+    parser: IgnoreParser | IncludeParser | None = None
 
-        def survives(path: pathlib.Path) -> bool:
-            return include_parser.match(path)
-    else:
-        do_scan = scan if scan is not None else not (rule_files or rules)
-        ignore_parser = build_ignore_parser(
+    def build() -> IgnoreParser | IncludeParser:
+        if include_mode:
+            return build_include_parser(base_dir, rule_files, rules, perf=perf, rulesets=rulesets)
+        return build_ignore_parser(
             base_dir,
             ignore_files=rule_files,
             rules=rules,
             scan=do_scan,
             add_default_patterns=default_patterns,
-            dir_cache_max=perf.dir_cache_max,
+            perf=perf,
+            rulesets=rulesets,
         )
 
-        def survives(path: pathlib.Path) -> bool:
-            return not ignore_parser.match(path)
+    if client is None:
+        parser = build()
+
+    def decide_local(path: str, is_dir: bool | None) -> tuple[bool, str | None]:
+        nonlocal parser
+        if parser is None:  # the daemon failed: fall back to in-process matching
+            parser = build()
+        return parser.match_str(path, is_dir=is_dir), None
 
+    spec = ParserSpec.create(
+        "include" if include_mode else "ignore",
+        base_dir,
+        rule_files=rule_files,
+        rules=rules,
+        rulesets=rulesets,
+        scan=do_scan,
+        default_patterns=default_patterns and not include_mode,
+    )
+    # a matching path survives in include mode and is dropped in ignore mode
+    keep = include_mode
+    decider: Decider | ParallelDecider
+    if parser is not None and workers > 1:
+        decider = ParallelDecider(parser, base_dir, perf=perf, jobs=workers, ordered=not unordered)
+    else:
+        decider = Decider(base_dir, decide_local, client=client, spec=spec)
     use_stdin = not paths or tuple(paths) == ("-",)
     out = sys.stdout
     try:
-        for token in iter_input_paths(
+        batches = iter_input_batches(
             paths,
             use_stdin=use_stdin,
             zero=zero,
             chunk_bytes=perf.stdin_chunk_bytes,
             max_token_bytes=perf.max_token_bytes,
-        ):
-            if survives(resolve_path(token, base_dir)):
-                emit(token, zero=zero, out=out)
-        out.flush()
+        )
+        for results in decider.run(batches):
+            for token, matched, _rule in results:
+                if matched is keep:
+                    emit(token, zero=zero, out=out)
+            out.flush()
     except BrokenPipeError:
         silence_broken_pipe()
         raise SystemExit(ExitCode.BROKEN_PIPE) from None
+    finally:
+        decider.close()
+        save_rule_order(parser)
 
 
 __all__ = ["cli_filter"]
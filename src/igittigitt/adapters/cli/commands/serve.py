@@ -0,0 +1,66 @@
+"""The ``serve`` command - a daemon that keeps parsers warm for ``--daemon`` clients.
+
+igittigitt serve &                          # listen on the default socket
+find . | igittigitt filter --daemon         # decided by the warm daemon
+"""
+
+from __future__ import annotations
+
+import contextlib
+import pathlib
+import signal
+
+import rich_click as click
+
+from ..constants import CLICK_CONTEXT_SETTINGS
+from ..typed_click import option
+from ._common import resolve_performance
+from ._daemon import DAEMON_SUPPORTED, claim_socket_path, default_socket_path
+
+
+@click.command("serve", context_settings=CLICK_CONTEXT_SETTINGS)
+@option(
+    "--socket",
+    "socket_path",
+    default=None,
+    help="Unix socket to listen on. Default: $IGITTIGITT_DAEMON_SOCKET, else $XDG_RUNTIME_DIR/igittigitt/daemon.sock.",
+)
+@option(
+    "--max-roots",
+    "max_roots",
+    type=click.IntRange(min=1),
+    default=16,
+    show_default=True,
+    help="Warm parsers to keep (least recently used dropped first).",
+)
+@option(
+    "--max-age",
+    "max_age",
+    type=click.FloatRange(min=0),
+    default=60.0,
+    show_default=True,
+    help="Rebuild a warm parser after this many seconds, to see new rule files (0: never).",
+)
+@click.pass_context
+def cli_serve(ctx: click.Context, *, socket_path: str | None, max_roots: int, max_age: float) -> None:
+    """Serve check/filter --daemon requests until interrupted."""
+    if not DAEMON_SUPPORTED:
+        raise click.ClickException("the daemon needs Unix domain sockets, which this platform lacks")
+    from ._daemon import DaemonServer  # noqa: PLC0415 - only defined where Unix domain sockets exist
+
+    perf = resolve_performance(ctx)
+    path = socket_path or default_socket_path()
+    claim_socket_path(path)
+    server = DaemonServer(path, perf, max_roots=max_roots, max_age=max_age)
+    # SIGTERM (service managers) shuts down like Ctrl-C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    click.echo(f"listening on {path}", err=True)
+    try:
+        with contextlib.suppress(KeyboardInterrupt):
+            server.serve_forever()
+    finally:
+        server.server_close()
+        pathlib.Path(path).unlink(missing_ok=True)
+
+
+__all__ = ["cli_serve"]
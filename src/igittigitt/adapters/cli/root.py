@@ -133,18 +133,22 @@ def cli(
 def _register_commands() -> None:
     from .commands import (  # noqa: PLC0415 - circular import break, see comment above
         cli_check,
+        cli_compile,
         cli_config,
         cli_config_deploy,
         cli_config_generate_examples,
         cli_filter,
         cli_info,
         cli_logdemo,
+        cli_serve,
     )
 
     for cmd in (
         cli_info,
         cli_check,
         cli_filter,
+        cli_compile,
+        cli_serve,
         cli_config,
         cli_config_deploy,
         cli_config_generate_examples,
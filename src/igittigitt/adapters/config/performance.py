@@ -7,11 +7,11 @@ and were chosen by measurement.
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
-from igittigitt.igittigitt import set_pattern_cache_size
+from igittigitt.engine import set_pattern_cache_size
 
 if TYPE_CHECKING:
     from lib_layered_config import Config
@@ -24,12 +24,18 @@ class PerformanceSettings(BaseModel):
 
     #: directory-decision LRU capacity (0 disables it)
     dir_cache_max: int = Field(default=8192, ge=0)
-    #: compiled-regex cache capacity (process-wide)
+    #: glob translation cache capacity (process-wide; build time only)
     pattern_cache_max: int = Field(default=4096, ge=0)
+    #: matching engine (see ``igittigitt.engine``)
+    engine: Literal["linear", "adaptive", "combined", "indexed", "generated"] = "indexed"
+    #: cache parsed rule files on disk (see ``igittigitt.rule_cache``)
+    rule_cache: bool = True
     #: stdin read size in bytes for the streaming commands
     stdin_chunk_bytes: int = Field(default=65536, gt=0)
     #: per-token safety bound in bytes (guards the bounded-memory promise)
     max_token_bytes: int = Field(default=1 << 20, gt=0)
+    #: ``--jobs``: input chunks submitted to the workers but not yet written
+    max_in_flight_chunks: int = Field(default=8, ge=1)
 
 
 def load_performance_settings(config: Config) -> PerformanceSettings:
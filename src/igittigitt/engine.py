@@ -0,0 +1,1213 @@
+"""Matching engines: compiled views of a parser's ordered rule list.
+
+The parsers in :mod:`igittigitt.igittigitt` own the rules and the git semantics
+(ancestor pruning, negations); an engine only answers "which rule, by insertion
+index, is the last one matching this path". Every engine gives the same answer -
+they differ in how much work a query costs.
+"""
+
+# STDLIB
+import bisect
+import functools
+import itertools
+import re
+from typing import TYPE_CHECKING, NamedTuple, Protocol
+
+# EXT
+import wcmatch.glob  # type: ignore
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping, Sequence
+
+    from .igittigitt import IgnoreRule
+
+__all__ = (
+    "DEFAULT_ENGINE",
+    "ENGINES",
+    "LITERAL_SEMANTICS",
+    "AdaptiveEngine",
+    "CombinedEngine",
+    "GeneratedEngine",
+    "IndexedEngine",
+    "LinearEngine",
+    "RuleEngine",
+    "RuleStrategy",
+    "build_engine",
+    "classify_glob",
+    "compile_any",
+    "compile_glob",
+    "generate_source",
+    "prime_translations",
+    "required_literal",
+    "translate_glob",
+)
+
+_WCMATCH_FLAGS = wcmatch.glob.DOTGLOB | wcmatch.glob.GLOBSTAR
+
+#: Alternatives per combined regex. ``sre`` saves and restores the group marks
+#: on every branch, so one huge alternation degrades quadratically; measured on
+#: 2000 real-world rules, chunks of 64 are ~2x faster than the per-rule loop,
+#: while 1024+ are slower than it.
+_COMBINED_CHUNK = 64
+
+#: Sibling batches from this size up are scanned as one newline-joined buffer
+#: (see :meth:`CombinedEngine.last_match_many`). The scan saves the per-path call
+#: overhead, not regex work; below this size joining and indexing the lines
+#: costs more than it saves.
+_JOINED_MIN = 32
+
+
+#: Translations being primed (see :func:`prime_translations`); only filled
+#: while they are fed into the bounded :func:`_translation` cache.
+_PRIMING: "dict[str, str]" = dict()
+
+
+@functools.lru_cache(maxsize=4096)
+def _translation(pattern_glob: str) -> str:
+    """``wcmatch``'s anchored regex source for one glob (cached, bounded by ``maxsize``)."""
+    source = _PRIMING.get(pattern_glob)
+    if source is not None:
+        return source
+    return wcmatch.glob.translate([pattern_glob], flags=_WCMATCH_FLAGS)[0][0]
+
+
+def translate_glob(pattern_glob: str) -> str:
+    """
+    The anchored regex source of one glob - ``wcmatch``'s translation, or the
+    one primed from a rule cache.
+
+    ``wcmatch`` produces the regex via its own faithful translation, so
+    behaviour is identical to ``wcmatch.glob.globmatch``. Translations are
+    reused through a bounded cache (see :func:`set_pattern_cache_size`); only
+    building rules and engines translates - matching runs on compiled patterns
+    bound once (:func:`compile_glob`).
+
+    >>> bool(re.match(translate_glob('/a/*.py'), '/a/b.py')), bool(re.match(translate_glob('/a/*.py'), '/a/b/c.py'))
+    (True, False)
+    """
+    return _translation(pattern_glob)
+
+
+def prime_translations(sources: "Mapping[str, str]") -> None:
+    """Put known glob -> regex source translations into the translation cache,
+    so compiling those globs skips ``wcmatch`` (the pure-Python part of building
+    an engine). They share its bound: priming more globs than it holds keeps the
+    most recent ones, and a disabled cache primes nothing."""
+    _PRIMING.update(sources)
+    try:
+        for pattern_glob in sources:
+            _translation(pattern_glob)
+    finally:
+        _PRIMING.clear()
+
+
+def compile_glob(pattern_glob: str) -> "re.Pattern[str]":
+    """
+    The compiled, anchored regex of one glob. Callers keep it - an
+    :class:`~igittigitt.igittigitt.IgnoreRule` binds its own on first use, the
+    engines theirs when they are built - so a match never looks a pattern up
+    in a cache, however many distinct patterns there are.
+    """
+    return re.compile(translate_glob(pattern_glob))
+
+
+def compile_any(pattern_globs: "Sequence[str]") -> "re.Pattern[str] | None":
+    """
+    One regex matching every path that any of *pattern_globs* matches, or
+    ``None`` for no globs.
+
+    >>> compile_any(['/a/*.py', '/b/**']).match('/b/c/d') is not None, compile_any([])
+    (True, None)
+    """
+    if not pattern_globs:
+        return None
+    return re.compile("|".join(f"(?:{_uncaptured(translate_glob(pattern_glob))})" for pattern_glob in pattern_globs))
+
+
+@functools.lru_cache(maxsize=1024)
+def _alternation(pattern_globs: "tuple[str, ...]", multiline: bool = False) -> "re.Pattern[str]":
+    """
+    Compile globs into one alternation, one capture group per glob (cached).
+
+    Keyed by the globs alone, so scopes holding the same scope-relative rules
+    (the same ``.gitignore`` lines in many directories) share one compiled regex.
+    The ``multiline`` variant matches one line of a newline-joined buffer: every
+    line is a path, and the anchors are hoisted into one ``^`` for the whole
+    alternation so ``finditer`` rejects a mid-line position with a single test.
+    """
+    sources = [_uncaptured(translate_glob(pattern_glob), multiline) for pattern_glob in pattern_globs]
+    if multiline:
+        alternatives = "|".join(f"({source.removeprefix('^')})" for source in sources)
+        return re.compile(f"^(?:{alternatives})", re.MULTILINE)
+    return re.compile("|".join(f"({source})" for source in sources))
+
+
+def set_pattern_cache_size(maxsize: int) -> None:
+    """Resize the process-wide glob translation cache (see ``pattern_cache_max``).
+
+    Only building rules and engines translates globs, so the size trades build
+    time for memory; matching speed does not depend on it. ``maxsize`` of ``0``
+    disables the reuse (every build translates again); ``None`` makes it
+    unbounded (bounded in practice by the number of distinct patterns).
+    """
+    global _translation  # noqa: PLW0603 - intentional: resize the process-wide cache
+    _translation = functools.lru_cache(maxsize=maxsize)(_translation.__wrapped__)
+
+
+def _uncaptured(regex: str, multiline: bool = False) -> str:
+    """
+    Turn every capturing group of *regex* into a non-capturing one.
+
+    ``wcmatch`` emits a capture group inside ``**``; inside a combined
+    alternation each extra group adds to the marks ``sre`` saves per branch, and
+    the engine only needs the one group it wraps around every alternative.
+    ``wcmatch`` never emits back-references, so dropping the captures is safe.
+
+    With ``multiline`` the regex is also confined to one line: the ``(?s:``
+    scope is dropped (``.`` stops at a newline) and negated classes exclude
+    ``\\n``.
+
+    >>> _uncaptured(r'^(?s:a($|[/])b[(]\\(c)$')
+    '^(?s:a(?:$|[/])b[(]\\\\(c)$'
+    >>> _uncaptured(r'^(?s:.[^/])$', multiline=True)
+    '^(?:.[^\\\\n/])$'
+    """
+    out: list[str] = list()
+    index = 0
+    length = len(regex)
+    in_class = False
+    while index < length:
+        char = regex[index]
+        if char == "\\":
+            out.append(regex[index : index + 2])
+            index += 2
+            continue
+        if in_class:
+            if char == "]":
+                in_class = False
+        elif char == "[":
+            in_class = True
+            # a ']' right after '[' or '[^' is a literal member of the class
+            out.append(char)
+            index += 1
+            if index < length and regex[index] == "^":
+                out.append("^\\n" if multiline else "^")
+                index += 1
+            if index < length and regex[index] == "]":
+                out.append("]")
+                index += 1
+            continue
+        elif char == "(" and regex[index + 1 : index + 2] != "?":
+            out.append("(?:")
+            index += 1
+            continue
+        elif multiline and regex.startswith("(?s:", index):
+            out.append("(?:")
+            index += 4
+            continue
+        out.append(char)
+        index += 1
+    return "".join(out)
+
+
+class RuleEngine(Protocol):
+    """
+    A compiled view of an ordered rule list.
+
+    ``last_match`` returns the *highest* rule index (insertion order) whose glob
+    matches the path, or ``-1``. For files (``is_file=True``) rules that only
+    match directories are skipped. Engines are built from a snapshot of the rules
+    and never see later changes - the parsers rebuild them lazily after their
+    caches are invalidated.
+    """
+
+    rules: "tuple[IgnoreRule, ...]"
+
+    def last_match(self, str_path: str, is_file: bool) -> int: ...
+
+    def last_match_above(self, str_path: str, is_file: bool, floor: int) -> int:
+        """Like ``last_match``, but only rules with an index above *floor* count (``-1`` if none)."""
+        ...
+
+    def any_match(self, str_path: str, is_file: bool) -> bool:
+        """
+        Whether any rule matches - for a rule set without negations that alone
+        is the decision, so the search stops at the first hit in any order.
+        """
+        ...
+
+    def last_match_many(self, str_paths: "Sequence[str]", is_file: bool) -> "list[int]":
+        """``last_match`` for each path (all of one kind), in order."""
+        ...
+
+
+class LinearEngine:
+    """
+    The reference engine: walk the rules backwards and stop at the first hit,
+    one regex call per rule - O(#rules) Python-level calls on a miss. Each
+    rule's bound ``match`` is resolved once, when the engine is built.
+    """
+
+    __slots__ = ("_matchers", "rules")
+
+    def __init__(self, rules: "Sequence[IgnoreRule]") -> None:
+        self.rules = tuple(rules)
+        # (index, match_file, bound regex match), highest index first
+        self._matchers = tuple(
+            (index, rule.match_file, rule.regex.match) for index, rule in reversed(tuple(enumerate(self.rules)))
+        )
+
+    def last_match(self, str_path: str, is_file: bool) -> int:
+        return self.last_match_above(str_path, is_file, -1)
+
+    def last_match_above(self, str_path: str, is_file: bool, floor: int) -> int:
+        for index, match_file, match in self._matchers:
+            if index <= floor:
+                break
+            if is_file and not match_file:
+                continue
+            if match(str_path) is not None:
+                return index
+        return -1
+
+    def any_match(self, str_path: str, is_file: bool) -> bool:
+        # the reverse scan already stops at its first hit
+        return self.last_match_above(str_path, is_file, -1) >= 0
+
+    def last_match_many(self, str_paths: "Sequence[str]", is_file: bool) -> "list[int]":
+        return [self.last_match(str_path, is_file) for str_path in str_paths]
+
+
+#: Hits between two reorderings of :class:`AdaptiveEngine`'s blocks.
+_REORDER_EVERY = 4096
+
+
+class _Block:
+    """
+    A run of adjacent rules with the same ``is_negation_rule`` and ``match_file``:
+    whichever of them matches, the decision is the same, so they may be tried in
+    any order. ``order`` holds ``(index, glob, bound regex match)``; the block
+    spans the rule indices ``bottom`` to ``top``.
+    """
+
+    __slots__ = ("bottom", "match_file", "order", "top")
+
+    def __init__(self, match_file: bool, bottom: int) -> None:
+        self.match_file = match_file
+        self.order: list[tuple[int, str, Callable[[str], re.Match[str] | None]]] = list()
+        self.bottom = bottom
+        self.top = bottom
+
+
+class AdaptiveEngine:
+    """
+    :class:`LinearEngine` that learns which rules decide most paths.
+
+    The rules are split into commutative blocks (:class:`_Block`), scanned
+    highest block first as usual. Within a block the rules are tried most-hit
+    first; :attr:`hits` counts the deciding rule per glob, and every
+    ``_REORDER_EVERY`` hits the blocks are reordered. A hit fixes the decision:
+    :meth:`decide_above` stops there, so a learned order saves regex calls. Only
+    :meth:`last_match_above` (the reported rule: ``match_with_rule``, ``-v``)
+    goes on to check the rules of the block with a higher index that were not
+    tried yet, so the rule it reports is still the last matching one.
+
+    :attr:`hits` can be shared (:meth:`learn`): the parsers keep it across
+    engine rebuilds and persist it in the rule cache.
+
+    >>> import pathlib
+    >>> from igittigitt.igittigitt import get_rules_from_git_pattern
+    >>> rules = [r for p in ('*.pyc', '*.log', '*.tmp') for r in get_rules_from_git_pattern(p, pathlib.Path('/base'))]
+    >>> engine = AdaptiveEngine(rules)
+    >>> engine.learn({'/base/**/*.pyc': 90})
+    >>> [glob for _index, glob, _match in engine._blocks[0].order]
+    ['/base/**/*.pyc', '/base/**/*.tmp', '/base/**/*.log']
+    >>> engine.last_match('/base/x.pyc', is_file=True), engine.hits['/base/**/*.pyc']
+    (0, 91)
+    """
+
+    __slots__ = ("_blocks", "_countdown", "hits", "rules")
+
+    def __init__(self, rules: "Sequence[IgnoreRule]") -> None:
+        self.rules = tuple(rules)
+        self.hits: dict[str, int] = dict()
+        self._countdown = _REORDER_EVERY
+        blocks: list[_Block] = list()
+        flags: tuple[bool, bool] | None = None
+        for index, rule in enumerate(self.rules):
+            if flags != (rule.is_negation_rule, rule.match_file):
+                flags = (rule.is_negation_rule, rule.match_file)
+                blocks.append(_Block(rule.match_file, index))
+            blocks[-1].order.insert(0, (index, rule.pattern_glob, rule.regex.match))
+            blocks[-1].top = index
+        # highest block first
+        self._blocks = blocks[::-1]
+
+    def learn(self, hits: "dict[str, int]") -> None:
+        """Count into *hits* (glob -> hits, updated in place) and order the blocks by it."""
+        self.hits = hits
+        self._reorder()
+
+    def _reorder(self) -> None:
+        hits = self.hits
+        for block in self._blocks:
+            block.order.sort(key=lambda matcher: (-hits.get(matcher[1], 0), -matcher[0]))
+        self._countdown = _REORDER_EVERY
+
+    def last_match(self, str_path: str, is_file: bool) -> int:
+        return self.last_match_above(str_path, is_file, -1)
+
+    def last_match_above(self, str_path: str, is_file: bool, floor: int) -> int:
+        return self._scan(str_path, is_file, floor, exact=True)
+
+    def decide_above(self, str_path: str, is_file: bool, floor: int) -> int:
+        """
+        Like :meth:`last_match_above`, but the first rule of the deciding block
+        that matches is returned - it decides like the last matching rule (the
+        block is uniform), it just need not be the highest one. For the same
+        reason the rules above *floor* in its own block are not looked at: a
+        matching *floor* rule (the parser's hint) already decides for them.
+
+        >>> import pathlib
+        >>> from igittigitt.igittigitt import get_rules_from_git_pattern
+        >>> rules = [r for p in ('*.log', 'a.*') for r in get_rules_from_git_pattern(p, pathlib.Path('/base'))]
+        >>> engine = AdaptiveEngine(rules)
+        >>> engine.learn({'/base/**/*.log': 5})
+        >>> engine.decide_above('/base/a.log', True, -1), engine.last_match_above('/base/a.log', True, -1)
+        (0, 1)
+        """
+        return self._scan(str_path, is_file, floor, exact=False)
+
+    def _scan(self, str_path: str, is_file: bool, floor: int, exact: bool) -> int:
+        for block in self._blocks:
+            if block.top <= floor or (not exact and block.bottom <= floor):
+                break
+            if is_file and not block.match_file:
+                continue
+            order = block.order
+            for position, (index, glob, match) in enumerate(order):
+                if index <= floor or match(str_path) is None:
+                    continue
+                # the decision is fixed; only the reported rule needs the highest match
+                best, best_glob = index, glob
+                if exact:
+                    for later, later_glob, later_match in order[position + 1 :]:
+                        if later > best and later_match(str_path) is not None:
+                            best, best_glob = later, later_glob
+                self._count(best_glob)
+                return best
+        return -1
+
+    def _count(self, glob: str) -> None:
+        self.hits[glob] = self.hits.get(glob, 0) + 1
+        self._countdown -= 1
+        if not self._countdown:
+            self._reorder()
+
+    def any_match(self, str_path: str, is_file: bool) -> bool:
+        # any hit decides: no fix-up for the reported rule
+        for block in self._blocks:
+            if is_file and not block.match_file:
+                continue
+            for _index, glob, match in block.order:
+                if match(str_path) is not None:
+                    self._count(glob)
+                    return True
+        return False
+
+    def last_match_many(self, str_paths: "Sequence[str]", is_file: bool) -> "list[int]":
+        return [self.last_match(str_path, is_file) for str_path in str_paths]
+
+
+class CombinedEngine:
+    """
+    Compile the ordered rules into a few alternation regexes, highest index
+    first, so the first alternative that matches *is* the last matching rule.
+
+    Each alternative is wrapped in exactly one capture group, so ``lastindex``
+    maps straight back to the rule index - one C-level scan per chunk instead of
+    one Python-level regex call per rule. Files and directories get separate
+    alternations (directory-only rules never match a file).
+
+    With ``relative=True`` every rule must have a scope-relative regex glob
+    (:attr:`RuleStrategy.key`) and the engine is queried with the path relative
+    to that scope, so identical rule lines under different directories compile
+    once.
+
+    >>> import pathlib
+    >>> from igittigitt.igittigitt import get_rules_from_git_pattern
+    >>> base = pathlib.Path('/base')
+    >>> rules = [r for p in ('*.log', 'build/', '!keep.log') for r in get_rules_from_git_pattern(p, base)]
+    >>> engine = CombinedEngine(rules)
+    >>> engine.last_match('/base/a.log', is_file=True), engine.last_match('/base/keep.log', is_file=True)
+    (0, 2)
+    >>> engine.last_match('/base/build', is_file=True), engine.last_match('/base/build', is_file=False)
+    (-1, 1)
+    """
+
+    __slots__ = ("_any", "_dir_chunks", "_file_chunks", "rules")
+
+    def __init__(
+        self, rules: "Sequence[IgnoreRule]", indices: "Iterable[int] | None" = None, relative: bool = False
+    ) -> None:
+        self.rules = tuple(rules)
+        # highest index first; ``indices`` restricts the engine to a subset
+        ordered = sorted(range(len(self.rules)) if indices is None else indices, reverse=True)
+        self._file_chunks = self._compile([index for index in ordered if self.rules[index].match_file], relative)
+        self._dir_chunks = self._compile(ordered, relative)
+        # (for files, for directories): one group-free alternation each, built on first use
+        self._any: tuple[re.Pattern[str] | None, re.Pattern[str] | None] | None = None
+
+    def _compile(self, ordered: "list[int]", relative: bool) -> "list[_Chunk]":
+        chunks: list[_Chunk] = list()
+        for start in range(0, len(ordered), _COMBINED_CHUNK):
+            indices = ordered[start : start + _COMBINED_CHUNK]
+            rules = [self.rules[index] for index in indices]
+            pattern_globs = tuple(rule.strategy.key if relative else rule.pattern_glob for rule in rules)
+            # group number n (1-based) is the n-th alternative
+            chunks.append((_alternation(pattern_globs), (-1, *indices), pattern_globs))
+        return chunks
+
+    def last_match(self, str_path: str, is_file: bool) -> int:
+        return self.last_match_above(str_path, is_file, -1)
+
+    def last_match_above(self, str_path: str, is_file: bool, floor: int) -> int:
+        """Like :meth:`last_match`, but only rules with an index above *floor* count."""
+        for combined, indices, _pattern_globs in self._file_chunks if is_file else self._dir_chunks:
+            if indices[1] <= floor:
+                break
+            found = combined.match(str_path)
+            if found is not None:
+                index = indices[found.lastindex or 0]
+                return index if index > floor else -1
+        return -1
+
+    def any_match(self, str_path: str, is_file: bool) -> bool:
+        """
+        :meth:`last_match` ``>= 0`` as a single regex without capture groups -
+        ``sre`` stops at the first alternative that matches, whichever rule it is.
+
+        >>> import pathlib
+        >>> from igittigitt.igittigitt import get_rules_from_git_pattern
+        >>> rules = [r for p in ('*.log', 'build/') for r in get_rules_from_git_pattern(p, pathlib.Path('/base'))]
+        >>> engine = CombinedEngine(rules)
+        >>> engine.any_match('/base/a.log', is_file=True), engine.any_match('/base/build', is_file=True)
+        (True, False)
+        """
+        if self._any is None:
+            self._any = (
+                compile_any([glob for chunk in self._file_chunks for glob in chunk[2]]),
+                compile_any([glob for chunk in self._dir_chunks for glob in chunk[2]]),
+            )
+        combined = self._any[0] if is_file else self._any[1]
+        return combined is not None and combined.match(str_path) is not None
+
+    def last_match_many(self, str_paths: "Sequence[str]", is_file: bool) -> "list[int]":
+        """
+        ``last_match`` for many paths: from ``_JOINED_MIN`` paths up (the
+        thousands of names ``shutil_ignore`` gets for a huge flat directory), the
+        paths are joined into one newline-separated buffer and each chunk runs
+        once over it with ``finditer`` - the per-path loop moves into ``sre``.
+
+        >>> import pathlib
+        >>> from igittigitt.igittigitt import get_rules_from_git_pattern
+        >>> rules = [r for p in ('*.log', '!keep.log') for r in get_rules_from_git_pattern(p, pathlib.Path('/base'))]
+        >>> paths = [f'/base/{name}' for name in ('a.log', 'b.txt', 'keep.log') * 20]
+        >>> CombinedEngine(rules).last_match_many(paths, is_file=True)[:3]
+        [0, -1, 1]
+        """
+        if len(str_paths) < _JOINED_MIN or any("\n" in str_path for str_path in str_paths):
+            return [self.last_match(str_path, is_file) for str_path in str_paths]
+        buffer = "\n".join(str_paths)
+        starts = list(itertools.accumulate((len(str_path) + 1 for str_path in str_paths[:-1]), initial=0))
+        results = [-1] * len(str_paths)
+        for _combined, indices, pattern_globs in self._file_chunks if is_file else self._dir_chunks:
+            for found in _alternation(pattern_globs, multiline=True).finditer(buffer):
+                line = bisect.bisect_right(starts, found.start()) - 1
+                if found.end() != starts[line] + len(str_paths[line]):
+                    # a glob class spanning the newline escaped its line - decide per path
+                    return [self.last_match(str_path, is_file) for str_path in str_paths]
+                # chunks run highest index first: the first chunk to match a line wins
+                if results[line] < 0:
+                    results[line] = indices[found.lastindex or 0]
+        return results
+
+
+#: one combined alternation: (regex, (-1, *rule indices), its globs)
+_Chunk = tuple["re.Pattern[str]", "tuple[int, ...]", "tuple[str, ...]"]
+
+
+class RuleStrategy(NamedTuple):
+    """
+    How a rule's glob can be decided without running its regex.
+
+    ``scope`` is the literal directory the glob is confined to (``""`` is the
+    filesystem root): every strategy except ``literal`` only matches paths
+    strictly below it. ``key`` is the literal the strategy looks up - the whole
+    path, a file name, an extension or a name suffix. For ``regex`` it is the
+    scope-relative glob, matched against the path below ``scope`` (``""`` when
+    the glob has no clean relative form and must run on the whole path).
+    """
+
+    kind: str
+    scope: str
+    key: str
+
+
+#: the path equals the glob (``/base/build``)
+STRATEGY_LITERAL = "literal"
+#: any path below ``scope`` whose last component is ``key`` (``**/node_modules``)
+STRATEGY_BASENAME = "basename"
+#: any path below ``scope`` whose name ends with the single extension ``key`` (``**/*.pyc``)
+STRATEGY_EXTENSION = "extension"
+#: any path below ``scope`` whose name ends with ``key`` (``**/*.tar.gz``)
+STRATEGY_SUFFIX = "suffix"
+#: every path below ``scope`` (``build/**``)
+STRATEGY_PREFIX = "prefix"
+#: none of the above - only the translated regex can decide
+STRATEGY_REGEX = "regex"
+
+_GLOB_MAGIC = frozenset("*?[\\")
+
+
+def _literal_semantics() -> bool:
+    """
+    Whether a literal glob segment matches exactly its own text on this
+    platform. ``wcmatch`` is case-insensitive and accepts ``\\`` separators
+    on Windows; the literal strategies would then disagree with the regex, so
+    every rule falls back to its regex there.
+    """
+    probe = re.compile(wcmatch.glob.translate(["/a/B"], flags=_WCMATCH_FLAGS)[0][0])
+    return probe.match("/a/b") is None and probe.match("/a\\B") is None
+
+
+#: decided once per process; recorded in ruleset files (their strategies depend on it)
+LITERAL_SEMANTICS = _literal_semantics()
+
+
+def _is_literal(segment: str) -> bool:
+    return not _GLOB_MAGIC.intersection(segment)
+
+
+def classify_glob(pattern_glob: str) -> RuleStrategy:  # noqa: PLR0911 - one return per strategy
+    """
+    Classify an absolute, forward-slash glob into a :class:`RuleStrategy`.
+
+    The leading literal directories form the scope; the strategy is picked from
+    the remainder. Anything the cheap strategies cannot decide *exactly* for a
+    normalized absolute path falls back to ``regex``.
+
+    >>> classify_glob('/base/build')
+    RuleStrategy(kind='literal', scope='/base', key='/base/build')
+    >>> classify_glob('/base/**/node_modules')
+    RuleStrategy(kind='basename', scope='/base', key='node_modules')
+    >>> classify_glob('/base/**/*.pyc')
+    RuleStrategy(kind='extension', scope='/base', key='.pyc')
+    >>> classify_glob('/base/**/*.tar.gz')
+    RuleStrategy(kind='suffix', scope='/base', key='.tar.gz')
+    >>> classify_glob('/base/build/**/*')
+    RuleStrategy(kind='prefix', scope='/base/build', key='')
+    >>> classify_glob('/base/src/*.py')
+    RuleStrategy(kind='regex', scope='/base/src', key='*.py')
+    >>> classify_glob('/base/a/*/b')
+    RuleStrategy(kind='regex', scope='/base/a', key='*/b')
+    """
+    segments = pattern_glob.split("/")
+    if (
+        not LITERAL_SEMANTICS
+        or len(segments) < 2  # noqa: PLR2004 - root plus at least one component
+        or segments[0]
+        or any(segment in ("", ".", "..") for segment in segments[1:])
+    ):
+        return RuleStrategy(STRATEGY_REGEX, "", "")
+    depth = 1
+    while depth < len(segments) - 1 and _is_literal(segments[depth]):
+        depth += 1
+    scope = "/".join(segments[:depth])
+    rest = segments[depth:]
+    if len(rest) == 1 and _is_literal(rest[0]):
+        return RuleStrategy(STRATEGY_LITERAL, scope, pattern_glob)
+    if len(rest) == 2 and rest[0] == "**":  # noqa: PLR2004 - "**" plus the name
+        name = rest[1]
+        if _is_literal(name):
+            return RuleStrategy(STRATEGY_BASENAME, scope, name)
+        if name == "*":
+            return RuleStrategy(STRATEGY_PREFIX, scope, "")
+        tail = name[1:]
+        if name.startswith("*") and tail and _is_literal(tail):
+            if tail.startswith(".") and "." not in tail[1:]:
+                return RuleStrategy(STRATEGY_EXTENSION, scope, tail)
+            return RuleStrategy(STRATEGY_SUFFIX, scope, tail)
+    return RuleStrategy(STRATEGY_REGEX, scope, "/".join(rest))
+
+
+def required_literal(pattern_glob: str) -> str:
+    """
+    The longest literal run every path matching *pattern_glob* must contain.
+
+    Runs stop at ``/`` and at glob magic (``*``, ``?``, ``[...]``); an escaped
+    character is part of the run. Returns ``""`` when there is no run of at least
+    two characters, or when the glob uses a construct this scan does not model.
+
+    >>> required_literal('**/*.egg-info/**/*'), required_literal('src/*_test.py'), required_literal('**/\\\\#x')
+    ('.egg-info', '_test.py', '#x')
+    >>> required_literal('*/?'), required_literal('[[:alpha:]]x')
+    ('', '')
+    """
+    runs: list[str] = list()
+    run: list[str] = list()
+    index = 0
+    length = len(pattern_glob)
+    while index < length:
+        char = pattern_glob[index]
+        if char == "\\":
+            escaped = pattern_glob[index + 1 : index + 2]
+            if escaped in ("", "/"):
+                return ""
+            run.append(escaped)
+            index += 2
+            continue
+        if char not in "/*?[":
+            run.append(char)
+            index += 1
+            continue
+        runs.append("".join(run))
+        run = list()
+        index += 1
+        if char == "[":
+            start = index + 1 if pattern_glob[index : index + 1] in ("!", "^") else index
+            start += pattern_glob[start : start + 1] == "]"
+            close = pattern_glob.find("]", start)
+            if close < 0 or "[" in pattern_glob[start:close] or "\\" in pattern_glob[start:close]:
+                return ""
+            index = close + 1
+    runs.append("".join(run))
+    longest = max(runs, key=len)
+    return longest if len(longest) >= 2 else ""  # noqa: PLR2004 - single characters filter nothing
+
+
+class _LiteralPrefilter:
+    """
+    Report which of a fixed set of literals occur in a path, in one scan.
+
+    The literals are combined into a single lookahead alternation (longest
+    first), so every start position reports its longest literal; the shorter
+    literals contained in it are added from a precomputed map.
+    """
+
+    __slots__ = ("_implied", "_scan")
+
+    def __init__(self, literals: "Iterable[str]") -> None:
+        ordered = sorted(set(literals), key=lambda literal: (-len(literal), literal))
+        self._scan = re.compile("(?=(" + "|".join(re.escape(literal) for literal in ordered) + "))")
+        self._implied = {
+            literal: tuple(other for other in ordered if other != literal and other in literal) for literal in ordered
+        }
+
+    def found(self, str_path: str) -> "set[str]":
+        literals = {match.group(1) for match in self._scan.finditer(str_path)}
+        for literal in tuple(literals):
+            literals.update(self._implied[literal])
+        return literals
+
+
+def _first_candidate(candidates: "Iterable[tuple[int, bool]]", best: int, is_file: bool) -> int:
+    """Highest candidate above *best* that applies to this path kind (candidates run highest index first)."""
+    for index, match_file in candidates:
+        if index <= best:
+            break
+        if match_file or not is_file:
+            return index
+    return best
+
+
+class _ScopeNode:
+    """
+    One directory of the scope trie: the rules confined to this directory.
+
+    Candidate lists hold ``(index, match_file)`` pairs, highest index first;
+    ``top`` is the highest index in the whole node, so a node that cannot beat
+    the current best is skipped without a lookup.
+    """
+
+    __slots__ = ("basename", "children", "extension", "gated", "prefix", "regex", "regex_indices", "suffix", "top")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _ScopeNode] = dict()
+        self.basename: dict[str, list[tuple[int, bool]]] = dict()
+        self.extension: dict[str, list[tuple[int, bool]]] = dict()
+        self.suffix: list[tuple[int, bool, str]] = list()
+        self.prefix: list[tuple[int, bool]] = list()
+        self.regex_indices: list[int] = list()
+        self.regex: CombinedEngine | None = None
+        # required literal -> [(index, match_file, scope-relative regex)]
+        self.gated: dict[str, list[tuple[int, bool, re.Pattern[str]]]] = dict()
+        self.top = -1
+
+    def table_match(self, relative_path: str, name: str, found: "set[str]", is_file: bool, best: int) -> int:
+        """
+        Highest rule index above *best* in this scope, except for the combined
+        :attr:`regex` rules. *relative_path* is the path below the scope, *found*
+        the required literals that occur in it.
+        """
+        if self.top <= best:
+            return best
+        best = _first_candidate(self.basename.get(name, ()), best, is_file)
+        if self.extension and (dot := name.rfind(".")) >= 0:
+            best = _first_candidate(self.extension.get(name[dot:], ()), best, is_file)
+        for index, match_file, tail in self.suffix:
+            if index <= best:
+                break
+            if (match_file or not is_file) and name.endswith(tail):
+                best = index
+                break
+        best = _first_candidate(self.prefix, best, is_file)
+        if not found or not self.gated:
+            return best
+        # the gated regex rules whose required literal occurs
+        for literal in found:
+            for index, match_file, pattern in self.gated.get(literal, ()):
+                if index <= best:
+                    break
+                if (match_file or not is_file) and pattern.match(relative_path) is not None:
+                    best = index
+                    break
+        return best
+
+
+class IndexedEngine:
+    """
+    Answer most queries with a few dict lookups instead of regexes.
+
+    Every rule is classified once (:attr:`IgnoreRule.strategy`). Exact paths go
+    into one dict; all other rules are filed under their scope directory in a
+    path-component trie, so a query only looks at the rules of directories
+    that contain it - a ``.gitignore`` in a sibling subtree costs nothing.
+    Within a scope, ``**/name`` and ``**/*.ext`` rules sit in per-name and
+    per-extension tables, ``**/*suffix`` and ``dir/**`` rules in short lists,
+    and only the genuinely wild globs run as regexes. A regex rule with a
+    required literal (:func:`required_literal`, e.g. ``.egg-info``) is gated:
+    one multi-literal scan per path selects the few rules whose literal occurs,
+    and only those run. The rest go through a :class:`CombinedEngine` per
+    scope. Rule indices stay global and results
+    merge by maximum, so last-match-wins stays exact.
+
+    The tables assume a normalized absolute path; anything else (the root ``/``,
+    a doubled slash) is answered by one regex scan over all rules.
+
+    >>> import pathlib
+    >>> from igittigitt.igittigitt import get_rules_from_git_pattern
+    >>> base = pathlib.Path('/base')
+    >>> rules = [r for p in ('*.log', 'src/*.py', 'build/', '!keep.log') for r in get_rules_from_git_pattern(p, base)]
+    >>> engine = IndexedEngine(rules)
+    >>> [engine.last_match(path, is_file=True) for path in ('/base/a.log', '/base/src/m.py', '/base/x/keep.log')]
+    [0, 1, 3]
+    >>> engine.last_match('/base/x/build', is_file=True), engine.last_match('/base/x/build', is_file=False)
+    (-1, 2)
+    >>> engine.last_match('/elsewhere/a.log', is_file=True)
+    -1
+    """
+
+    __slots__ = ("_literal", "_prefilter", "_reference", "_root", "_unscoped", "rules")
+
+    def __init__(self, rules: "Sequence[IgnoreRule]") -> None:
+        self.rules = tuple(rules)
+        # the whole-path scan for unnormalized paths, compiled on first use
+        self._reference: CombinedEngine | None = None
+        # path -> (highest index for directories, highest index for files)
+        literal: dict[str, list[int]] = dict()
+        unscoped: list[int] = list()
+        required_literals: set[str] = set()
+        self._root = _ScopeNode()
+        for index, rule in enumerate(self.rules):
+            kind, scope, key = rule.strategy
+            if kind == STRATEGY_REGEX and not key:
+                unscoped.append(index)
+                continue
+            if kind == STRATEGY_LITERAL:
+                best = literal.setdefault(key, [-1, -1])
+                best[0] = index
+                if rule.match_file:
+                    best[1] = index
+                continue
+            node = self._root
+            for component in scope.split("/")[1:]:
+                node = node.children.setdefault(component, _ScopeNode())
+            node.top = index
+            candidate = (index, rule.match_file)
+            if kind == STRATEGY_BASENAME:
+                node.basename.setdefault(key, list()).insert(0, candidate)
+            elif kind == STRATEGY_EXTENSION:
+                node.extension.setdefault(key, list()).insert(0, candidate)
+            elif kind == STRATEGY_SUFFIX:
+                node.suffix.insert(0, (index, rule.match_file, key))
+            elif kind == STRATEGY_PREFIX:
+                node.prefix.insert(0, candidate)
+            elif required := required_literal(key):
+                gate: tuple[int, bool, re.Pattern[str]] = (index, rule.match_file, compile_glob(key))
+                node.gated.setdefault(required, []).insert(0, gate)
+                required_literals.add(required)
+            else:
+                node.regex_indices.append(index)
+        self._literal = {key: (best[0], best[1]) for key, best in literal.items()}
+        self._unscoped = CombinedEngine(self.rules, unscoped) if unscoped else None
+        self._prefilter = _LiteralPrefilter(required_literals) if required_literals else None
+        self._compile_regexes(self._root)
+
+    def _compile_regexes(self, node: _ScopeNode) -> None:
+        if node.regex_indices:
+            node.regex = CombinedEngine(self.rules, node.regex_indices, relative=True)
+        for child in node.children.values():
+            self._compile_regexes(child)
+
+    def _reference_engine(self) -> CombinedEngine:
+        if self._reference is None:
+            self._reference = CombinedEngine(self.rules)
+        return self._reference
+
+    def _fallback(self, str_path: str, is_file: bool, floor: int = -1) -> int:
+        return self._reference_engine().last_match_above(str_path, is_file, floor)
+
+    def _scopes(self, str_path: str) -> "list[tuple[_ScopeNode, int]]":
+        """
+        The scopes containing the path - the root, then each parent directory -
+        with the offset where the path below that scope starts.
+        """
+        scopes = [(self._root, 1)]
+        node = self._root
+        start = 1
+        while (slash := str_path.find("/", start)) >= 0:
+            child = node.children.get(str_path[start:slash])
+            if child is None:
+                break
+            node, start = child, slash + 1
+            scopes.append((node, start))
+        return scopes
+
+    def _table_match(self, str_path: str, scopes: "list[tuple[_ScopeNode, int]]", is_file: bool, best: int = -1) -> int:
+        """Highest index above *best* from everything but the combined regexes (per scope and unscoped)."""
+        exact = self._literal.get(str_path)
+        if exact is not None:
+            best = max(best, exact[is_file])
+        name = str_path[str_path.rfind("/") + 1 :]
+        # one literal scan decides which gated regex rules can match at all
+        found = self._prefilter.found(str_path) if self._prefilter is not None else set[str]()
+        # deeper rule files usually load later, so their (higher) indices come first
+        for scope, offset in reversed(scopes):
+            best = scope.table_match(str_path[offset:], name, found, is_file, best)
+        return best
+
+    def last_match(self, str_path: str, is_file: bool) -> int:
+        return self.last_match_above(str_path, is_file, -1)
+
+    def last_match_above(self, str_path: str, is_file: bool, floor: int) -> int:
+        """
+        Like :meth:`last_match`, but only rules with an index above *floor* count:
+        every table and regex starts from *floor* as the best so far, so scopes
+        whose rules all lie at or below it are skipped.
+        """
+        if not _is_normalized(str_path):
+            return self._fallback(str_path, is_file, floor)
+        scopes = self._scopes(str_path)
+        best = self._table_match(str_path, scopes, is_file, floor)
+        for scope, offset in reversed(scopes):
+            if scope.regex is not None and scope.top > best:
+                best = max(best, scope.regex.last_match_above(str_path[offset:], is_file, best))
+        if self._unscoped is not None:
+            best = max(best, self._unscoped.last_match_above(str_path, is_file, best))
+        return best if best > floor else -1
+
+    def any_match(self, str_path: str, is_file: bool) -> bool:
+        """
+        :meth:`last_match` ``>= 0``, stopping at the first source that has a
+        hit: the tables, then the combined regexes of each scope, unscoped last.
+        """
+        if not _is_normalized(str_path):
+            return self._reference_engine().any_match(str_path, is_file)
+        scopes = self._scopes(str_path)
+        if self._table_match(str_path, scopes, is_file) >= 0:
+            return True
+        for scope, offset in reversed(scopes):
+            if scope.regex is not None and scope.regex.any_match(str_path[offset:], is_file):
+                return True
+        return self._unscoped is not None and self._unscoped.any_match(str_path, is_file)
+
+    def last_match_many(self, str_paths: "Sequence[str]", is_file: bool) -> "list[int]":
+        """
+        Like :meth:`last_match` per path, but every combined regex runs once over
+        all the paths that reach it (:meth:`CombinedEngine.last_match_many`) -
+        siblings share their scopes, so a big directory listing costs one
+        buffer scan per scope instead of one regex call per name.
+        """
+        if len(str_paths) < _JOINED_MIN:
+            return [self.last_match(str_path, is_file) for str_path in str_paths]
+        results: list[int] = list()
+        # combined regex -> (positions, paths relative to its scope)
+        pending: dict[CombinedEngine, tuple[list[int], list[str]]] = dict()
+        for position, str_path in enumerate(str_paths):
+            if not _is_normalized(str_path):
+                results.append(self._fallback(str_path, is_file))
+                continue
+            scopes = self._scopes(str_path)
+            results.append(self._table_match(str_path, scopes, is_file))
+            reaching = [(scope.regex, offset) for scope, offset in scopes if scope.regex is not None]
+            if self._unscoped is not None:
+                reaching.append((self._unscoped, 0))
+            for regex, offset in reaching:
+                positions, relative_paths = pending.setdefault(regex, (list(), list()))
+                positions.append(position)
+                relative_paths.append(str_path[offset:])
+        for regex, (positions, relative_paths) in pending.items():
+            for position, index in zip(positions, regex.last_match_many(relative_paths, is_file), strict=True):
+                results[position] = max(results[position], index)
+        return results
+
+
+def _is_normalized(str_path: str) -> bool:
+    """An absolute path without a doubled or trailing slash - what the indexed tables assume."""
+    return str_path[:1] == "/" and str_path[-1:] != "/" and "//" not in str_path
+
+
+#: Decision functions kept compiled (:func:`_decision_function`), one per rule set.
+_GENERATED_MAX = 32
+
+
+def _inline_test(rule: "IgnoreRule", implied: "tuple[str, ...]", patterns: "dict[str, int]") -> str:
+    """
+    One rule's test as a Python expression over ``path`` / ``name`` - the
+    :class:`IndexedEngine` tables' checks, inlined. *implied* are the scopes the
+    dispatch already guarantees; *patterns* numbers the regex sources.
+    Every string from the rules is emitted with ``repr``.
+    """
+    kind, scope, key = rule.strategy
+    if kind == STRATEGY_LITERAL:
+        return f"path == {key!r}"
+    tests: list[str] = list()
+    if scope not in implied:
+        tests.append(f"path.startswith({scope + '/'!r})")
+    if kind == STRATEGY_BASENAME:
+        tests.append(f"name == {key!r}")
+    elif kind in (STRATEGY_EXTENSION, STRATEGY_SUFFIX):
+        tests.append(f"name.endswith({key!r})")
+    elif kind == STRATEGY_REGEX:
+        if key:
+            if required := required_literal(key):
+                tests.append(f"{required!r} in path")
+            number = patterns.setdefault(translate_glob(key), len(patterns))
+            target = f"path[{len(scope) + 1}:]"
+        else:
+            number = patterns.setdefault(translate_glob(rule.pattern_glob), len(patterns))
+            target = "path"
+        tests.append(f"_P{number}.match({target}) is not None")
+    return " and ".join(tests)
+
+
+def _decision_body(
+    name: str, candidates: "list[tuple[int, IgnoreRule]]", implied: "tuple[str, ...]", patterns: "dict[str, int]"
+) -> "list[str]":
+    """``def name(path, name)``: the first of *candidates* (highest index first) that matches."""
+    lines = [f"def {name}(path, name):"]
+    for index, rule in candidates:
+        test = _inline_test(rule, implied, patterns)
+        if not test:  # matches everything the dispatch lets through
+            lines.append(f"    return {index}")
+            return lines
+        lines.extend((f"    if {test}:", f"        return {index}"))
+    lines.append("    return -1")
+    return lines
+
+
+def generate_source(rules: "Sequence[IgnoreRule]") -> str:
+    """
+    Python source of ``decide(path, is_file)``, :meth:`RuleEngine.last_match`
+    specialized to *rules* for a normalized absolute path.
+
+    Every rule matches only below its scope, so the rules are grouped by the
+    first path component below the deepest directory all scopes share, and
+    ``decide`` dispatches on it with one dict lookup. Each group becomes two
+    straight-line functions (files, directories) that test its rules highest
+    index first, with the :class:`IndexedEngine` strategies inlined (``==``,
+    ``endswith``, ``startswith``, a required-literal ``in``); only regex rules
+    call a regex, compiled once at module level.
+
+    >>> import pathlib
+    >>> from igittigitt.igittigitt import get_rules_from_git_pattern
+    >>> rules = [r for p in ('*.pyc', 'src/*.tmp') for r in get_rules_from_git_pattern(p, pathlib.Path('/repo'))]
+    >>> print(generate_source(rules))  # doctest: +ELLIPSIS
+    # generated by igittigitt.engine.generate_source
+    import re
+    _P0 = re.compile(...)
+    <BLANKLINE>
+    def _file_0(path, name):
+        if name.endswith('.pyc'):
+            return 0
+        return -1
+    <BLANKLINE>
+    def _dir_0(path, name):
+        if name.endswith('.pyc'):
+            return 0
+        return -1
+    <BLANKLINE>
+    def _file_1(path, name):
+        if '.tmp' in path and _P0.match(path[10:]) is not None:
+            return 1
+        if name.endswith('.pyc'):
+            return 0
+        return -1
+    <BLANKLINE>
+    def _dir_1(path, name):
+        if '.tmp' in path and _P0.match(path[10:]) is not None:
+            return 1
+        if name.endswith('.pyc'):
+            return 0
+        return -1
+    <BLANKLINE>
+    _FILE = {
+        'src': _file_1,
+    }
+    _DIR = {
+        'src': _dir_1,
+    }
+    <BLANKLINE>
+    def decide(path, is_file):
+        if not path.startswith('/repo/'):
+            return -1
+        name = path[path.rfind('/') + 1 :]
+        slash = path.find('/', 6)
+        if is_file:
+            return (_FILE.get(path[6:slash], _file_0) if slash >= 0 else _file_0)(path, name)
+        return (_DIR.get(path[6:slash], _dir_0) if slash >= 0 else _dir_0)(path, name)
+    <BLANKLINE>
+    """
+    scopes = [rule.strategy.scope.split("/") for rule in rules]
+    common = scopes[0] if scopes else [""]
+    for components in scopes[1:]:
+        depth = 0
+        while depth < min(len(common), len(components)) and common[depth] == components[depth]:
+            depth += 1
+        common = common[:depth]
+    root, depth = "/".join(common), len(common)
+    # component below the root -> the rules that can match there (highest index
+    # first); a rule scoped to the root itself belongs to every group, and ""
+    # is the group of the root's direct children and of unlisted components
+    groups: dict[str, list[tuple[int, IgnoreRule]]] = {"": []}
+    for components in scopes:
+        if len(components) > depth:
+            groups.setdefault(components[depth], [])
+    for index in range(len(rules) - 1, -1, -1):
+        own = scopes[index][depth] if len(scopes[index]) > depth else ""
+        for group, members in groups.items():
+            if not own or own == group:
+                members.append((index, rules[index]))
+    patterns: dict[str, int] = dict()
+    functions: list[str] = list()
+    tables: dict[str, list[str]] = {"file": [], "dir": []}
+    for number, (group, members) in enumerate(groups.items()):
+        implied = (root, f"{root}/{group}") if group else (root,)
+        for kind, candidates in (("file", [member for member in members if member[1].match_file]), ("dir", members)):
+            functions.extend(("", *_decision_body(f"_{kind}_{number}", candidates, implied, patterns)))
+            if group:
+                tables[kind].append(f"    {group!r}: _{kind}_{number},")
+    prefix = root + "/"
+    offset = len(prefix)
+    lines = [
+        "# generated by igittigitt.engine.generate_source",
+        "import re",
+        *(f"_P{number} = re.compile({source!r})" for number, source in enumerate(patterns)),
+        *functions,
+        "",
+        *(line for kind in ("file", "dir") for line in (f"_{kind.upper()} = {{", *tables[kind], "}")),
+        "",
+        "def decide(path, is_file):",
+        f"    if not path.startswith({prefix!r}):",
+        "        return -1",
+        "    name = path[path.rfind('/') + 1 :]",
+        f"    slash = path.find('/', {offset})",
+        "    if is_file:",
+        f"        return (_FILE.get(path[{offset}:slash], _file_0) if slash >= 0 else _file_0)(path, name)",
+        f"    return (_DIR.get(path[{offset}:slash], _dir_0) if slash >= 0 else _dir_0)(path, name)",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+@functools.lru_cache(maxsize=_GENERATED_MAX)
+def _decision_function(source: str) -> "Callable[[str, bool], int]":
+    """
+    ``exec`` a :func:`generate_source` module once and return its ``decide``.
+    Keyed by the source - which the rule set determines - so parsers rebuilt
+    over the same rules (engine rebuilds, ``SharedMatcher`` threads) share it.
+    """
+    namespace: dict[str, object] = dict()
+    # our own source: every string taken from the rules is a repr() literal
+    exec(compile(source, "<igittigitt generated>", "exec"), namespace)  # noqa: S102
+    decide: Callable[[str, bool], int] = namespace["decide"]  # type: ignore[assignment]
+    return decide
+
+
+class GeneratedEngine:
+    """
+    Match with a Python function generated for the rule set
+    (:func:`generate_source`) - no tables or candidate lists are walked at
+    query time, the checks are straight-line code. Building costs a code
+    generation and a ``compile``, paid once per distinct rule set and process
+    (:func:`_decision_function`), so it suits stable rule sets queried very
+    often (the daemon, CI filters). Unnormalized paths use the reference scan.
+
+    >>> import pathlib
+    >>> from igittigitt.igittigitt import get_rules_from_git_pattern
+    >>> base = pathlib.Path('/base')
+    >>> rules = [r for p in ('*.log', 'src/*.py', 'build/', '!keep.log') for r in get_rules_from_git_pattern(p, base)]
+    >>> engine = GeneratedEngine(rules)
+    >>> [engine.last_match(path, is_file=True) for path in ('/base/a.log', '/base/src/m.py', '/base/x/keep.log')]
+    [0, 1, 3]
+    >>> engine.last_match('/base/x/build', is_file=True), engine.last_match('/base/x/build', is_file=False)
+    (-1, 2)
+    """
+
+    __slots__ = ("_decide", "_reference", "rules", "source")
+
+    def __init__(self, rules: "Sequence[IgnoreRule]") -> None:
+        self.rules = tuple(rules)
+        #: the generated module (see :func:`generate_source`)
+        self.source = generate_source(self.rules)
+        self._decide = _decision_function(self.source)
+        self._reference: CombinedEngine | None = None
+
+    def _reference_engine(self) -> CombinedEngine:
+        if self._reference is None:
+            self._reference = CombinedEngine(self.rules)
+        return self._reference
+
+    def last_match(self, str_path: str, is_file: bool) -> int:
+        if not _is_normalized(str_path):
+            return self._reference_engine().last_match(str_path, is_file)
+        return self._decide(str_path, is_file)
+
+    def last_match_above(self, str_path: str, is_file: bool, floor: int) -> int:
+        # the whole function is cheaper than skipping into it
+        index = self.last_match(str_path, is_file)
+        return index if index > floor else -1
+
+    def any_match(self, str_path: str, is_file: bool) -> bool:
+        return self.last_match(str_path, is_file) >= 0
+
+    def last_match_many(self, str_paths: "Sequence[str]", is_file: bool) -> "list[int]":
+        return [self.last_match(str_path, is_file) for str_path in str_paths]
+
+
+#: Engine factories by name (the parsers' ``engine=`` argument).
+ENGINES: "dict[str, Callable[[Sequence[IgnoreRule]], RuleEngine]]" = {
+    "linear": LinearEngine,
+    "adaptive": AdaptiveEngine,
+    "combined": CombinedEngine,
+    "indexed": IndexedEngine,
+    "generated": GeneratedEngine,
+}
+
+DEFAULT_ENGINE = "indexed"
+
+
+def build_engine(name: str, rules: "Sequence[IgnoreRule]") -> RuleEngine:
+    """Build the engine registered as *name* over a snapshot of *rules*."""
+    return ENGINES[name](rules)
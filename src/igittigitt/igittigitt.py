@@ -1,18 +1,36 @@
 # STDLIB
-import functools
-import glob
+import bisect
+import itertools
 import os
 import pathlib
 import platform
-import re
 import sys
 from collections import OrderedDict
-from dataclasses import dataclass
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
 from types import TracebackType
-from typing import Any, Union
-
-# EXT
-import wcmatch.glob  # type: ignore
+from typing import TYPE_CHECKING, Any, Literal, TypeVar, Union, overload
+
+# PROJ
+from .engine import (
+    DEFAULT_ENGINE,
+    ENGINES,
+    AdaptiveEngine,
+    RuleEngine,
+    RuleStrategy,
+    build_engine,
+    classify_glob,
+    compile_any,
+    compile_glob,
+    prime_translations,
+    set_pattern_cache_size,
+    translate_glob,
+)
+from .rule_cache import CachedRule, RuleFileCache
+from .ruleset_file import CompiledRule, RulesetFormatError, read_ruleset, write_ruleset
+
+if TYPE_CHECKING:
+    import re
 
 # CONF
 try:
@@ -21,7 +39,9 @@ except ImportError:  # pragma: no cover
     from conf_igittigitt import conf_igittigitt  # type: ignore  # pragma: no cover
 
 PathLikeOrString = Union[str, "os.PathLike[Any]"]
-__all__ = ("IgnoreParser", "IncludeParser")
+# ``set_pattern_cache_size`` lives in :mod:`igittigitt.engine`; re-exported for
+# the callers that imported it from here.
+__all__ = ("IgnoreParser", "IncludeParser", "RuleSet", "posix_path", "set_pattern_cache_size", "walk")
 
 #: Upper bound for the per-instance directory-decision LRU cache. Keeps memory
 #: O(this), not O(#directories), while capturing the locality of a top-down tree
@@ -36,37 +56,106 @@ _CACHE_MISS: Any = object()
 #: ``bool | Unknown``; the single ignore is confined to this one boundary line.
 _DEFAULT_ADD_DEFAULT_PATTERNS: bool = conf_igittigitt.add_default_patterns  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
 
-_WCMATCH_FLAGS = wcmatch.glob.DOTGLOB | wcmatch.glob.GLOBSTAR
 
+def _as_posix(str_path: str) -> str:
+    """``pathlib.Path(str_path).as_posix()`` for an absolute native path, without the ``Path``."""
+    return str_path if os.sep == "/" else str_path.replace(os.sep, "/")
+
+
+def _parent(str_path: str) -> str | None:
+    """
+    The parent of a normalized absolute posix path, or ``None`` for the root -
+    ``pathlib``'s ``.parent`` by string slicing.
 
-@functools.lru_cache(maxsize=4096)
-def _compiled_pattern(pattern_glob: str) -> "re.Pattern[str]":
+    >>> _parent('/a/b'), _parent('/a'), _parent('/'), _parent('C:/a'), _parent('C:/')
+    ('/a', '/', None, 'C:/', None)
     """
-    Translate one glob to a compiled, anchored regex (cached).
+    cut = str_path.rfind("/")
+    if cut < 0 or cut == len(str_path) - 1:
+        return None
+    # the first slash is the root's: keep it ("/a" -> "/", "C:/a" -> "C:/")
+    return str_path[: cut + 1] if cut == str_path.find("/") else str_path[:cut]
+
 
-    ``wcmatch`` produces the regex via its own faithful translation, so behaviour
-    is identical to ``wcmatch.glob.globmatch`` - but matching with a precompiled
-    ``re.Pattern`` is roughly 8x faster per call than ``globmatch`` (which carries
-    per-call setup overhead). The cache is bounded by ``maxsize`` (so memory
-    scales with the number of distinct patterns, never with the number of paths).
+def posix_path(file_path: PathLikeOrString) -> str:
     """
-    regex = wcmatch.glob.translate([pattern_glob], flags=_WCMATCH_FLAGS)[0][0]
-    return re.compile(regex)
+    The normalized form the ``match_str`` methods take: user directory expanded,
+    absolute, forward slashes - symlinks are not resolved.
+
+    >>> posix_path('/base/./a/../b')
+    '/base/b'
+    """
+    return _as_posix(_abspath(file_path))
+
+
+def _abspath(file_path: PathLikeOrString) -> str:
+    """Expand the user directory and make absolute - as a string, symlinks unresolved."""
+    str_path: str = os.fspath(file_path)
+    return os.path.abspath(os.path.expanduser(str_path))
+
 
+def _is_not_dir(str_path: str) -> bool:
+    return not os.path.isdir(str_path)
 
-def _globmatch(str_file_path: str, pattern_glob: str) -> bool:
-    """Match a single (already resolved, forward-slash) path against one glob pattern."""
-    return _compiled_pattern(pattern_glob).match(str_file_path) is not None
 
+def _dir_entry_is_file(entry: "os.DirEntry[str]") -> bool:
+    return entry.is_file()
 
-def set_pattern_cache_size(maxsize: int) -> None:
-    """Resize the process-wide compiled-pattern cache (see ``pattern_cache_max``).
 
-    ``maxsize`` of ``0`` disables caching (every match recompiles); ``None`` makes
-    it unbounded (bounded in practice by the number of distinct patterns).
+def _dir_entry_is_not_dir(entry: "os.DirEntry[str]") -> bool:
+    return not entry.is_dir()
+
+
+def _file_hint(is_dir: bool | None, is_file: bool | None) -> bool | None:
+    """
+    The caller's type hint as ``is_file`` (``None`` if unknown).
+
+    >>> _file_hint(None, None), _file_hint(True, None), _file_hint(None, True)
+    (None, False, True)
+    >>> _file_hint(True, False)
+    Traceback (most recent call last):
+    ...
+    ValueError: pass either is_dir or is_file, not both
+    """
+    if is_dir is None:
+        return is_file
+    if is_file is not None:
+        raise ValueError("pass either is_dir or is_file, not both")
+    return not is_dir
+
+
+def _retain_decisions(
+    cache: "OrderedDict[str, tuple[int, IgnoreRule] | None]",
+    prefixes: tuple[str, ...],
+    renumber: "Callable[[int], int] | None",
+) -> None:
+    """
+    Drop the cached directory decisions below any of *prefixes* - the ones a
+    rule change may affect - and renumber the rule indices of the rest.
+
+    >>> rule = IgnoreRule('/r/b/**/*', 'b/', False, False, None, None)
+    >>> cache = OrderedDict([('/r/a', None), ('/r/b/x', (3, rule)), ('/r/c', (3, rule))])
+    >>> _retain_decisions(cache, ('/r/b/',), lambda index: index + 1)
+    >>> {key: value and value[0] for key, value in cache.items()}
+    {'/r/a': None, '/r/c': 4}
+    """
+    for key in [key for key in cache if key.startswith(prefixes)]:
+        del cache[key]
+    if renumber is not None:
+        for key, value in list(cache.items()):
+            if value is not None:
+                cache[key] = renumber(value[0]), value[1]
+
+
+def _has_dir_suffix(file_path: PathLikeOrString) -> bool:
+    """
+    A string path spelled with a trailing separator names a directory, like
+    ``build/`` does for git - no ``stat`` needed.
+
+    >>> _has_dir_suffix('build/'), _has_dir_suffix('build'), _has_dir_suffix(pathlib.Path('build/'))
+    (True, False, False)
     """
-    global _compiled_pattern  # noqa: PLW0603 - intentional: resize the process-wide cache
-    _compiled_pattern = functools.lru_cache(maxsize=maxsize)(_compiled_pattern.__wrapped__)
+    return isinstance(file_path, str) and file_path.endswith(("/", os.sep))
 
 
 @dataclass(slots=True, eq=False)
@@ -84,6 +173,29 @@ class IgnoreRule:
     match_file: bool  # if that rule should match also on Files - or only on Directories
     source_file: pathlib.Path | None
     source_line_number: int | None
+    # derived once at creation: how the matching engines can decide this glob
+    strategy: RuleStrategy = field(init=False, repr=False, compare=False)
+    # the compiled regex of the glob, bound on first use (see ``regex``)
+    _regex: "re.Pattern[str] | None" = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.strategy = classify_glob(self.pattern_glob)
+
+    @property
+    def regex(self) -> "re.Pattern[str]":
+        """
+        The compiled, anchored regex of ``pattern_glob`` - compiled on first use
+        and kept with the rule, so matching never looks it up in a cache.
+
+        >>> rule = IgnoreRule('/base/*.log', '*.log', False, True, None, None)
+        >>> rule.regex.match('/base/a.log') is not None, rule.regex is rule.regex
+        (True, True)
+        """
+        # a rule restored without ``__init__`` (``_restored_rule``) has no slot value yet
+        regex = getattr(self, "_regex", None)
+        if regex is None:
+            regex = self._regex = compile_glob(self.pattern_glob)
+        return regex
 
     def __str__(self) -> str:
         """
@@ -147,6 +259,65 @@ class IgnoreRule:
         return int_hash
 
 
+def _restored_rule(record: CompiledRule, source_file: pathlib.Path | None) -> IgnoreRule:
+    """An :class:`IgnoreRule` from a ruleset record, keeping its stored strategy
+    instead of classifying the glob again (``__post_init__`` is bypassed)."""
+    rule = object.__new__(IgnoreRule)
+    rule.pattern_glob = record.pattern_glob
+    rule.pattern_original = record.pattern_original
+    rule.is_negation_rule = record.is_negation_rule
+    rule.match_file = record.match_file
+    rule.source_file = source_file
+    rule.source_line_number = record.source_line_number
+    rule.strategy = record.strategy
+    return rule
+
+
+@dataclass(frozen=True, slots=True)
+class RuleSet:
+    """
+    An immutable snapshot of a parser's rules, taken by ``freeze()``.
+
+    It holds nothing but the rule records - globs, the regex *source* and the
+    matching strategy of each, no compiled pattern and no cache - so it pickles
+    compactly (a process pool ships it once per worker), and threads or forked
+    processes can share one snapshot without ever writing to it. Matching is done
+    by parsers built from it with ``from_ruleset``: each holds its own caches and
+    compiles the patterns on its first match.
+
+    >>> import pickle
+    >>> parser = IgnoreParser()
+    >>> parser.add_rule('*.log', '/repo')
+    >>> ruleset = pickle.loads(pickle.dumps(parser.freeze()))
+    >>> ruleset == parser.freeze(), len(ruleset)
+    (True, 1)
+    >>> IgnoreParser.from_ruleset(ruleset).match('/repo/debug.log', is_file=True)
+    True
+    """
+
+    rules: tuple[CompiledRule, ...]
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+
+_ParserT = TypeVar("_ParserT", bound="_BaseParser")
+
+
+@dataclass(slots=True)
+class _LazyRuleFiles:
+    """The root of ``parse_rule_files(lazy=True)``: its posix path, the rule
+    file names, the index in ``rules`` the next lazily read rules go to, and
+    the rule files already read - a directory entered again (its memo evicted
+    or dropped after a rule change) does not read them twice. A rule file
+    skipped as ignored is not kept: a later rule change may un-ignore it."""
+
+    base: str
+    filenames: list[str]
+    at: int
+    seen: set[str] = field(default_factory=set[str])
+
+
 class _BaseParser:
     """
     Shared rule storage and parsing for the ignore and include parsers.
@@ -162,22 +333,185 @@ class _BaseParser:
     with the number of matched paths.
     """
 
-    def __init__(self, dir_cache_max: int = _DIR_CACHE_MAX) -> None:
+    def __init__(
+        self, dir_cache_max: int = _DIR_CACHE_MAX, engine: str = DEFAULT_ENGINE, rule_cache: RuleFileCache | None = None
+    ) -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"unknown engine {engine!r}, expected one of {', '.join(sorted(ENGINES))}")
         #: cap of the directory-decision LRU (0 disables it); see config knob
         #: ``performance.dir_cache_max``.
         self._dir_cache_max = dir_cache_max
+        #: name of the matching engine (see :mod:`igittigitt.engine`); config
+        #: knob ``performance.engine``.
+        self._engine_name = engine
+        #: on-disk cache of parsed rule files (see :mod:`igittigitt.rule_cache`),
+        #: or ``None`` to parse every rule file.
+        self._rule_cache = rule_cache
+        # compiled view of ``rules``, built on the first match after a change.
+        self._engine: RuleEngine | None = None
+        # scopes of the negation rules (see ``_negations_reach``), with the engine
+        self._negation_scopes: frozenset[str] | None = None
+        # the ``adaptive`` engine's hits per glob - kept across engine rebuilds,
+        # loaded from the rule cache when first needed.
+        self._rule_hits: dict[str, int] | None = None
+        # the rules whose stored order was merged into ``_rule_hits`` last
+        self._rule_order_for: list[tuple[str, bool, bool]] | None = None
         self.rules: list[IgnoreRule] = list()
         # small optimisation - we have a good chance that the last decisive
         # rule matches again on the next, similar query. single slot, bounded.
         self.last_matching_rule: IgnoreRule | None = None
-        # bounded LRU of directory -> pruning rule (or None). Lets the ancestor
-        # walk reuse decisions for sibling paths that share a parent directory.
-        self._dir_cache: OrderedDict[str, IgnoreRule | None] = OrderedDict()
+        # its index in ``rules`` (``-1``: no hint): when that rule matches again,
+        # only the rules after it can change the outcome.
+        self._hint_index = -1
+        # bounded LRU of directory -> (index, pruning rule) (or None). Lets the
+        # ancestor walk reuse decisions for sibling paths sharing a parent directory.
+        self._dir_cache: OrderedDict[str, tuple[int, IgnoreRule] | None] = OrderedDict()
+        # ``parse_rule_files(lazy=True)``: the root whose rule files are read on
+        # demand, and a bounded LRU (``dir_cache_max``) of directory -> whether
+        # the lazy walk entered it (read its rule files). An evicted directory
+        # is only looked at again, its rule files are not re-read. Dropped with
+        # the decisions below a changed scope: a directory the old rules pruned
+        # may be entered now.
+        self._lazy: _LazyRuleFiles | None = None
+        self._lazy_dirs: OrderedDict[str, bool] = OrderedDict()
+        # every rule file path the lazy walk looked for, present or not - only
+        # collected while a watcher (the ``serve`` daemon) has put a list here,
+        # so a rule file created later in an entered directory can be noticed.
+        self._rule_file_probes: list[str] | None = None
 
     def _invalidate_caches(self) -> None:
         """Drop cached decisions after the rule set changes."""
         self._dir_cache.clear()
+        self._lazy_dirs.clear()
+        self.last_matching_rule = None
+        self._hint_index = -1
+        self._engine = None
+        self._negation_scopes = None
+
+    def _splice_rules(self, removed: Sequence[int], at: int, rules: list[IgnoreRule]) -> None:
+        """
+        Drop the rules at the ascending indices *removed* and insert *rules* at
+        index *at* (of the old list) - then forget only the cached decisions the
+        change can affect: those of directories below the scope (see
+        :class:`~igittigitt.engine.RuleStrategy`) of a dropped or inserted rule,
+        since a rule matches nothing else. The other entries are kept, with their
+        rule indices renumbered.
+        """
+        old = self.rules
+        size = len(old)
+        changed = [old[index] for index in removed] + rules
+        if removed:
+            dropped = set(removed)
+            self.rules[:] = [
+                *(rule for index, rule in enumerate(old[:at]) if index not in dropped),
+                *rules,
+                *(rule for index, rule in enumerate(old[at:], at) if index not in dropped),
+            ]
+        else:
+            self.rules[at:at] = rules
+        renumber: Callable[[int], int] | None = None
+        if removed or at < size:
+
+            def shift(index: int) -> int:
+                return index - bisect.bisect_left(removed, index) + (len(rules) if index >= at else 0)
+
+            renumber = shift
+
+        lazy = self._lazy
+        if lazy is not None:
+            # rules inserted right at the lazy boundary stay behind it (the
+            # lazy reader moves it past its own rules)
+            lazy.at += (len(rules) if lazy.at > at else 0) - bisect.bisect_left(removed, lazy.at)
+        self._invalidate_scopes({rule.strategy.scope for rule in changed}, renumber)
+
+    def _invalidate_scopes(self, scopes: set[str], renumber: "Callable[[int], int] | None") -> None:
+        """Drop the cached decisions below *scopes* (all of them for the
+        filesystem root ``""``) after the rules changed there."""
+        if "" in scopes:
+            self._invalidate_caches()
+            return
         self.last_matching_rule = None
+        self._hint_index = -1
+        self._engine = None
+        self._negation_scopes = None
+        self._retain_cached(tuple(scope + "/" for scope in scopes), renumber)
+
+    def _retain_cached(self, prefixes: tuple[str, ...], renumber: "Callable[[int], int] | None") -> None:
+        """:func:`_retain_decisions` for every decision cache of the parser."""
+        _retain_decisions(self._dir_cache, prefixes, renumber)
+        # a lazy directory memo also covers the rule files *in* the directory,
+        # which rules scoped to the directory itself may ignore
+        lazy_dirs = self._lazy_dirs
+        for key in [key for key in lazy_dirs if (key + "/").startswith(prefixes)]:
+            del lazy_dirs[key]
+
+    def _rule_engine(self) -> RuleEngine:
+        """The compiled engine over the current rules (rebuilt lazily after a change)."""
+        engine = self._engine
+        if engine is None:
+            engine = self._engine = build_engine(self._engine_name, self.rules)
+            if isinstance(engine, AdaptiveEngine):
+                engine.learn(self._learned_hits())
+        return engine
+
+    def _learned_hits(self) -> dict[str, int]:
+        """
+        The ``adaptive`` engine's hits per glob, merged with the order the rule
+        cache holds for the current rules (read once per distinct rule set).
+        """
+        hits = self._rule_hits
+        if hits is None:
+            hits = self._rule_hits = dict()
+        rule_cache = self._rule_cache
+        if rule_cache is not None:
+            identity = self._rule_identity()
+            if identity != self._rule_order_for:
+                self._rule_order_for = identity
+                for glob, count in rule_cache.load_rule_order(identity).items():
+                    hits[glob] = max(hits.get(glob, 0), count)
+        return hits
+
+    def _negations_reach(self, str_path: str) -> bool:
+        """
+        Whether a negation rule can match *str_path* (posix form) - i.e. one is
+        scoped to an ancestor of it (see :class:`~igittigitt.engine.RuleStrategy`).
+        If not, neither the path nor any ancestor can be re-included: the first
+        rule that matches, anywhere, decides.
+
+        >>> parser = IgnoreParser()
+        >>> parser.add_rule('*.log', '/repo')
+        >>> parser.add_rule('!keep.log', '/repo/sub')
+        >>> parser._negations_reach('/repo/a.log'), parser._negations_reach('/repo/sub/x/keep.log')
+        (False, True)
+        """
+        scopes = self._negation_scopes
+        if scopes is None:
+            scopes = self._negation_scopes = frozenset(
+                rule.strategy.scope for rule in self.rules if rule.is_negation_rule
+            )
+        if not scopes:
+            return False
+        if "" in scopes:  # the filesystem root, or no literal semantics
+            return True
+        parent = _parent(str_path)
+        while parent is not None:
+            if parent in scopes:
+                return True
+            parent = _parent(parent)
+        return False
+
+    def _rule_identity(self) -> list[tuple[str, bool, bool]]:
+        """What decides the rule set: ``(pattern_glob, is_negation_rule, match_file)`` per rule."""
+        return [(rule.pattern_glob, rule.is_negation_rule, rule.match_file) for rule in self.rules]
+
+    def save_rule_order(self) -> None:
+        """
+        Store the rule order the ``adaptive`` engine learned in the rule cache, so
+        the next parser over the same rules starts with it. A no-op for the other
+        engines or without a rule cache; also done on leaving a ``with`` block.
+        """
+        if self._rule_cache is not None and self._rule_hits:
+            self._rule_cache.store_rule_order(self._rule_identity(), self._rule_hits)
 
     def __enter__(self) -> "_BaseParser":
         return self
@@ -188,7 +522,7 @@ class _BaseParser:
         exc_val: BaseException | None,
         exc_tb: TracebackType | None,
     ) -> None:
-        pass
+        self.save_rule_order()
 
     @staticmethod
     def _expand_base_path(base_path: PathLikeOrString) -> pathlib.Path:
@@ -199,30 +533,180 @@ class _BaseParser:
         path_base_dir = pathlib.Path(os.path.abspath(os.path.expanduser(base_path_str)))
         return path_base_dir
 
+    def _typed_path(self, file_path: PathLikeOrString, is_file: bool | None = None) -> tuple[str, bool]:
+        """
+        ``(absolute native path, is_file)`` for one input path. The type is taken,
+        in this order, from the caller's hint, an ``os.DirEntry`` (its cached
+        ``d_type``), a trailing separator (a directory) - and only then from one
+        ``stat`` (:attr:`_probe_is_file`).
+        """
+        if isinstance(file_path, os.DirEntry):
+            entry: os.DirEntry[str] = file_path
+            return _abspath(entry.path), self._entry_is_file(entry) if is_file is None else is_file
+        str_path = _abspath(file_path)
+        if is_file is None:
+            is_file = False if _has_dir_suffix(file_path) else self._probe_is_file(str_path)
+        return str_path, is_file
+
+    def _iter_batch(
+        self, file_paths: Iterable[PathLikeOrString], is_file: Iterable[bool] | None, is_dir: Iterable[bool] | None
+    ) -> Iterator[tuple[str, bool]]:
+        """
+        ``(absolute path, is_file)`` per input path for the batch APIs. The path
+        stays a native string (no ``pathlib`` per path); the type comes from
+        *is_file* / *is_dir* when the caller knows it, else per path from
+        :meth:`_typed_path`.
+        """
+        if is_dir is not None:
+            if is_file is not None:
+                raise ValueError("pass either is_dir or is_file, not both")
+            is_file = (not kind for kind in is_dir)
+        if is_file is None:
+            return (self._typed_path(file_path) for file_path in file_paths)
+        return (self._typed_path(file_path, kind) for file_path, kind in zip(file_paths, is_file, strict=True))
+
+    def _typed_listing(self, base_dir: str, file_names: list[str]) -> list[PathLikeOrString]:
+        """
+        The ``copytree`` listing of *base_dir* as ``os.DirEntry`` objects, so the
+        batch decision needs no ``stat`` per name (the types come with the
+        directory read). Names the listing does not know fall back to paths.
+        """
+        try:
+            with os.scandir(base_dir) as listing:
+                entries: dict[str, PathLikeOrString] = {entry.name: entry for entry in listing}
+        except OSError:
+            entries = {}
+        return [entries.get(name) or os.path.join(base_dir, name) for name in file_names]
+
+    def walk(self, top: PathLikeOrString, followlinks: bool = False) -> Iterator[tuple[str, list[str], list[str]]]:
+        """
+        ``os.walk(top)`` (top-down) without what the rules drop: yields
+        ``(dirpath, dirnames, filenames)`` of the kept entries and never enters a
+        dropped directory. Like ``os.walk``, removing names from *dirnames* stops
+        the walk from descending into them, and symlinked directories are listed
+        but only entered with *followlinks*.
+
+        Built on ``os.scandir``: the entry types come with the directory read (no
+        ``stat`` per entry), each listing is decided as one batch, and the parent's
+        decision is carried down, so no ancestor is ever matched twice.
+        """
+        top_str: str = os.fspath(top)
+        top_key = posix_path(top_str)
+        if self._lazy is not None:
+            self._load_rules_for(_parent(top_key) or top_key)
+        enter, context = self._walk_root(top_key)
+        if not enter:
+            return
+        stack: list[tuple[str, Any]] = [(top_str, context)]
+        while stack:
+            dirpath, context = stack.pop()
+            try:
+                with os.scandir(dirpath) as listing:
+                    entries = list(listing)
+            except OSError:
+                continue  # like os.walk: an unreadable directory is skipped
+            dir_key = posix_path(dirpath)
+            if self._lazy is not None:
+                # reading this directory's rule files shifts the rule indices a
+                # carried context may hold: re-derive it (a cache hit when unchanged)
+                self._load_rules_for(dir_key)
+                context = self._walk_root(dir_key)[1]
+            prefix = dir_key.rstrip("/") + "/"
+            siblings = [(prefix + entry.name, self._entry_is_file(entry)) for entry in entries]
+            dirnames: list[str] = list()
+            filenames: list[str] = list()
+            subdirs: dict[str, tuple[os.DirEntry[str], Any]] = dict()
+            for entry, (keep, child_context) in zip(entries, self._walk_children(context, siblings), strict=True):
+                if not keep:
+                    continue
+                if entry.is_dir():
+                    dirnames.append(entry.name)
+                    subdirs[entry.name] = entry, child_context
+                else:
+                    filenames.append(entry.name)
+            yield dirpath, dirnames, filenames
+            for name in reversed(dirnames):
+                subdir = subdirs.get(name)
+                if subdir is not None and (followlinks or not subdir[0].is_symlink()):
+                    stack.append((os.path.join(dirpath, name), subdir[1]))
+
+    def iter_files(self, top: PathLikeOrString, include_dirs: bool = False, followlinks: bool = False) -> Iterator[str]:
+        """
+        The kept files below *top* (with *include_dirs* also the kept
+        directories, each before its contents), as paths joined onto *top* - a
+        pruning replacement for ``os.walk`` + :meth:`match`. See :meth:`walk`.
+
+        >>> base = pathlib.Path(__file__).resolve().parents[2] / 'tests/example'
+        >>> parser = IgnoreParser()
+        >>> parser.add_rule('*', base)
+        >>> parser.add_rule('!*.txt', base)
+        >>> parser.add_rule('!*/', base)
+        >>> files = [os.path.relpath(path, base) for path in parser.iter_files(base)]
+        >>> 'not_excluded.txt' in files, all(path.endswith('.txt') for path in files)
+        (True, True)
+        """
+        for dirpath, dirnames, filenames in self.walk(top, followlinks=followlinks):
+            if include_dirs:
+                for name in dirnames:
+                    yield os.path.join(dirpath, name)
+            for name in filenames:
+                yield os.path.join(dirpath, name)
+
+    def _walk_root(self, str_top: str) -> tuple[bool, Any]:
+        """``(enter, context)`` for the top of :meth:`walk` (posix form)."""
+        # default: enter it, no context (overridden by IgnoreParser to skip a
+        # pruned top and by IncludeParser to carry the ancestor keep)
+        return True, None
+
+    def _walk_children(self, context: Any, siblings: list[tuple[str, bool]]) -> list[tuple[bool, Any]]:
+        """
+        ``(keep, context for its children)`` per entry of one listing whose
+        directory carried *context* - the parent's decision, so the entries need
+        no ancestor walk of their own.
+        """
+        # default: drop the entries their own last matching rule excludes, no
+        # context (overridden by IncludeParser to keep the selected ones)
+        indices = self._sibling_indices(siblings)
+        return [(index < 0 or self.rules[index].is_negation_rule, None) for index in indices]
+
     def parse_rule_files(
         self,
         base_dir: PathLikeOrString,
-        filename: str = ".gitignore",
+        filename: str | Sequence[str] = ".gitignore",
         add_default_patterns: bool = _DEFAULT_ADD_DEFAULT_PATTERNS,
+        lazy: bool = False,
     ) -> None:
         """
         get all the rule files (default = '.gitignore') from the base_dir
         all subdirectories will be searched for <filename> and the rules will be appended.
 
-        The rule files are processed shallow-first (by directory depth) so that
-        rules from deeper ``.gitignore`` files are appended *after* shallower
-        ones and therefore win under last-match-wins - exactly git's per-directory
-        precedence. ``.gitignore`` files inside already-ignored directories are
-        skipped, mirroring git (it never descends into excluded directories).
+        The tree is walked top-down, level by level (by directory depth, then
+        by path), and each directory's rule file is loaded before its
+        subdirectories are looked at - so rules from deeper ``.gitignore`` files
+        are appended *after* shallower ones and therefore win under
+        last-match-wins, exactly git's per-directory precedence. Like git, the
+        walk never enters a directory the rules loaded so far exclude (an
+        ignored ``node_modules`` is not read at all), nor ``.git`` or a nested
+        repository (a subdirectory with its own ``.git``); symlinked
+        directories are not followed.
 
         Parameter
         ---------
         base_dir
             the base directory - all subdirectories will be searched for <filename>
         filename
-            the rule filename, default = '.gitignore'
+            the rule filename, default = '.gitignore' - or several names, e.g.
+            ``('.gitignore', '.dockerignore')``, collected in the same walk (per
+            directory in the given order)
         add_default_patterns
             if to add the default ignore patterns from user home directory.
+        lazy
+            read nothing now: each query reads the rule files along the
+            ancestor chain of the queried path (git's per-directory exclude
+            stack), once per directory - for a few queries in a huge tree. The
+            rules are inserted where this call would have appended them, so
+            rule indices of later rules shift as directories are read. One lazy
+            root per parser.
 
         Examples
         --------
@@ -242,20 +726,106 @@ class _BaseParser:
         >>> ignore_parser=IgnoreParser()
         >>> ignore_parser.parse_rule_files(path_test_dir, '.test_not_existing')
 
+        >>> # several rule file names in one walk
+        >>> ignore_parser=IgnoreParser()
+        >>> ignore_parser.parse_rule_files(path_test_dir, ('.test_gitignore', '.test_not_existing'))
+        >>> len(ignore_parser.rules) > 0
+        True
+
         """
+        if lazy and self._lazy is not None:
+            raise ValueError("parse_rule_files(lazy=True) was already called on this parser")
         path_base_dir = self._expand_base_path(base_path=base_dir)
 
         if add_default_patterns:
             self._add_default_patterns(path_base_dir=path_base_dir)
 
-        rule_files = glob.glob(f"{path_base_dir}/**/{filename.strip()}", recursive=True)
-        # shallow first so deeper .gitignore rules are appended last (win),
-        # tie-break by path for deterministic ordering.
-        rule_files.sort(key=lambda p: (p.count(os.sep) + p.count("/"), p))
+        filenames = [filename.strip()] if isinstance(filename, str) else [name.strip() for name in filename]
+        if lazy:
+            self._lazy = _LazyRuleFiles(_as_posix(str(path_base_dir)), filenames, len(self.rules))
+            return
+
+        subdirs = self._discover_in(str(path_base_dir), filenames, is_base=True)
+        while subdirs:
+            # shallow first so deeper .gitignore rules are appended last (win),
+            # tie-break by path for deterministic ordering.
+            level = sorted(subdirs)
+            subdirs = [subdir for dirpath in level for subdir in self._discover_in(dirpath, filenames)]
 
-        for rule_file in rule_files:
-            if not self._path_is_ignored_for_discovery(rule_file):
-                self.parse_rule_file(rule_file)
+    def _discover_in(self, dirpath: str, filenames: list[str], is_base: bool = False) -> list[str]:
+        """
+        One step of the :meth:`parse_rule_files` walk: load the rule files of
+        *dirpath*, then return the subdirectories to visit next - those the rules
+        loaded so far do not exclude. A nested repository (but not the base
+        directory's own) is skipped whole.
+        """
+        try:
+            with os.scandir(dirpath) as listing:
+                entries = {entry.name: entry for entry in listing}
+        except OSError:
+            return list()
+        if ".git" in entries and not is_base:
+            return list()
+        for name in filenames:
+            entry = entries.get(name)
+            if entry is not None and entry.is_file() and not self._path_is_ignored_for_discovery(entry.path):
+                self.parse_rule_file(entry.path)
+        subdirs = [entry for name, entry in entries.items() if name != ".git" and entry.is_dir(follow_symlinks=False)]
+        if not subdirs:
+            return list()
+        prefix = _as_posix(dirpath).rstrip("/") + "/"
+        descends = self._discovery_descends([(prefix + entry.name, False) for entry in subdirs])
+        return [entry.path for entry, descend in zip(subdirs, descends, strict=True) if descend]
+
+    def _discovery_descends(self, siblings: list[tuple[str, bool]]) -> list[bool]:
+        """Which subdirectories (posix form) of an entered directory the rule file walk enters."""
+        # default: all of them (overridden by IgnoreParser to prune ignored ones)
+        return [True] * len(siblings)
+
+    def _load_rules_for(self, key: str) -> bool:
+        """
+        ``parse_rule_files(lazy=True)``: make sure the rule files of directory
+        *key* (posix form) and its ancestors below the lazy root are read - the
+        same directories, in the same top-down order, the eager walk would
+        enter. Returns whether *key* itself was entered; memoized per directory
+        (bounded LRU).
+        """
+        lazy = self._lazy
+        lazy_dirs = self._lazy_dirs
+        entered = lazy_dirs.get(key)
+        if entered is not None:
+            lazy_dirs.move_to_end(key)
+            return entered
+        if lazy is None:
+            return False
+        parent = _parent(key)
+        if key == lazy.base:
+            entered = True
+        elif key.startswith(lazy.base.rstrip("/") + "/") and parent is not None and self._load_rules_for(parent):
+            entered = not os.path.lexists(f"{key}/.git") and self._discovery_descends([(key, False)])[0]
+        else:
+            entered = False
+        # recorded before reading: the discovery check of the rule file matches
+        # it, which lands here again for *key*
+        lazy_dirs[key] = entered
+        if len(lazy_dirs) > self._dir_cache_max:
+            lazy_dirs.popitem(last=False)
+        if entered:
+            for name in lazy.filenames:
+                rule_file = f"{key}/{name}"
+                if self._rule_file_probes is not None:
+                    self._rule_file_probes.append(rule_file)
+                if rule_file in lazy.seen or not os.path.isfile(rule_file):
+                    continue
+                # marked before the discovery check, which can land here again
+                lazy.seen.add(rule_file)
+                if self._path_is_ignored_for_discovery(rule_file):
+                    lazy.seen.discard(rule_file)
+                    continue
+                rules = self._read_rule_file(rule_file)
+                self._splice_rules((), lazy.at, rules)
+                lazy.at += len(rules)
+        return entered
 
     def _path_is_ignored_for_discovery(self, rule_file: str) -> bool:
         """Whether a discovered rule file lives in an already-ignored directory."""
@@ -279,6 +849,55 @@ class _BaseParser:
             is used (needed to import default ignore files from the user home
             directory, see README, Section "Default Patterns").
         """
+        self._splice_rules((), len(self.rules), self._read_rule_file(rule_file, base_dir))
+
+    def replace_rule_file(self, rule_file: PathLikeOrString, base_dir: PathLikeOrString | None = None) -> None:
+        """
+        Read *rule_file* again (after an edit): its new rules take the place of
+        the ones it added before, or are appended if it was not read yet. Only
+        the cached decisions below the directories of the old and new rules are
+        dropped - warm state elsewhere in the tree survives the edit.
+
+        >>> import tempfile
+        >>> with tempfile.TemporaryDirectory() as directory:
+        ...     rule_file = pathlib.Path(directory, '.gitignore')
+        ...     _ = rule_file.write_text('*.log\\n')
+        ...     parser = IgnoreParser()
+        ...     parser.parse_rule_file(rule_file)
+        ...     parser.add_rule('*.tmp', directory)
+        ...     _ = rule_file.write_text('*.txt\\n')
+        ...     parser.replace_rule_file(rule_file)
+        ...     [rule.pattern_original for rule in parser.rules]
+        ['*.txt', '*.tmp']
+        """
+        removed = self._rule_indices_from(rule_file)
+        rules = self._read_rule_file(rule_file, base_dir)
+        self._splice_rules(removed, removed[0] if removed else len(self.rules), rules)
+
+    def remove_rules_from(self, rule_file: PathLikeOrString) -> int:
+        """
+        Remove the rules read from *rule_file* and return how many there were.
+        Only the cached decisions below their directories are dropped.
+
+        >>> parser = IgnoreParser()
+        >>> parser.add_rule('*.log', '/repo')
+        >>> parser.remove_rules_from('/repo/.gitignore'), len(parser.rules)
+        (0, 1)
+        """
+        removed = self._rule_indices_from(rule_file)
+        if removed:
+            self._splice_rules(removed, len(self.rules), list())
+        return len(removed)
+
+    def _rule_indices_from(self, rule_file: PathLikeOrString) -> list[int]:
+        """The ascending indices of the rules read from *rule_file*."""
+        path_rule_file = self._expand_base_path(base_path=rule_file)
+        return [index for index, rule in enumerate(self.rules) if rule.source_file == path_rule_file]
+
+    def _read_rule_file(
+        self, rule_file: PathLikeOrString, base_dir: PathLikeOrString | None = None
+    ) -> list[IgnoreRule]:
+        """The rules of a rule file, in file order (see :meth:`parse_rule_file`)."""
         path_rule_file = self._expand_base_path(base_path=rule_file)
 
         if not base_dir:
@@ -286,6 +905,16 @@ class _BaseParser:
         else:
             path_base_dir = self._expand_base_path(base_path=base_dir)
 
+        rule_cache = self._rule_cache
+        if rule_cache is not None:
+            cached = rule_cache.load(str(path_rule_file), str(path_base_dir))
+            if cached is not None:
+                return [
+                    IgnoreRule(glob, original, negation, match_file, path_rule_file, line)
+                    for glob, original, negation, match_file, line in cached
+                ]
+
+        l_rules: list[IgnoreRule] = list()
         with open(path_rule_file) as ignore_file:
             counter = 0
             for line in ignore_file:
@@ -297,8 +926,23 @@ class _BaseParser:
                     path_source_file=path_rule_file,
                     source_line_number=counter,
                 )
-                self.rules.extend(rules)
-        self._invalidate_caches()
+                l_rules.extend(rules)
+        if rule_cache is not None:
+            rule_cache.store(
+                str(path_rule_file),
+                str(path_base_dir),
+                [
+                    CachedRule(
+                        rule.pattern_glob,
+                        rule.pattern_original,
+                        rule.is_negation_rule,
+                        rule.match_file,
+                        rule.source_line_number,
+                    )
+                    for rule in l_rules
+                ],
+            )
+        return l_rules
 
     def load_default_patterns(self, base_dir: PathLikeOrString) -> None:
         """Load git's default ignore patterns from the user home directory.
@@ -309,6 +953,132 @@ class _BaseParser:
         """
         self._add_default_patterns(path_base_dir=self._expand_base_path(base_path=base_dir))
 
+    def save_ruleset(self, ruleset_file: PathLikeOrString, base_dir: PathLikeOrString) -> None:
+        """
+        Write the current rules, in order, as a precompiled ruleset file (see
+        :mod:`igittigitt.ruleset_file`) for the rules read relative to *base_dir*.
+        A parser with a lazy discovery root cannot be saved - its rule list is
+        still incomplete.
+
+        >>> import tempfile
+        >>> parser = IgnoreParser()
+        >>> parser.add_rule('*.log', '/repo')
+        >>> with tempfile.TemporaryDirectory() as directory:
+        ...     parser.save_ruleset(f'{directory}/rules.igc', '/repo')
+        ...     loaded = IgnoreParser()
+        ...     loaded.load_ruleset(f'{directory}/rules.igc')
+        '/repo'
+        >>> loaded.rules == parser.rules and loaded.match('/repo/a/debug.log', is_file=True)
+        True
+        """
+        write_ruleset(ruleset_file, self.compiled_rules(), str(self._expand_base_path(base_path=base_dir)))
+
+    @classmethod
+    def from_ruleset(
+        cls: type[_ParserT],
+        ruleset: RuleSet,
+        dir_cache_max: int = _DIR_CACHE_MAX,
+        engine: str = DEFAULT_ENGINE,
+    ) -> _ParserT:
+        """
+        A parser matching with the rules of *ruleset* (see :class:`RuleSet`) -
+        nothing is parsed, translated or classified, and the patterns are
+        compiled on the first match. The parser owns its caches; *ruleset* is
+        never modified and may be shared.
+
+        >>> source = IncludeParser()
+        >>> source.add_rule('*.py', '/repo')
+        >>> IncludeParser.from_ruleset(source.freeze()).match('/repo/src/main.py', is_file=True)
+        True
+        """
+        parser = cls(dir_cache_max=dir_cache_max, engine=engine)
+        parser.add_compiled_rules(ruleset.rules)
+        return parser
+
+    def freeze(self) -> RuleSet:
+        """
+        An immutable :class:`RuleSet` snapshot of the current rules; later
+        changes to this parser do not reach it.
+
+        >>> parser = IgnoreParser()
+        >>> parser.add_rule('*.log', '/repo')
+        >>> ruleset = parser.freeze()
+        >>> parser.add_rule('*.tmp', '/repo')
+        >>> len(ruleset), len(parser.freeze())
+        (1, 2)
+        """
+        return RuleSet(tuple(self.compiled_rules()))
+
+    def compiled_rules(self) -> list[CompiledRule]:
+        """
+        The current rules, in order, as self-contained records - with the regex
+        source and strategy of each glob - for :meth:`add_compiled_rules` in
+        another parser or process, or for a ruleset file.
+
+        >>> parser = IgnoreParser()
+        >>> parser.add_rule('*.log', '/repo')
+        >>> copy = IgnoreParser()
+        >>> copy.add_compiled_rules(parser.compiled_rules())
+        >>> copy.rules == parser.rules and copy.match('/repo/debug.log', is_file=True)
+        True
+        """
+        if self._lazy is not None:
+            raise ValueError("cannot snapshot the rules while rule files are discovered lazily")
+        return [
+            CompiledRule(
+                rule.pattern_glob,
+                rule.pattern_original,
+                rule.is_negation_rule,
+                rule.match_file,
+                # interned: the rules of one file share one string, pickled once
+                None if rule.source_file is None else sys.intern(str(rule.source_file)),
+                rule.source_line_number,
+                translate_glob(rule.pattern_glob),
+                rule.strategy,
+            )
+            for rule in self.rules
+        ]
+
+    def add_compiled_rules(self, records: Iterable[CompiledRule]) -> None:
+        """Append rules from :meth:`compiled_rules` records - nothing is parsed,
+        translated or classified again."""
+        records = list(records)
+        source_files: dict[str, pathlib.Path] = dict()
+        rules: list[IgnoreRule] = list()
+        for record in records:
+            source_file = None
+            if record.source_file is not None:
+                source_file = source_files.get(record.source_file)
+                if source_file is None:
+                    source_file = source_files[record.source_file] = pathlib.Path(record.source_file)
+            rules.append(_restored_rule(record, source_file))
+        prime_translations({record.pattern_glob: record.regex for record in records})
+        self._splice_rules((), len(self.rules), rules)
+
+    def load_ruleset(self, ruleset_file: PathLikeOrString, base_dir: PathLikeOrString | None = None) -> str:
+        """
+        Append the rules of a ruleset file written by :meth:`save_ruleset` (or
+        ``igittigitt compile``) and return the base directory it was compiled
+        for. Nothing is parsed, translated or classified again.
+
+        Parameter
+        ---------
+        ruleset_file
+            the ruleset file
+        base_dir
+            if given, the ruleset must have been compiled for this directory
+            (its globs are absolute)
+
+        Raises:
+            RulesetFormatError: not a ruleset file of this igittigitt version, or
+                compiled for another base directory.
+        """
+        ruleset = read_ruleset(ruleset_file)
+        if base_dir is not None and ruleset.base_dir != str(self._expand_base_path(base_path=base_dir)):
+            raise RulesetFormatError(f"{ruleset_file}: compiled for {ruleset.base_dir}, not for {base_dir}")
+        self.add_compiled_rules(ruleset.rules)
+        return ruleset.base_dir
+
     def add_rule(self, pattern: str, base_path: PathLikeOrString) -> None:
         """
         add a rule as a string. The rule is appended in order (last-match-wins).
@@ -321,31 +1091,191 @@ class _BaseParser:
             since gitignore patterns are relative to a base directory, that
             needs to be provided here
         """
-        path_base_dir = self._expand_base_path(base_path=base_path)
-        rules = get_rules_from_git_pattern(git_pattern=pattern, path_base_dir=path_base_dir)
-        self.rules.extend(rules)
-        self._invalidate_caches()
+        self.add_rules((pattern,), base_path)
 
-    def _last_matching_rule(self, str_file_path: str, is_file: bool) -> IgnoreRule | None:
+    def add_rules(self, patterns: Iterable[str], base_path: PathLikeOrString) -> None:
+        """
+        :meth:`add_rule` for each of *patterns*, in order - with one cache
+        update for all of them, which drops only the cached decisions below
+        the new rules' directories.
+
+        >>> parser = IgnoreParser()
+        >>> parser.add_rules(['*.log', '!keep.log'], '/repo')
+        >>> parser.match('/repo/a.log', is_file=True), parser.match('/repo/keep.log', is_file=True)
+        (True, False)
+        """
+        path_base_dir = self._expand_base_path(base_path=base_path)
+        rules = [
+            rule
+            for pattern in patterns
+            for rule in get_rules_from_git_pattern(git_pattern=pattern, path_base_dir=path_base_dir)
+        ]
+        self._splice_rules((), len(self.rules), rules)
+
+    def _last_matching_index(self, str_file_path: str, is_file: bool, exact: bool = True) -> int:
         """
-        Return the *last* rule (in insertion order) that matches the path, or
-        ``None``. We iterate in reverse and return the first hit, which is the
-        last match - so this is O(#rules) worst case but usually short-circuits.
+        Return the index of the *last* rule (in insertion order) that matches the
+        path, or ``-1``. The engine answers with the highest matching rule index; the
+        reference engine iterates in reverse and returns the first hit, so this
+        is O(#rules) worst case but usually short-circuits.
+
+        The previous decisive rule (:attr:`last_matching_rule`) is tried first:
+        sorted input (``find``, a directory walk) hits the same rule over and
+        over, and once it matches only the rules after it can still win - the
+        engine then looks at that suffix alone (``last_match_above``).
 
         is_file:
             the passed path is a file (and not a directory); rules that only
             match directories (``match_file == False``) are skipped for files.
+        exact:
+            ``False`` when only the decision counts: the ``adaptive`` engine may
+            then answer with another rule of the deciding block
+            (:meth:`~igittigitt.engine.AdaptiveEngine.decide_above`).
+
+        >>> parser = IgnoreParser()
+        >>> parser.add_rules(['*.log', 'build/', '!keep.log'], '/repo')
+        >>> parser._last_matching_index('/repo/a.log', is_file=True), parser._hint_index
+        (0, 0)
+        >>> parser._last_matching_index('/repo/keep.log', is_file=True), parser._hint_index
+        (2, 2)
+        >>> parser._last_matching_index('/repo/b.log', is_file=True), parser._hint_index
+        (0, 0)
         """
-        cached = self.last_matching_rule
-        for rule in reversed(self.rules):
-            if is_file and not rule.match_file:
-                continue
-            if _globmatch(str_file_path, rule.pattern_glob):
-                self.last_matching_rule = rule
-                return rule
-        # keep the previous hint only if nothing matched
-        self.last_matching_rule = cached
-        return None
+        engine = self._rule_engine()
+        decide = None if exact or not isinstance(engine, AdaptiveEngine) else engine.decide_above
+        hint = self._hint_index
+        if hint >= 0:
+            rule = engine.rules[hint]
+            if (rule.match_file or not is_file) and rule.regex.match(str_file_path) is not None:
+                if decide is None:
+                    index = engine.last_match_above(str_file_path, is_file, hint)
+                else:
+                    index = decide(str_file_path, is_file, hint)
+                if index < 0:
+                    hits = self._rule_hits
+                    if hits is not None:  # the ``adaptive`` engine's counters (it was not asked)
+                        hits[rule.pattern_glob] = hits.get(rule.pattern_glob, 0) + 1
+                    return hint
+                self._hint_index = index
+                self.last_matching_rule = engine.rules[index]
+                return index
+        index = engine.last_match(str_file_path, is_file) if decide is None else decide(str_file_path, is_file, -1)
+        # keep the previous hint if nothing matched
+        if index >= 0:
+            self._hint_index = index
+            self.last_matching_rule = engine.rules[index]
+        return index
+
+    #: type of a path whose kind is unknown (one ``stat``) - or of an
+    #: ``os.DirEntry`` (no ``stat``, the directory read reported it)
+    _probe_is_file: Callable[[str], bool] = staticmethod(os.path.isfile)
+    _entry_is_file: "Callable[[os.DirEntry[str]], bool]" = staticmethod(_dir_entry_is_file)
+
+    def _decide_batch(self, items: Iterable[tuple[str, bool]]) -> Iterator[tuple[bool, int]]:
+        """Decide consecutive siblings (one directory listing) together, in input order."""
+        for parent, siblings in itertools.groupby(items, key=lambda item: os.path.dirname(item[0])):
+            yield from self._decide_siblings(parent, list(siblings))
+
+    def _decide_siblings(self, parent: str, siblings: list[tuple[str, bool]]) -> list[tuple[bool, int]]:
+        """``(decision, rule index)`` per sibling in the directory *parent*."""
+        # default: each sibling by its own last matching rule (overridden by
+        # IgnoreParser to prune below excluded directories and by IncludeParser
+        # to inherit the ancestor keep)
+        if self._lazy is not None:
+            self._load_rules_for(_as_posix(parent))
+        indices = self._sibling_indices(siblings)
+        return [(index >= 0 and not self.rules[index].is_negation_rule, index) for index in indices]
+
+    def _sibling_indices(self, siblings: list[tuple[str, bool]]) -> list[int]:
+        """
+        The last matching rule index per sibling. Files and directories each go to
+        the engine as one batch, so a large listing is scanned as a joined buffer
+        (``RuleEngine.last_match_many``) instead of one regex call per name.
+        """
+        engine = self._rule_engine()
+        indices = [-1] * len(siblings)
+        for is_file in (True, False):
+            positions = [position for position, (_str_path, kind) in enumerate(siblings) if bool(kind) is is_file]
+            if positions:
+                str_paths = [_as_posix(siblings[position][0]) for position in positions]
+                for position, index in zip(positions, engine.last_match_many(str_paths, is_file), strict=True):
+                    indices[position] = index
+        return indices
+
+    def iter_match_many(
+        self,
+        file_paths: Iterable[PathLikeOrString],
+        is_file: Iterable[bool] | None = None,
+        *,
+        is_dir: Iterable[bool] | None = None,
+    ) -> Iterator[tuple[bool, int]]:
+        """
+        Match many paths lazily: yield ``(decision, rule index)`` per path, in
+        input order. The index points into :attr:`rules` (``-1`` if no rule
+        decided). *is_file* or *is_dir* (parallel to *file_paths*) saves the
+        ``stat`` per path when the caller already knows the types; so do
+        ``os.DirEntry`` items and string paths ending in a separator.
+
+        Consecutive paths in the same directory - the order a directory walk
+        produces - are decided together: one ancestor decision, and a large
+        listing is matched as one joined buffer by the engine. No ``pathlib``
+        object is built per path.
+        """
+        return self._decide_batch(self._iter_batch(file_paths, is_file, is_dir))
+
+    @overload
+    def match_many(
+        self,
+        file_paths: Iterable[PathLikeOrString],
+        is_file: Iterable[bool] | None = None,
+        *,
+        is_dir: Iterable[bool] | None = None,
+        as_bytes: Literal[False] = False,
+    ) -> list[bool]: ...
+
+    @overload
+    def match_many(
+        self,
+        file_paths: Iterable[PathLikeOrString],
+        is_file: Iterable[bool] | None = None,
+        *,
+        is_dir: Iterable[bool] | None = None,
+        as_bytes: Literal[True],
+    ) -> bytearray: ...
+
+    def match_many(
+        self,
+        file_paths: Iterable[PathLikeOrString],
+        is_file: Iterable[bool] | None = None,
+        *,
+        is_dir: Iterable[bool] | None = None,
+        as_bytes: bool = False,
+    ) -> list[bool] | bytearray:
+        """
+        Match many paths at once; the decisions come back in input order, as a
+        list of bools or (``as_bytes=True``) a compact ``bytearray`` of ``0`` / ``1``.
+
+        The paths are grouped by parent directory first, so every ancestor
+        decision is computed once per directory whatever the input order. Use
+        :meth:`iter_match_many` to stream, or to get the deciding rule indices.
+
+        >>> parser = IgnoreParser()
+        >>> parser.add_rule('*.log', '/base')
+        >>> parser.add_rule('build/', '/base')
+        >>> parser.match_many(['/base/a.log', '/base/build/x.txt', '/base/b.txt'], is_file=[True, True, True])
+        [True, True, False]
+        >>> parser.match_many(['/base/a.log', '/base/b.txt'], is_file=[True, True], as_bytes=True)
+        bytearray(b'\\x01\\x00')
+        """
+        items = list(self._iter_batch(file_paths, is_file, is_dir))
+        order = sorted(range(len(items)), key=lambda position: os.path.dirname(items[position][0]))
+        decided = self._decide_batch(items[position] for position in order)
+        decisions = bytearray(len(items))
+        for position, (decision, _index) in zip(order, decided, strict=True):
+            decisions[position] = decision
+        if as_bytes:
+            return decisions
+        return [bool(decision) for decision in decisions]
 
     def _add_default_patterns(self, path_base_dir: pathlib.Path, is_windows: bool | None = None) -> None:
         """
@@ -442,15 +1372,23 @@ class IgnoreParser(_BaseParser):
         return self
 
     def _path_is_ignored_for_discovery(self, rule_file: str) -> bool:
-        return self.match(rule_file)
+        return self.match(rule_file, is_file=True)
+
+    def _discovery_descends(self, siblings: list[tuple[str, bool]]) -> list[bool]:
+        # the walk only enters directories that are not pruned
+        return [keep for keep, _context in self._walk_children(None, siblings)]
 
     # match{{{
-    def match(self, file_path: PathLikeOrString) -> bool:
+    def match(self, file_path: PathLikeOrString, *, is_dir: bool | None = None, is_file: bool | None = None) -> bool:
         """
         returns True if the path is ignored by the rules - exactly as git would
         decide it, including correct handling of negations and the rule that a
         file cannot be re-included if a parent directory is excluded.
 
+        The path is ``stat``-ed once to tell files from directories, unless the
+        type is known: pass ``is_dir=`` / ``is_file=``, an ``os.DirEntry`` (from
+        ``os.scandir``), or a string ending in ``/`` (a directory).
+
         >>> # Setup
         >>> base_path = pathlib.Path(__file__).resolve().parents[2] / 'tests/example_negation'
 
@@ -466,61 +1404,124 @@ class IgnoreParser(_BaseParser):
         >>> gitignore.match(base_path / "foo/other/file.txt")
         True
 
+        >>> # Test: type hints - no stat, the paths need not exist
+        >>> gitignore = IgnoreParser()
+        >>> gitignore.add_rule("build/", "/base")
+        >>> gitignore.match("/base/build/"), gitignore.match("/base/build", is_file=True)
+        (True, False)
+
         """
         # match}}}
-        ignored, _rule = self.match_with_rule(file_path)
+        ignored, _rule = self.match_with_rule(file_path, is_dir=is_dir, is_file=is_file)
         return ignored
 
-    def match_with_rule(self, file_path: PathLikeOrString) -> "tuple[bool, IgnoreRule | None]":
+    def match_with_rule(
+        self, file_path: PathLikeOrString, *, is_dir: bool | None = None, is_file: bool | None = None
+    ) -> "tuple[bool, IgnoreRule | None]":
         """
         Like :meth:`match`, but also return the rule that decided the outcome
         (or ``None`` if no rule matched). Useful for ``git check-ignore -v``
         style reporting.
         """
-        path_file_object = self._expand_base_path(base_path=file_path)
-        is_file = path_file_object.is_file()
-        return self._ignore_decision(path_file_object, is_file)
+        str_path, path_is_file = self._typed_path(file_path, _file_hint(is_dir, is_file))
+        return self.match_str_with_rule(_as_posix(str_path), is_file=path_is_file)
+
+    def match_str(self, str_path: str, *, is_dir: bool | None = None, is_file: bool | None = None) -> bool:
+        """
+        :meth:`match` for a path already in :func:`posix_path` form - the hot
+        loop stays on strings: no ``pathlib`` object per path or per ancestor.
+
+        Where no negation rule can match the path (:meth:`_negations_reach`),
+        git's decision is just "does any rule match the path or an ancestor":
+        the ancestors are checked top-down up to the first excluded one, the
+        path itself with the engine's first-hit ``any_match``. Which rule
+        decided is only looked up by :meth:`match_str_with_rule`.
 
-    def _ignore_decision(self, path_file_object: pathlib.Path, is_file: bool) -> "tuple[bool, IgnoreRule | None]":
+        >>> gitignore = IgnoreParser()
+        >>> gitignore.add_rule('build/', '/base')
+        >>> gitignore.match_str('/base/build/out/a.o'), gitignore.match_str('/base/src/a.c')
+        (True, False)
+        """
+        path_is_file = _file_hint(is_dir, is_file)
+        if path_is_file is None:
+            path_is_file = os.path.isfile(str_path)
+        key = _parent(str_path) or str_path
+        if self._lazy is not None:
+            self._load_rules_for(key)
+        pruning = self._ancestor_pruning(key)
+        if self._negations_reach(str_path):
+            return self._decide(str_path, pruning, path_is_file, exact=False)[0]
+        return pruning is not None or self._rule_engine().any_match(str_path, path_is_file)
+
+    def match_str_with_rule(
+        self, str_path: str, *, is_dir: bool | None = None, is_file: bool | None = None
+    ) -> "tuple[bool, IgnoreRule | None]":
+        """:meth:`match_with_rule` for a path already in :func:`posix_path` form."""
+        path_is_file = _file_hint(is_dir, is_file)
+        if path_is_file is None:
+            path_is_file = os.path.isfile(str_path)
+        key = _parent(str_path) or str_path
+        if self._lazy is not None:
+            self._load_rules_for(key)
+        pruning = self._ancestor_pruning(key)
+        ignored, index = self._decide(str_path, pruning, path_is_file)
+        return ignored, (self.rules[index] if index >= 0 else None)
+
+    def _decide(
+        self, str_path: str, pruning: "tuple[int, IgnoreRule] | None", is_file: bool, exact: bool = True
+    ) -> "tuple[bool, int]":
         """
         If any *ancestor directory* is excluded (and not re-included at its own
-        level) the path is ignored and nothing below can re-include it. Otherwise
-        the path's own last matching rule decides. The ancestor decision is
-        memoized per directory (bounded LRU), so sibling paths sharing a parent
-        do not recompute it. O(depth x #rules) on a cache miss, O(1) on a hit.
+        level) - *pruning*, from :meth:`_ancestor_pruning` - the path is ignored
+        and nothing below can re-include it. Otherwise the path's own last
+        matching rule decides. Returns ``(ignored, deciding rule index or -1)``;
+        with ``exact=False`` the index only has to decide like the last matching
+        rule (see :meth:`_last_matching_index`).
+        The ancestor decision is memoized per directory (bounded LRU), so sibling
+        paths sharing a parent do not recompute it. O(depth x #rules) on a cache
+        miss, O(1) on a hit.
         """
-        pruning_rule = self._ancestor_pruning_rule(path_file_object.parent)
-        if pruning_rule is not None:
-            return True, pruning_rule
+        if pruning is not None:
+            return True, pruning[0]
 
         # the path itself
-        rule = self._last_matching_rule(path_file_object.as_posix(), is_file=is_file)
-        if rule is None:
-            return False, None
-        return (not rule.is_negation_rule), rule
-
-    def _ancestor_pruning_rule(self, directory: pathlib.Path) -> IgnoreRule | None:
+        index = self._last_matching_index(str_path, is_file=is_file, exact=exact)
+        if index < 0:
+            return False, -1
+        return (not self.rules[index].is_negation_rule), index
+
+    def _decide_siblings(self, parent: str, siblings: list[tuple[str, bool]]) -> list[tuple[bool, int]]:
+        key = _as_posix(parent)
+        if self._lazy is not None:
+            self._load_rules_for(key)
+        pruning = self._ancestor_pruning(key)
+        if pruning is not None:
+            return [(True, pruning[0])] * len(siblings)
+        return super()._decide_siblings(parent, siblings)
+
+    def _ancestor_pruning(self, key: str) -> "tuple[int, IgnoreRule] | None":
         """
-        Return the rule that excludes *directory* or one of its ancestors (so its
-        whole subtree is pruned), or ``None`` if none does. Memoized per directory
-        in a bounded LRU; recurses into the parent so the shallowest excluding
-        rule wins, matching git's top-down evaluation.
+        Return ``(index, rule)`` of the rule that excludes directory *key* (posix
+        form) or one of its ancestors (so its whole subtree is pruned), or
+        ``None`` if none does. Memoized per directory in a bounded LRU; recurses
+        into the parent so the shallowest excluding rule wins, matching git's
+        top-down evaluation.
         """
-        key = directory.as_posix()
         cache = self._dir_cache
         cached = cache.get(key, _CACHE_MISS)
         if cached is not _CACHE_MISS:
             cache.move_to_end(key)
             return cached  # type: ignore[return-value]
 
-        parent = directory.parent
-        result: IgnoreRule | None = None
-        if parent != directory:
-            result = self._ancestor_pruning_rule(parent)
-        if result is None:
-            rule = self._last_matching_rule(key, is_file=False)
-            if rule is not None and not rule.is_negation_rule:
-                result = rule
+        parent = _parent(key)
+        result: tuple[int, IgnoreRule] | None = None
+        if parent is not None:
+            result = self._ancestor_pruning(parent)
+        # without a negation in reach, only an excluded directory needs its rule
+        if result is None and (self._negations_reach(key) or self._rule_engine().any_match(key, is_file=False)):
+            index = self._last_matching_index(key, is_file=False)
+            if index >= 0 and not self.rules[index].is_negation_rule:
+                result = index, self.rules[index]
 
         if self._dir_cache_max > 0:
             cache[key] = result
@@ -529,6 +1530,11 @@ class IgnoreParser(_BaseParser):
                 cache.popitem(last=False)
         return result
 
+    def _walk_root(self, str_top: str) -> tuple[bool, Any]:
+        # an entered directory is not pruned, so its entries have no pruning
+        # ancestor: the context stays ``None``
+        return self._ancestor_pruning(str_top) is None, None
+
     # shutil_ignore{{{
     def shutil_ignore(self, base_dir: str, file_names: list[str]) -> set[str]:
         """
@@ -538,12 +1544,8 @@ class IgnoreParser(_BaseParser):
         never builds a structure that grows with the total number of files.
         """
         # shutil_ignore}}}
-        path_base_dir = self._expand_base_path(base_path=base_dir)
-        ignore_files: set[str] = set()
-        for file in file_names:
-            if self.match(path_base_dir / file):
-                ignore_files.add(file)
-        return ignore_files
+        decisions = self.iter_match_many(self._typed_listing(base_dir, file_names))
+        return {file for file, (ignored, _index) in zip(file_names, decisions, strict=True) if ignored}
 
 
 class IncludeParser(_BaseParser):
@@ -562,13 +1564,16 @@ class IncludeParser(_BaseParser):
     pattern would otherwise keep.
     """
 
-    def __init__(self, dir_cache_max: int = _DIR_CACHE_MAX) -> None:
-        super().__init__(dir_cache_max=dir_cache_max)
+    def __init__(
+        self, dir_cache_max: int = _DIR_CACHE_MAX, engine: str = DEFAULT_ENGINE, rule_cache: RuleFileCache | None = None
+    ) -> None:
+        super().__init__(dir_cache_max=dir_cache_max, engine=engine, rule_cache=rule_cache)
         # memo of directory -> highest (insertion-index, rule) matching that
         # directory or any of its ancestors; bounded LRU, like the ignore cache.
         self._keep_cache: OrderedDict[str, tuple[int, IgnoreRule] | None] = OrderedDict()
-        # cached descend-prefix globs (recomputed only when the rules change).
-        self._descend_cache: list[str] | None = None
+        # the compiled descend-prefix globs as a 1-tuple (``(None,)``: no
+        # include rules); rebuilt only when the rules change.
+        self._descend_cache: tuple[re.Pattern[str] | None] | None = None
 
     def __enter__(self) -> "IncludeParser":
         return self
@@ -578,30 +1583,32 @@ class IncludeParser(_BaseParser):
         self._keep_cache.clear()
         self._descend_cache = None
 
+    def _retain_cached(self, prefixes: tuple[str, ...], renumber: "Callable[[int], int] | None") -> None:
+        super()._retain_cached(prefixes, renumber)
+        _retain_decisions(self._keep_cache, prefixes, renumber)
+        self._descend_cache = None
+
     def _highest_match(self, str_path: str, is_file: bool) -> tuple[int, IgnoreRule] | None:
         """Highest-insertion-index rule matching *str_path*, or ``None``."""
-        total = len(self.rules)
-        for offset, rule in enumerate(reversed(self.rules)):
-            if is_file and not rule.match_file:
-                continue
-            if _globmatch(str_path, rule.pattern_glob):
-                return total - 1 - offset, rule
-        return None
+        index = self._last_matching_index(str_path, is_file)
+        if index < 0:
+            return None
+        return index, self.rules[index]
 
-    def _ancestor_keep(self, directory: pathlib.Path) -> tuple[int, IgnoreRule] | None:
+    def _ancestor_keep(self, key: str) -> tuple[int, IgnoreRule] | None:
         """
-        Highest (index, rule) matching *directory* or any ancestor (as dirs).
-        Memoized per directory in a bounded LRU so siblings reuse it.
+        Highest (index, rule) matching directory *key* (posix form) or any
+        ancestor (as dirs). Memoized per directory in a bounded LRU so siblings
+        reuse it.
         """
-        key = directory.as_posix()
         cache = self._keep_cache
         cached = cache.get(key, _CACHE_MISS)
         if cached is not _CACHE_MISS:
             cache.move_to_end(key)
             return cached  # type: ignore[return-value]
 
-        parent = directory.parent
-        best = self._ancestor_keep(parent) if parent != directory else None
+        parent = _parent(key)
+        best = self._ancestor_keep(parent) if parent is not None else None
         here = self._highest_match(key, is_file=False)
         if here is not None and (best is None or here[0] > best[0]):
             best = here
@@ -613,18 +1620,61 @@ class IncludeParser(_BaseParser):
                 cache.popitem(last=False)
         return best
 
-    def _keep_decision(self, path_file_object: pathlib.Path, is_dir: bool) -> bool:
+    def _keep_decision(
+        self, str_path: str, index: int, ancestor: "tuple[int, IgnoreRule] | None", is_dir: bool
+    ) -> "tuple[bool, int]":
         """
-        True if the path is whitelisted. A directory include cascades to its
-        contents: the path is kept if the *last* (insertion order) rule matching
-        the path itself or any ancestor directory is a (non-negation) include.
-        A later negation re-excludes within an included tree (rsync-like).
+        ``(kept, deciding rule index or -1)`` for a path whose own last matching
+        rule is *index* and whose parent directory resolved to *ancestor*
+        (:meth:`_ancestor_keep`).
+
+        The path is whitelisted if the *last* (insertion order) rule matching the
+        path itself or any ancestor directory is a (non-negation) include - a
+        directory include cascades to its contents, a later negation re-excludes
+        within an included tree (rsync-like). A directory is also kept if any
+        descendant could match, so that copytree descends into it.
         """
-        best = self._highest_match(path_file_object.as_posix(), is_file=not is_dir)
-        ancestor = self._ancestor_keep(path_file_object.parent)
-        if ancestor is not None and (best is None or ancestor[0] > best[0]):
-            best = ancestor
-        return best is not None and not best[1].is_negation_rule
+        best = ancestor
+        if index >= 0 and (best is None or index > best[0]):
+            best = index, self.rules[index]
+        if best is not None and not best[1].is_negation_rule:
+            return True, best[0]
+        if is_dir:
+            descend = self._descend_regex()
+            if descend is not None and descend.match(str_path) is not None:
+                return True, -1
+        return False, (-1 if best is None else best[0])
+
+    # a path that does not exist is a leaf (a stdin filter passes such paths)
+    _probe_is_file: Callable[[str], bool] = staticmethod(_is_not_dir)
+    _entry_is_file: "Callable[[os.DirEntry[str]], bool]" = staticmethod(_dir_entry_is_not_dir)
+
+    def _decide_siblings(self, parent: str, siblings: list[tuple[str, bool]]) -> list[tuple[bool, int]]:
+        key = _as_posix(parent)
+        if self._lazy is not None:
+            self._load_rules_for(key)
+        ancestor = self._ancestor_keep(key)
+        indices = self._sibling_indices(siblings)
+        return [
+            self._keep_decision(_as_posix(str_path), index, ancestor, is_dir=not is_file)
+            for (str_path, is_file), index in zip(siblings, indices, strict=True)
+        ]
+
+    def _walk_root(self, str_top: str) -> tuple[bool, Any]:
+        return True, self._ancestor_keep(str_top)
+
+    def _walk_children(self, context: Any, siblings: list[tuple[str, bool]]) -> list[tuple[bool, Any]]:
+        # the context is the directory's :meth:`_ancestor_keep`; a subdirectory's
+        # own is the better of it and the subdirectory's own last match
+        ancestor: tuple[int, IgnoreRule] | None = context
+        decided: list[tuple[bool, Any]] = list()
+        for (str_path, is_file), index in zip(siblings, self._sibling_indices(siblings), strict=True):
+            kept, _index = self._keep_decision(str_path, index, ancestor, is_dir=not is_file)
+            child = ancestor
+            if not is_file and index >= 0 and (child is None or index > child[0]):
+                child = index, self.rules[index]
+            decided.append((kept, child))
+        return decided
 
     def _descend_globs(self) -> list[str]:
         """
@@ -633,11 +1683,8 @@ class IncludeParser(_BaseParser):
         For each include (non-negation) rule we generate the cumulative path
         prefixes of its glob - e.g. ``/base/**/test`` yields ``/base``,
         ``/base/**`` and ``/base/**/test``. A directory is descended into if it
-        matches one of these prefixes. Bounded by #rules x path depth; computed
-        once and cached until the rules change.
+        matches one of these prefixes. Bounded by #rules x path depth.
         """
-        if self._descend_cache is not None:
-            return self._descend_cache
         seen: set[str] = set()
         globs: list[str] = list()
         for rule in self.rules:
@@ -650,10 +1697,17 @@ class IncludeParser(_BaseParser):
                 if prefix and prefix not in seen:
                     seen.add(prefix)
                     globs.append(prefix)
-        self._descend_cache = globs
         return globs
 
-    def match(self, file_path: PathLikeOrString) -> bool:
+    def _descend_regex(self) -> "re.Pattern[str] | None":
+        """:meth:`_descend_globs` as one regex, compiled once and kept until the
+        rules change (``None`` without include rules)."""
+        cached = self._descend_cache
+        if cached is None:
+            cached = self._descend_cache = (compile_any(self._descend_globs()),)
+        return cached[0]
+
+    def match(self, file_path: PathLikeOrString, *, is_dir: bool | None = None, is_file: bool | None = None) -> bool:
         """
         returns True if the path is kept by the include rules.
 
@@ -673,19 +1727,29 @@ class IncludeParser(_BaseParser):
         >>> # a non-matching leaf is dropped
         >>> inc.match(base / "test__pycache__/test")
         False
+        >>> # the type hints of IgnoreParser.match apply here, too
+        >>> inc.match(base / "no_such_dir", is_dir=True), inc.match(str(base / "no_such_dir") + "/")
+        (True, True)
+        """
+        str_path, path_is_file = self._typed_path(file_path, _file_hint(is_dir, is_file))
+        return self.match_str(_as_posix(str_path), is_file=path_is_file)
+
+    def match_str(self, str_path: str, *, is_dir: bool | None = None, is_file: bool | None = None) -> bool:
+        """
+        :meth:`match` for a path already in :func:`posix_path` form - the hot
+        loop stays on strings: no ``pathlib`` object per path or per ancestor.
         """
-        path_file_object = self._expand_base_path(base_path=file_path)
+        path_is_file = _file_hint(is_dir, is_file)
         # Treat non-existent paths as leaves (a stdin filter passes paths that
         # may not exist on disk); only descend into genuine directories.
-        is_dir = path_file_object.is_dir()
-        if self._keep_decision(path_file_object, is_dir=is_dir):
-            return True
-        if is_dir:
-            posix = path_file_object.as_posix()
-            for descend_glob in self._descend_globs():
-                if _globmatch(posix, descend_glob):
-                    return True
-        return False
+        is_dir = os.path.isdir(str_path) if path_is_file is None else not path_is_file
+        key = _parent(str_path) or str_path
+        if self._lazy is not None:
+            self._load_rules_for(key)
+        index = self._last_matching_index(str_path, is_file=not is_dir)
+        ancestor = self._ancestor_keep(key)
+        kept, _index = self._keep_decision(str_path, index, ancestor, is_dir=is_dir)
+        return kept
 
     def shutil_include(self, base_dir: str, file_names: list[str]) -> set[str]:
         """
@@ -695,18 +1759,28 @@ class IncludeParser(_BaseParser):
 
         Streams per directory; no structure that grows with the file count.
         """
-        path_base_dir = self._expand_base_path(base_path=base_dir)
-        descend_globs = self._descend_globs()
-        ignore_files: set[str] = set()
-        for file in file_names:
-            full = path_base_dir / file
-            is_dir = full.is_dir()
-            if self._keep_decision(full, is_dir=is_dir):
-                continue
-            if is_dir and any(_globmatch(full.as_posix(), descend_glob) for descend_glob in descend_globs):
-                continue
-            ignore_files.add(file)
-        return ignore_files
+        decisions = self.iter_match_many(self._typed_listing(base_dir, file_names))
+        return {file for file, (kept, _index) in zip(file_names, decisions, strict=True) if not kept}
+
+
+def walk(
+    top: PathLikeOrString, parser: IgnoreParser | IncludeParser | None = None, followlinks: bool = False
+) -> Iterator[tuple[str, list[str], list[str]]]:
+    """
+    ``os.walk(top)`` without the ignored entries, pruning ignored directories
+    instead of descending into them - see ``IgnoreParser.walk``. Without a
+    *parser* the ``.gitignore`` files below *top* are read first.
+
+    >>> base = pathlib.Path(__file__).resolve().parents[2] / 'tests/example'
+    >>> parser = IgnoreParser()
+    >>> parser.add_rule('test__pycache__/', base)
+    >>> any('test__pycache__' in dirpath for dirpath, _dirnames, _filenames in walk(base, parser))
+    False
+    """
+    if parser is None:
+        parser = IgnoreParser()
+        parser.parse_rule_files(top)
+    return parser.walk(top, followlinks=followlinks)
 
 
 def get_rules_from_git_pattern(
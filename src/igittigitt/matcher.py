@@ -0,0 +1,110 @@
+"""Matching from many threads against one atomically replaceable rule set.
+
+A parser is not safe to share between threads: every query updates its caches
+(``last_matching_rule``, the directory LRU's ``move_to_end``), and a rule change
+rebuilds its engine. :class:`SharedMatcher` keeps the parsers out of each
+other's way instead of locking them: the rules are an immutable
+:class:`~igittigitt.igittigitt.RuleSet`, and every thread matches with its own
+parser built from it - caches and all - so a query takes no lock.
+
+:meth:`SharedMatcher.publish` swaps in a new rule set with one reference store.
+A thread picks it up at its next query (building a new parser from it); a query
+already running finishes on the parser it started with, i.e. on the old rules.
+"""
+
+# STDLIB
+import threading
+from typing import Any, Generic, TypeVar
+
+# PROJ
+from .engine import DEFAULT_ENGINE
+from .igittigitt import (
+    _DIR_CACHE_MAX,  # pyright: ignore[reportPrivateUsage] - the parsers' own default
+    IgnoreParser,
+    IncludeParser,
+    PathLikeOrString,
+    RuleSet,
+)
+
+__all__ = ("SharedMatcher",)
+
+_ParserT = TypeVar("_ParserT", IgnoreParser, IncludeParser)
+
+
+class SharedMatcher(Generic[_ParserT]):
+    """
+    A thread-safe matcher over a published :class:`RuleSet`.
+
+    Each thread lazily gets its own ``parser_class`` parser for the current
+    version, so memory is one parser (bounded caches) per thread that matches.
+
+    >>> parser = IgnoreParser()
+    >>> parser.add_rule('*.log', '/repo')
+    >>> matcher = SharedMatcher(IgnoreParser, parser.freeze())
+    >>> matcher.match('/repo/debug.log', is_file=True)
+    True
+    >>> parser.add_rule('!debug.log', '/repo')
+    >>> matcher.publish(parser.freeze())
+    1
+    >>> matcher.match('/repo/debug.log', is_file=True), matcher.version
+    (False, 1)
+    """
+
+    def __init__(
+        self,
+        parser_class: type[_ParserT],
+        ruleset: RuleSet,
+        *,
+        dir_cache_max: int = _DIR_CACHE_MAX,
+        engine: str = DEFAULT_ENGINE,
+    ) -> None:
+        self._parser_class = parser_class
+        self._dir_cache_max = dir_cache_max
+        self._engine = engine
+        # (version, ruleset): replaced as a whole, so a reader sees either the
+        # old pair or the new one - never a version with the other's rules.
+        self._current: tuple[int, RuleSet] = (0, ruleset)
+        self._publish_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def ruleset(self) -> RuleSet:
+        """The currently published rule set."""
+        return self._current[1]
+
+    @property
+    def version(self) -> int:
+        """Number of :meth:`publish` calls so far (``0`` for the initial rules)."""
+        return self._current[0]
+
+    def publish(self, ruleset: RuleSet) -> int:
+        """
+        Make *ruleset* the rules of every later query, and return its version.
+        Queries running meanwhile finish on the rules they started with.
+        """
+        with self._publish_lock:  # only publishers contend: the version stays gap-free
+            version = self._current[0] + 1
+            self._current = (version, ruleset)
+        return version
+
+    def parser(self) -> _ParserT:
+        """
+        The calling thread's parser for the current rules - for the methods not
+        forwarded here (``match_with_rule``, ``match_many``, ``walk``, ...). Use
+        it only in this thread, and fetch it again to see a later publish.
+        """
+        version, ruleset = self._current
+        local: Any = self._local
+        state: tuple[int, _ParserT] | None = getattr(local, "state", None)
+        if state is None or state[0] != version:
+            parser = self._parser_class.from_ruleset(ruleset, dir_cache_max=self._dir_cache_max, engine=self._engine)
+            local.state = state = (version, parser)
+        return state[1]
+
+    def match(self, file_path: PathLikeOrString, *, is_dir: bool | None = None, is_file: bool | None = None) -> bool:
+        """``match`` of the calling thread's parser (see ``IgnoreParser.match``)."""
+        return self.parser().match(file_path, is_dir=is_dir, is_file=is_file)
+
+    def match_str(self, str_path: str, *, is_dir: bool | None = None, is_file: bool | None = None) -> bool:
+        """``match_str`` of the calling thread's parser, for :func:`posix_path` strings."""
+        return self.parser().match_str(str_path, is_dir=is_dir, is_file=is_file)
@@ -0,0 +1,265 @@
+"""Persistent on-disk cache of parsed rule files.
+
+Reading a ``.gitignore`` costs a pattern expansion per line
+(``get_rules_from_git_pattern``) and a ``wcmatch`` translation per glob - pure
+Python, repeated by every CLI invocation. :class:`RuleFileCache` stores, per rule
+file, the parsed rule fields plus the regex source of every glob, so an
+unchanged rule file costs one ``stat`` and one JSON read.
+
+An entry is keyed by the library and ``wcmatch`` versions (the regex sources are
+``wcmatch``'s translations), the rule file path and the base directory its
+patterns are relative to, and is valid only while the file's size,
+modification time and inode are unchanged - an edited rule file is parsed again
+and its entry rewritten. The directory stays bounded: entries written by another
+library or ``wcmatch`` version are deleted, and beyond ``max_entries`` the least
+recently used ones go (:meth:`RuleFileCache.prune`, run on the first write and
+then every ``max_entries // 2`` writes). Entries are plain JSON (nothing is
+unpickled from the cache directory) and every I/O or format problem counts as a
+miss: the cache can make a run faster, never wrong.
+
+The ``adaptive`` engine's learned rule order (hits per glob) is stored in the
+same directory, keyed by the rule set it was learned on
+(:meth:`RuleFileCache.load_rule_order` / :meth:`RuleFileCache.store_rule_order`).
+"""
+
+# STDLIB
+import contextlib
+import hashlib
+import json
+import os
+import pathlib
+import re
+import tempfile
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+# EXT
+import wcmatch  # type: ignore
+
+# PROJ
+from .__init__conf__ import version
+from .engine import prime_translations, translate_glob
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+__all__ = ("CachedRule", "RuleFileCache", "default_cache_dir")
+
+#: Bump when the entry layout changes (the library version is keyed in, too).
+_FORMAT = 1
+
+#: The regex sources stored in an entry are this ``wcmatch`` version's translations.
+_WCMATCH_VERSION = str(wcmatch.__version__)  # pyright: ignore[reportPrivateImportUsage]
+
+#: Default cap on the number of entries (rule files plus learned rule orders).
+_MAX_ENTRIES = 2048
+
+#: The names of the files :meth:`RuleFileCache.prune` may delete: entries with or
+#: without the version tag prefix, learned rule orders included.
+_ENTRY_NAME = re.compile(r"(?:[0-9a-f]{16}-)?(?:order-)?[0-9a-f]{64}\.json")
+
+#: A rule file modified this recently is not cached: another write within the
+#: same timestamp tick could keep size and mtime unchanged ("racy" clean).
+_RACY_SECONDS = 2.0
+
+
+class CachedRule(NamedTuple):
+    """The fields of one parsed rule, as stored in a cache entry."""
+
+    pattern_glob: str
+    pattern_original: str
+    is_negation_rule: bool
+    match_file: bool
+    source_line_number: int | None
+
+
+def _version_tag() -> str:
+    """The entry name prefix of this format, library and ``wcmatch`` version."""
+    key = json.dumps([_FORMAT, version, _WCMATCH_VERSION])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _touch(entry_path: pathlib.Path) -> None:
+    """Mark an entry as just used (pruned last); a read-only cache still hits."""
+    with contextlib.suppress(OSError):
+        os.utime(entry_path)
+
+
+def default_cache_dir() -> pathlib.Path:
+    """
+    ``$XDG_CACHE_HOME/igittigitt`` (``~/.cache/igittigitt`` if unset; on Windows
+    ``%LOCALAPPDATA%\\igittigitt\\cache``).
+    """
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    if xdg_cache_home:
+        return pathlib.Path(xdg_cache_home) / "igittigitt"
+    local_app_data = os.environ.get("LOCALAPPDATA")
+    if os.name == "nt" and local_app_data:
+        return pathlib.Path(local_app_data) / "igittigitt" / "cache"
+    return pathlib.Path.home() / ".cache" / "igittigitt"
+
+
+class RuleFileCache:
+    """
+    A directory of cache entries, one per (rule file, base directory).
+
+    Pass it to a parser (``IgnoreParser(rule_cache=RuleFileCache())``); every rule
+    file the parser reads then goes through :meth:`load` / :meth:`store`.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     rule_file = pathlib.Path(directory) / '.gitignore'
+    ...     _ = rule_file.write_text('*.log\\n')
+    ...     os.utime(rule_file, (0, 0))
+    ...     cache = RuleFileCache(pathlib.Path(directory) / 'cache')
+    ...     cache.store(str(rule_file), directory, [CachedRule('/x/**/*.log', '*.log', False, True, 1)])
+    ...     [rule.pattern_original for rule in cache.load(str(rule_file), directory) or []]
+    ...     _ = rule_file.write_text('*.log\\n*.tmp\\n')  # size changed: the entry is stale
+    ...     cache.load(str(rule_file), directory) is None
+    ['*.log']
+    True
+    """
+
+    def __init__(self, directory: "str | os.PathLike[str] | None" = None, max_entries: int = _MAX_ENTRIES) -> None:
+        self.directory = pathlib.Path(directory) if directory is not None else default_cache_dir()
+        self.max_entries = max_entries
+        # the first write prunes, then every ``max_entries // 2`` writes
+        self._writes_until_prune = 1
+
+    def _entry_path(self, rule_file: str, base_dir: str) -> pathlib.Path:
+        key = json.dumps([rule_file, base_dir])
+        return self.directory / f"{_version_tag()}-{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    @staticmethod
+    def _fingerprint(rule_file: str) -> list[int]:
+        stat = pathlib.Path(rule_file).stat()
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+    def _order_path(self, rules: "Sequence[tuple[str, bool, bool]]") -> pathlib.Path:
+        key = json.dumps([list(rule) for rule in rules])
+        return self.directory / f"{_version_tag()}-order-{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def prune(self) -> None:
+        """
+        Delete the entries of other versions and, beyond ``max_entries``, the
+        least recently used ones (a hit refreshes an entry's mtime). Files that
+        are not cache entries are left alone; an I/O error ends the pass.
+        """
+        prefix = _version_tag() + "-"
+        current: list[tuple[int, str]] = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not _ENTRY_NAME.fullmatch(entry.name):
+                        continue
+                    if entry.name.startswith(prefix):
+                        current.append((entry.stat().st_mtime_ns, entry.path))
+                    else:
+                        pathlib.Path(entry.path).unlink(missing_ok=True)
+            current.sort()
+            for _mtime, entry_path in current[: max(0, len(current) - self.max_entries)]:
+                pathlib.Path(entry_path).unlink(missing_ok=True)
+        except OSError:
+            return
+
+    def _written(self) -> None:
+        """Count one entry write, pruning the directory when due."""
+        self._writes_until_prune -= 1
+        if self._writes_until_prune <= 0:
+            self._writes_until_prune = max(1, self.max_entries // 2)
+            self.prune()
+
+    def load_rule_order(self, rules: "Sequence[tuple[str, bool, bool]]") -> dict[str, int]:
+        """
+        The hits per glob learned on the rule set *rules* - its
+        ``(pattern_glob, is_negation_rule, match_file)`` per rule, in order - or
+        an empty dict.
+        """
+        try:
+            order_path = self._order_path(rules)
+            with order_path.open(encoding="utf-8") as entry_file:
+                entry: dict[str, Any] = json.load(entry_file)
+            learned = {str(glob): int(hits) for glob, hits in entry["hits"].items()}
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return {}
+        _touch(order_path)
+        return learned
+
+    def store_rule_order(self, rules: "Sequence[tuple[str, bool, bool]]", hits: dict[str, int]) -> None:
+        """Write the hits per glob learned on *rules*; silently skipped on any I/O error."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            handle, temp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            return
+        temp_path = pathlib.Path(temp_name)
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as temp_file:
+                json.dump({"hits": hits}, temp_file)
+            temp_path.replace(self._order_path(rules))
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+            return
+        self._written()
+
+    def load(self, rule_file: str, base_dir: str) -> list[CachedRule] | None:
+        """
+        The rules of *rule_file* (absolute) as parsed for *base_dir*, or ``None``
+        if there is no valid entry. A hit also primes the glob translations, so
+        building the engine skips ``wcmatch``.
+        """
+        try:
+            fingerprint = self._fingerprint(rule_file)
+            entry_path = self._entry_path(rule_file, base_dir)
+            with entry_path.open(encoding="utf-8") as entry_file:
+                entry: dict[str, Any] = json.load(entry_file)
+            if entry["fingerprint"] != fingerprint or entry["file"] != rule_file or entry["base"] != base_dir:
+                return None
+            rules = [
+                CachedRule(str(glob), str(original), bool(negation), bool(match_file), line)
+                for glob, original, negation, match_file, line in entry["rules"]
+            ]
+            # only the translations of this entry's own globs are taken up
+            globs = {rule.pattern_glob for rule in rules}
+            translations: dict[str, str] = {
+                str(glob): str(source) for glob, source in entry["regex"].items() if glob in globs
+            }
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return None
+        _touch(entry_path)
+        prime_translations(translations)
+        return rules
+
+    def store(self, rule_file: str, base_dir: str, rules: list[CachedRule]) -> None:
+        """
+        Write the entry for *rule_file* (absolute) parsed for *base_dir*, with the
+        regex source of every glob. Skipped for a file modified within the last
+        moments (its size and mtime could still change unnoticed); written
+        atomically, and silently skipped on any I/O error.
+        """
+        try:
+            fingerprint = self._fingerprint(rule_file)
+            if time.time() - fingerprint[1] / 1e9 < _RACY_SECONDS:
+                return
+            translations = {rule.pattern_glob: translate_glob(rule.pattern_glob) for rule in rules}
+            entry = {
+                "file": rule_file,
+                "base": base_dir,
+                "fingerprint": fingerprint,
+                "rules": [list(rule) for rule in rules],
+                "regex": translations,
+            }
+            self.directory.mkdir(parents=True, exist_ok=True)
+            handle, temp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            return
+        temp_path = pathlib.Path(temp_name)
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as temp_file:
+                json.dump(entry, temp_file)
+            temp_path.replace(self._entry_path(rule_file, base_dir))
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+            return
+        self._written()
+        prime_translations(translations)
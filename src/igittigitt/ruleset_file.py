@@ -0,0 +1,201 @@
+"""Precompiled ruleset files (``igittigitt compile``, ``--ruleset``).
+
+A ruleset file holds a parser's complete rule list in a compact, versioned
+binary layout. Loading one reads the file in a single call and decodes every
+record straight away (the parser needs all rules anyway) - nothing parses a
+``.gitignore``, expands a pattern, translates a glob or classifies a rule.
+
+Layout (little endian)::
+
+    header    magic "IGCR", format u16, flags u16, #strings u32, #rules u32,
+              library version u32, base dir u32          (string indices)
+    offsets   (#strings + 1) x u32 - string i is blob[offsets[i]:offsets[i + 1]]
+    rules     #rules x 9 u32: glob, original, source file, line, regex,
+              strategy kind, scope, key (string indices; the strategy is the
+              rule's scope index entry), flags (negation, match_file)
+    blob      the UTF-8 string table (each distinct string once)
+
+The glob of a rule is absolute, so a ruleset is only valid for the directory
+it was compiled for (recorded as the base dir), and only for the igittigitt
+version that wrote it - any other version is rejected rather than guessed.
+"""
+
+# STDLIB
+import os
+import pathlib
+import struct
+import tempfile
+from collections.abc import Iterable
+from typing import NamedTuple
+
+# PROJ
+from .__init__conf__ import version
+from .engine import LITERAL_SEMANTICS, RuleStrategy, classify_glob
+
+__all__ = ("CompiledRule", "Ruleset", "RulesetFormatError", "read_ruleset", "write_ruleset")
+
+_MAGIC = b"IGCR"
+_FORMAT = 1
+#: the strategies were classified with literal matching (case-sensitive paths)
+_FLAG_LITERAL_SEMANTICS = 1
+_RULE_NEGATION = 1
+_RULE_MATCH_FILE = 2
+#: string index of an absent source file
+_NONE = 0xFFFFFFFF
+
+_HEADER = struct.Struct("<4sHHIIII")
+_RULE = struct.Struct("<9I")
+_OFFSET = struct.Struct("<I")
+
+
+class RulesetFormatError(ValueError):
+    """The file is not a ruleset this igittigitt version can load."""
+
+
+class CompiledRule(NamedTuple):
+    """One rule as stored in a ruleset file."""
+
+    pattern_glob: str
+    pattern_original: str
+    is_negation_rule: bool
+    match_file: bool
+    source_file: str | None
+    source_line_number: int | None
+    regex: str
+    strategy: RuleStrategy
+
+
+class Ruleset(NamedTuple):
+    """The content of a ruleset file."""
+
+    base_dir: str
+    rules: list[CompiledRule]
+
+
+def write_ruleset(path: "str | os.PathLike[str]", rules: Iterable[CompiledRule], base_dir: str) -> None:
+    """
+    Write *rules* (in order) as a ruleset file compiled for *base_dir*; the file
+    is replaced atomically.
+
+    >>> import tempfile
+    >>> glob = '/r/**/*.log'
+    >>> rule = CompiledRule(glob, '*.log', False, True, '/r/.gitignore', 1, '^x$', classify_glob(glob))
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     write_ruleset(f'{directory}/rules.igc', [rule], '/r')
+    ...     read_ruleset(f'{directory}/rules.igc') == Ruleset('/r', [rule])
+    True
+    """
+    strings: dict[str, int] = {}
+
+    def index(value: str) -> int:
+        return strings.setdefault(value, len(strings))
+
+    header_strings = (index(version), index(base_dir))
+    records = b"".join(
+        _RULE.pack(
+            index(rule.pattern_glob),
+            index(rule.pattern_original),
+            _NONE if rule.source_file is None else index(rule.source_file),
+            rule.source_line_number or 0,
+            index(rule.regex),
+            index(rule.strategy.kind),
+            index(rule.strategy.scope),
+            index(rule.strategy.key),
+            (_RULE_NEGATION if rule.is_negation_rule else 0) | (_RULE_MATCH_FILE if rule.match_file else 0),
+        )
+        for rule in rules
+    )
+    encoded = [value.encode("utf-8", "surrogateescape") for value in strings]
+    offsets = [0]
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    flags = _FLAG_LITERAL_SEMANTICS if LITERAL_SEMANTICS else 0
+    header = _HEADER.pack(_MAGIC, _FORMAT, flags, len(strings), len(records) // _RULE.size, *header_strings)
+
+    target = pathlib.Path(path)
+    # a unique temporary name: concurrent writers of one target never share a file
+    handle, temp_name = tempfile.mkstemp(dir=target.parent, prefix=target.name + ".", suffix=".tmp")
+    temp_path = pathlib.Path(temp_name)
+    try:
+        # mkstemp creates the file private; publish it with the usual permissions
+        temp_path.chmod(0o666 & ~_umask())
+        with os.fdopen(handle, "wb") as ruleset_file:
+            ruleset_file.write(header)
+            ruleset_file.write(b"".join(_OFFSET.pack(offset) for offset in offsets))
+            ruleset_file.write(records)
+            ruleset_file.write(b"".join(encoded))
+        temp_path.replace(target)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _umask() -> int:
+    """The process umask (reading it means setting it, so put it straight back)."""
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+def read_ruleset(path: "str | os.PathLike[str]") -> Ruleset:
+    """
+    Load a ruleset file.
+
+    Raises:
+        RulesetFormatError: not a ruleset file, a different format version or
+            igittigitt version, or truncated.
+        OSError: the file cannot be read.
+    """
+    return _decode(pathlib.Path(path).read_bytes(), os.fspath(path))
+
+
+def _decode(data: bytes, name: str) -> Ruleset:
+    """Decode a ruleset; a damaged file is a :class:`RulesetFormatError`, never a crash."""
+    try:
+        return _unpack(data, name)
+    except struct.error as exc:
+        raise RulesetFormatError(f"{name}: truncated ruleset file") from exc
+    except IndexError as exc:  # a string index beyond the string table
+        raise RulesetFormatError(f"{name}: damaged ruleset file") from exc
+
+
+def _unpack(data: bytes, name: str) -> Ruleset:
+    magic, file_format, flags, n_strings, n_rules, version_index, base_index = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC:
+        raise RulesetFormatError(f"{name}: not a ruleset file")
+    if file_format != _FORMAT:
+        raise RulesetFormatError(f"{name}: ruleset format {file_format}, expected {_FORMAT}")
+    offsets_at = _HEADER.size
+    rules_at = offsets_at + (n_strings + 1) * _OFFSET.size
+    blob_at = rules_at + n_rules * _RULE.size
+    offsets = struct.unpack_from(f"<{n_strings + 1}I", data, offsets_at)
+    if blob_at + offsets[-1] > len(data):
+        raise RulesetFormatError(f"{name}: truncated ruleset file")
+    blob = data[blob_at : blob_at + offsets[-1]]
+    strings = [blob[offsets[i] : offsets[i + 1]].decode("utf-8", "surrogateescape") for i in range(n_strings)]
+    if strings[version_index] != version:
+        raise RulesetFormatError(f"{name}: compiled by igittigitt {strings[version_index]}, this is {version}")
+    # a ruleset classified for other path semantics (case-insensitive wcmatch)
+    # is re-classified here instead of trusting its strategies
+    reclassify = bool(flags & _FLAG_LITERAL_SEMANTICS) != LITERAL_SEMANTICS
+    rules: list[CompiledRule] = []
+    record: tuple[int, ...]
+    for record in _RULE.iter_unpack(data[rules_at:blob_at]):
+        glob, original, source, line, regex, kind, scope, key, rule_flags = record
+        pattern_glob = strings[glob]
+        strategy = (
+            classify_glob(pattern_glob) if reclassify else RuleStrategy(strings[kind], strings[scope], strings[key])
+        )
+        rules.append(
+            CompiledRule(
+                pattern_glob,
+                strings[original],
+                bool(rule_flags & _RULE_NEGATION),
+                bool(rule_flags & _RULE_MATCH_FILE),
+                None if source == _NONE else strings[source],
+                line or None,
+                strings[regex],
+                strategy,
+            )
+        )
+    return Ruleset(strings[base_index], rules)
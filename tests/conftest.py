@@ -37,6 +37,14 @@ def pytest_configure(config: pytest.Config) -> None:
 ANSI_ESCAPE_PATTERN = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
 
 
+@pytest.fixture(autouse=True)
+def isolated_rule_cache(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point ``$XDG_CACHE_HOME`` (the on-disk rule cache of the CLI) at a fresh temp dir."""
+    cache_home = tmp_path_factory.mktemp("xdg_cache")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    return cache_home
+
+
 @pytest.fixture
 def cli_runner() -> CliRunner:
     """Provide a fresh Click CliRunner per test."""
@@ -81,6 +81,42 @@ def test_module_entry_subprocess_version() -> None:
     assert __init__conf__.version in result.stdout
 
 
+# a platform without Unix domain sockets (Windows): the CLI must import and run
+_WITHOUT_UNIX_SOCKETS = (
+    "import socket, socketserver, sys;"
+    "vars(socket).pop('AF_UNIX', None); vars(socketserver).pop('UnixStreamServer', None);"
+    "from click.testing import CliRunner;"
+    "from igittigitt.adapters.cli import cli; from igittigitt.composition import build_production;"
+    "result = CliRunner().invoke(cli, sys.argv[1:], input=sys.stdin.read(), obj=build_production);"
+    "sys.stdout.write(result.output); sys.exit(result.exit_code)"
+)
+
+
+@pytest.mark.os_agnostic
+def test_check_and_filter_work_without_unix_domain_sockets(tmp_path: Path) -> None:
+    (tmp_path / ".gitignore").write_text("*.log\n", encoding="utf-8")
+
+    def run(*args: str) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(
+            [sys.executable, "-c", _WITHOUT_UNIX_SOCKETS, *args],
+            input="a.log\na.txt\n",
+            capture_output=True,
+            timeout=60,
+            check=False,
+            encoding="utf-8",
+            errors="replace",
+            env=_subprocess_env(),
+        )
+
+    result = run("filter", "-C", str(tmp_path), "--daemon")
+    assert (result.returncode, result.stdout.split()) == (0, ["a.txt"]), result.stderr
+    result = run("check", "-C", str(tmp_path), "--stdin", "--daemon")
+    assert (result.returncode, result.stdout.split()) == (0, ["a.log"]), result.stderr
+    result = run("serve")
+    assert result.returncode == 1
+    assert "Unix domain sockets" in result.stdout
+
+
 @pytest.mark.os_agnostic
 def test_module_entry_runpy_help(monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]) -> None:
     monkeypatch.setattr(sys, "argv", ["igittigitt"], raising=False)
@@ -145,6 +181,26 @@ def test_check_verbose_shows_pattern(cli_runner: CliRunner, production_factory:
     assert "\ta.log" in result.output
 
 
+@pytest.mark.os_agnostic
+def test_check_non_matching_emits_one_record_per_path(
+    cli_runner: CliRunner, production_factory: Factory, tmp_path: Path
+) -> None:
+    """Like ``git check-ignore -v -n``: negation matches show their rule, unmatched paths ``::``."""
+    _make_tree(tmp_path)
+    result = cli_runner.invoke(
+        cli,
+        ["check", "-C", str(tmp_path), "--stdin", "-v", "-n"],
+        input="a.log\na.txt\n",
+        obj=production_factory,
+    )
+    assert result.exit_code == ExitCode.SUCCESS
+    assert result.stdout.splitlines() == [f"{tmp_path / '.gitignore'}:1:*.log\ta.log", "::\ta.txt"]
+
+    result = cli_runner.invoke(cli, ["check", "-C", str(tmp_path), "-n", "a.log"], obj=production_factory)
+    assert result.exit_code == 2
+    assert "only valid with --verbose" in result.output
+
+
 # --- filter command ----------------------------------------------------------
 
 
@@ -177,6 +233,17 @@ def test_filter_zero_separated(cli_runner: CliRunner, production_factory: Factor
     assert result.stdout.split("\0") == ["a.txt", ""]
 
 
+@pytest.mark.os_agnostic
+def test_filter_trailing_slash_names_a_directory(
+    cli_runner: CliRunner, production_factory: Factory, tmp_path: Path
+) -> None:
+    """Like ``git check-ignore``: ``dist/`` is a directory even though it does not exist."""
+    result = cli_runner.invoke(
+        cli, ["filter", "-C", str(tmp_path), "--include", "-r", "dist/"], input="dist/\ndist\n", obj=production_factory
+    )
+    assert result.stdout.split() == ["dist/"]
+
+
 @pytest.mark.os_agnostic
 def test_filter_rejects_separatorless_giant_token(
     cli_runner: CliRunner, production_factory: Factory, tmp_path: Path
@@ -0,0 +1,193 @@
+"""The ``serve`` daemon must answer exactly like in-process matching, notice
+edited rule files, and ``--daemon`` clients must fall back when it is absent."""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+import rich_click as click
+
+from igittigitt.adapters.cli import cli
+from igittigitt.adapters.cli.commands import _daemon
+from igittigitt.adapters.config.performance import PerformanceSettings
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+    from click.testing import CliRunner
+
+pytestmark = pytest.mark.skipif(not _daemon.DAEMON_SUPPORTED, reason="needs Unix domain sockets")
+
+_INPUT = "a.log\na.txt\nbuild/\nbuild/keep.log\nsub/x.tmp\nsub/y.txt\n"
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    (tmp_path / ".gitignore").write_text("*.log\nbuild/\n!build/keep.log\n", encoding="utf-8")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / ".gitignore").write_text("*.tmp\n", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def daemon(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch) -> Iterator[_daemon.DaemonServer]:
+    socket_path = str(tmp_path_factory.mktemp("run") / "d.sock")
+    monkeypatch.setenv("IGITTIGITT_DAEMON_SOCKET", socket_path)
+    _daemon.claim_socket_path(socket_path)
+    server = _daemon.DaemonServer(socket_path, PerformanceSettings(rule_cache=False))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _run(cli_runner: CliRunner, production_factory: Callable[[], object], *args: str) -> tuple[int, str]:
+    result = cli_runner.invoke(cli, list(args), input=_INPUT, obj=production_factory)
+    return result.exit_code, result.stdout
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize(
+    "args",
+    [
+        ("check", "--stdin", "-v"),
+        ("check", "--stdin", "-r", "*.txt"),
+        ("filter",),
+        ("filter", "--include", "-r", "*.txt", "-r", "build/"),
+    ],
+)
+def test_daemon_answers_like_in_process(
+    cli_runner: CliRunner,
+    production_factory: Callable[[], object],
+    repo: Path,
+    daemon: _daemon.DaemonServer,
+    args: tuple[str, ...],
+) -> None:
+    command = (*args, "-C", str(repo))
+    expected = _run(cli_runner, production_factory, *command)
+    assert _run(cli_runner, production_factory, *command, "--daemon") == expected
+    assert len(daemon._roots) == 1
+
+
+@pytest.mark.os_posix
+def test_daemon_rebuilds_after_a_rule_file_changes(
+    repo: Path, daemon: _daemon.DaemonServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(_daemon, "_CHECK_SECONDS", 0.0)
+    spec = _daemon.ParserSpec.create("ignore", str(repo), scan=True)
+    client = _daemon.DaemonClient.connect()
+    assert client is not None
+    path = f"{repo.as_posix()}/sub/x.tmp"
+    assert client.decide(spec, [path], [None], with_rules=True) == ([True], [f"{repo / 'sub' / '.gitignore'}:1:*.tmp"])
+
+    rule_file = repo / "sub" / ".gitignore"
+    rule_file.write_text("*.dat\n", encoding="utf-8")
+    os.utime(rule_file, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert client.decide(spec, [path], [None]) == ([False], [None])
+    client.close()
+
+
+@pytest.mark.os_posix
+def test_daemon_rebuilds_after_a_rule_file_is_created(
+    repo: Path, daemon: _daemon.DaemonServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(_daemon, "_CHECK_SECONDS", 0.0)
+    # max_age off: only the missing rule file's fingerprint can notice the new one
+    monkeypatch.setattr(daemon, "max_age", 0.0)
+    (repo / "deep").mkdir()
+    spec = _daemon.ParserSpec.create("ignore", str(repo), scan=True)
+    client = _daemon.DaemonClient.connect()
+    assert client is not None
+    path = f"{repo.as_posix()}/deep/x.txt"
+    assert client.decide(spec, [path], [None]) == ([False], [None])
+    (repo / "deep" / ".gitignore").write_text("*.txt\n", encoding="utf-8")
+    assert client.decide(spec, [path], [None]) == ([True], [None])
+    client.close()
+
+
+@pytest.mark.os_posix
+def test_daemon_replies_errors_and_clients_fall_back(
+    cli_runner: CliRunner, production_factory: Callable[[], object], repo: Path, daemon: _daemon.DaemonServer
+) -> None:
+    assert "error" in daemon.answer({"protocol": 99})
+    assert "error" in daemon.answer({"protocol": _daemon.PROTOCOL, "spec": ["bogus"], "paths": [], "dirs": []})
+    # the daemon cannot load the ruleset, the in-process fallback reports it
+    code, _out = _run(cli_runner, production_factory, "check", "-C", str(repo), "--ruleset", "nope.igc", "--daemon")
+    assert code == 2
+
+
+@pytest.mark.os_posix
+def test_daemon_flag_without_a_daemon_decides_in_process(
+    cli_runner: CliRunner,
+    production_factory: Callable[[], object],
+    repo: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("IGITTIGITT_DAEMON_SOCKET", str(tmp_path / "absent.sock"))
+    assert _run(cli_runner, production_factory, "filter", "-C", str(repo), "--daemon") == (
+        0,
+        "a.txt\nsub/y.txt\n",
+    )
+
+
+@pytest.mark.os_posix
+def test_second_daemon_on_the_same_socket_is_refused(
+    cli_runner: CliRunner, production_factory: Callable[[], object], daemon: _daemon.DaemonServer
+) -> None:
+    result = cli_runner.invoke(cli, ["serve"], obj=production_factory)
+    assert result.exit_code == 1
+    assert "already listening" in result.output
+
+
+def _foreign(directory: Path) -> None:
+    if os.getuid() != 0:
+        pytest.skip("changing the owner needs root")
+    os.chown(directory, 65534, 65534)
+
+
+def _symlinked(directory: Path) -> None:
+    target = directory.rename(directory.with_name("elsewhere"))
+    directory.symlink_to(target)
+
+
+_UNTRUSTED: dict[str, Callable[[Path], None]] = {
+    "group_writable": lambda directory: directory.chmod(0o770),
+    "world_readable": lambda directory: directory.chmod(0o755),
+    "other_owner": _foreign,
+    "symlink": _symlinked,
+}
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize("damage", sorted(_UNTRUSTED))
+def test_untrusted_socket_directory_is_refused(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch, damage: str
+) -> None:
+    runtime_dir = tmp_path_factory.mktemp("xdg")
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(runtime_dir))
+    monkeypatch.delenv("IGITTIGITT_DAEMON_SOCKET", raising=False)
+    socket_path = _daemon.default_socket_path()
+    assert socket_path == str(runtime_dir / "igittigitt" / "daemon.sock")
+    directory = runtime_dir / "igittigitt"
+    directory.mkdir(mode=0o700)
+    # someone listens there: a private directory is trusted, an untrusted one is not
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(socket_path)
+        listener.listen()
+        client = _daemon.DaemonClient.connect()
+        assert client is not None
+        client.close()
+
+        _UNTRUSTED[damage](directory)
+        assert _daemon.DaemonClient.connect() is None
+        with pytest.raises(click.ClickException, match="refusing to listen"):
+            _daemon.claim_socket_path(socket_path)
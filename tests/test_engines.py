@@ -0,0 +1,448 @@
+"""Differential tests: every matching engine must agree with the reference.
+
+``LinearEngine`` is the reference (one regex call per rule, last rule first). Each
+other engine in :data:`igittigitt.engine.ENGINES` is fed the same randomized rule
+sets and paths (fixed seeds -> deterministic) and must report the same highest
+matching rule index for files and directories alike.
+"""
+
+from __future__ import annotations
+
+import pathlib
+import random
+from typing import TYPE_CHECKING
+
+import pytest
+
+import igittigitt
+from igittigitt import engine as engine_module
+from igittigitt.engine import (
+    ENGINES,
+    AdaptiveEngine,
+    GeneratedEngine,
+    IndexedEngine,
+    LinearEngine,
+    _alternation,
+    _LiteralPrefilter,
+    build_engine,
+    required_literal,
+)
+from igittigitt.igittigitt import IgnoreRule, get_rules_from_git_pattern
+
+if TYPE_CHECKING:
+    import re
+
+_BASES = ["/repo", "/repo/a", "/repo/a/b", "/repo/z/y/x", "/other"]
+_SEGMENTS = ["a", "b", "src", "build", "node_modules", "logs", ".venv", "x", "y", "z", "__pycache__"]
+_LEAVES = ["main.py", "a.log", "m.pyc", "keep.log", "file1.txt", "readme", ".hidden", "x.tar.gz", "build"]
+_PATTERNS = [
+    "*.log",
+    "*.pyc",
+    "*.py[cod]",
+    "*.tar.gz",
+    "build/",
+    "/build",
+    "node_modules",
+    ".venv/",
+    "logs/**",
+    "**/logs",
+    "a/**/b",
+    "src/*.py",
+    "/*.log",
+    "file?.txt",
+    "keep*",
+    "\\#x",
+    "__pycache__/",
+    "x/y",
+    "*",
+    "**",
+    ".*",
+    "*.",
+    "(x)",
+    "b/**/*.log",
+]
+
+
+def _random_rules(rng: random.Random) -> list[IgnoreRule]:
+    rules: list[IgnoreRule] = []
+    for _ in range(rng.randint(1, 40)):
+        pattern = rng.choice([*_PATTERNS, rng.choice(_SEGMENTS), f"{rng.choice(_SEGMENTS)}/{rng.choice(_LEAVES)}"])
+        if rng.random() < 0.25:
+            pattern = "!" + pattern
+        rules.extend(get_rules_from_git_pattern(pattern, pathlib.Path(rng.choice(_BASES))))
+    return rules
+
+
+def _random_path(rng: random.Random) -> str:
+    parts = [rng.choice(_BASES)]
+    parts.extend(rng.choice(_SEGMENTS) for _ in range(rng.randint(0, 4)))
+    parts.append(rng.choice(_LEAVES))
+    return "/".join(parts)
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize("name", sorted(ENGINES))
+@pytest.mark.parametrize("seed", range(30))
+def test_engine_agrees_with_reference(name: str, seed: int) -> None:
+    rng = random.Random(seed)
+    rules = _random_rules(rng)
+    reference = LinearEngine(rules)
+    engine = build_engine(name, rules)
+    for _ in range(200):
+        path = _random_path(rng)
+        for is_file in (True, False):
+            assert engine.last_match(path, is_file) == reference.last_match(path, is_file), (path, is_file)
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize("name", sorted(ENGINES))
+@pytest.mark.parametrize("seed", range(10))
+def test_batch_of_siblings_agrees_with_reference(name: str, seed: int) -> None:
+    """``last_match_many`` (the joined-buffer scan for big listings) decides like one call per path."""
+    rng = random.Random(seed)
+    rules = _random_rules(rng)
+    reference = LinearEngine(rules)
+    engine = build_engine(name, rules)
+    parent = _random_path(rng).rsplit("/", 1)[0]
+    names = [rng.choice([*_LEAVES, *_SEGMENTS]) for _ in range(rng.randint(1, 300))]
+    if seed % 3 == 0:
+        names.append("odd\nname.log")
+    paths = [f"{parent}/{name}" for name in names]
+    if seed % 2 == 0:
+        paths.extend(_random_path(rng) for _ in range(50))
+    for is_file in (True, False):
+        assert engine.last_match_many(paths, is_file) == [reference.last_match(path, is_file) for path in paths]
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize("name", sorted(ENGINES))
+@pytest.mark.parametrize("seed", range(10))
+def test_last_match_above_only_counts_higher_rules(name: str, seed: int) -> None:
+    rng = random.Random(seed)
+    rules = _random_rules(rng)
+    reference = LinearEngine(rules)
+    engine = build_engine(name, rules)
+    for _ in range(100):
+        path = _random_path(rng)
+        floor = rng.randrange(-1, len(rules))
+        for is_file in (True, False):
+            expected = reference.last_match(path, is_file)
+            assert engine.last_match_above(path, is_file, floor) == (expected if expected > floor else -1)
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize("name", sorted(ENGINES))
+@pytest.mark.parametrize("seed", range(10))
+def test_hinted_suffix_search_decides_like_a_full_search(name: str, seed: int) -> None:
+    """Sorted paths (``find`` order) reuse the last decisive rule; the decisions must not change."""
+    rng = random.Random(seed)
+    rules = _random_rules(rng)
+    reference = LinearEngine(rules)
+    parser = igittigitt.IgnoreParser(engine=name)
+    parser.rules.extend(rules)
+    for path in sorted(_random_path(rng) for _ in range(300)):
+        for is_file in (True, False):
+            assert parser._last_matching_index(path, is_file) == reference.last_match(path, is_file), (path, is_file)
+    assert parser.last_matching_rule is (rules[parser._hint_index] if parser._hint_index >= 0 else None)
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize("seed", range(10))
+def test_adaptive_engine_reorders_blocks_without_changing_the_reported_rule(
+    seed: int, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(engine_module, "_REORDER_EVERY", 16)
+    rng = random.Random(seed)
+    rules = _random_rules(rng)
+    rules.extend(get_rules_from_git_pattern("*.pyc", pathlib.Path("/repo")))
+    reference = LinearEngine(rules)
+    adaptive = AdaptiveEngine(rules)
+    # a skewed workload: most paths are decided by one rule
+    for _ in range(400):
+        path = _random_path(rng) if rng.random() < 0.2 else f"/repo/{rng.choice(_SEGMENTS)}/m.pyc"
+        for is_file in (True, False):
+            assert adaptive.last_match(path, is_file) == reference.last_match(path, is_file), (path, is_file)
+    for block in adaptive._blocks:
+        counts = [adaptive.hits.get(glob, 0) for _index, glob, _match in block.order]
+        assert counts == sorted(counts, reverse=True)
+
+
+class _CountingPattern:
+    """Stands in for a rule's compiled regex and counts the ``match`` calls."""
+
+    def __init__(self, pattern: re.Pattern[str], calls: list[int]) -> None:
+        self._pattern = pattern
+        self._calls = calls
+
+    def match(self, string: str) -> re.Match[str] | None:
+        self._calls[0] += 1
+        return self._pattern.match(string)
+
+
+def _regex_calls(name: str, base: pathlib.Path, paths: list[str]) -> tuple[list[bool], int]:
+    parser = igittigitt.IgnoreParser(engine=name)
+    parser.add_rules(["*.pyc", *(f"*.ext{number}" for number in range(200)), "!keep.pyc"], base)
+    calls = [0]
+    for rule in parser.rules:
+        setattr(rule, "_regex", _CountingPattern(rule.regex, calls))  # noqa: B010 - a test double for the slot
+    decisions = [parser.match_str(path, is_file=True) for path in paths]
+    return decisions, calls[0]
+
+
+@pytest.mark.os_posix
+def test_adaptive_engine_decides_a_skewed_workload_with_fewer_regex_calls(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(engine_module, "_REORDER_EVERY", 64)
+    rng = random.Random(7)
+    rare = ["a.txt", "keep.pyc", "b.ext3"]
+    names = ["m.pyc" if rng.random() < 0.9 else rng.choice(rare) for _ in range(2000)]
+    paths = [f"/repo/d{rng.randrange(50)}/{name}" for name in names]
+    base = pathlib.Path("/repo")
+    linear, linear_calls = _regex_calls("linear", base, paths)
+    adaptive, adaptive_calls = _regex_calls("adaptive", base, paths)
+    assert adaptive == linear
+    assert adaptive_calls * 4 < linear_calls
+
+
+@pytest.mark.os_posix
+def test_adaptive_any_match_counts_towards_the_reorder(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(engine_module, "_REORDER_EVERY", 8)
+    rules = [r for p in ("*.pyc", "*.log", "*.tmp") for r in get_rules_from_git_pattern(p, pathlib.Path("/repo"))]
+    adaptive = AdaptiveEngine(rules)
+    for _ in range(8):
+        assert adaptive.any_match("/repo/x.pyc", is_file=True)
+    assert adaptive._blocks[0].order[0][1] == "/repo/**/*.pyc"
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize("name", sorted(ENGINES))
+@pytest.mark.parametrize("seed", range(10))
+def test_any_match_agrees_with_last_match(name: str, seed: int) -> None:
+    rng = random.Random(seed)
+    rules = _random_rules(rng)
+    reference = LinearEngine(rules)
+    engine = build_engine(name, rules)
+    for _ in range(200):
+        path = _random_path(rng)
+        for is_file in (True, False):
+            assert engine.any_match(path, is_file) == (reference.last_match(path, is_file) >= 0), (path, is_file)
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize("name", sorted(ENGINES))
+@pytest.mark.parametrize("seed", range(10))
+def test_negation_free_scopes_decide_like_the_full_search(name: str, seed: int) -> None:
+    """``match_str`` takes the any-match path where no negation reaches; ``match_str_with_rule`` never does."""
+    rng = random.Random(seed)
+    rules = _random_rules(rng)
+    if seed % 2:
+        rules = [rule for rule in rules if not rule.is_negation_rule]
+    fast = igittigitt.IgnoreParser(engine=name)
+    full = igittigitt.IgnoreParser(engine=name)
+    fast.rules.extend(rules)
+    full.rules.extend(rules)
+    for _ in range(300):
+        path = _random_path(rng)
+        for is_file in (True, False):
+            expected, _rule = full.match_str_with_rule(path, is_file=is_file)
+            assert fast.match_str(path, is_file=is_file) == expected, (path, is_file)
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize("name", sorted(ENGINES))
+def test_engine_agrees_across_many_sibling_scopes(name: str) -> None:
+    """A monorepo shape: one rule file per package, queried inside and outside each."""
+    rng = random.Random(11)
+    rules: list[IgnoreRule] = []
+    for package in range(40):
+        base = pathlib.Path(f"/mono/pkg{package}/{rng.choice(_SEGMENTS)}")
+        for _ in range(rng.randint(1, 6)):
+            rules.extend(get_rules_from_git_pattern(rng.choice(_PATTERNS), base))
+    reference = LinearEngine(rules)
+    engine = build_engine(name, rules)
+    for _ in range(500):
+        path = f"/mono/pkg{rng.randrange(45)}/" + "/".join(rng.choice(_SEGMENTS) for _ in range(rng.randint(0, 3)))
+        path += rng.choice(_LEAVES) if path.endswith("/") else "/" + rng.choice(_LEAVES)
+        for is_file in (True, False):
+            assert engine.last_match(path, is_file) == reference.last_match(path, is_file), (path, is_file)
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize("name", sorted(ENGINES))
+@pytest.mark.parametrize("path", ["/", "/repo/", "/repo//a.log", "/repo/a/./b", "/repo/a.log/"])
+def test_engine_agrees_on_unnormalized_paths(name: str, path: str) -> None:
+    rules = _random_rules(random.Random(7))
+    reference = LinearEngine(rules)
+    engine = build_engine(name, rules)
+    for is_file in (True, False):
+        assert engine.last_match(path, is_file) == reference.last_match(path, is_file)
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize(
+    ("pattern", "kind"),
+    [
+        ("/build", "literal"),
+        ("node_modules", "basename"),
+        ("*.pyc", "extension"),
+        ("*.tar.gz", "suffix"),
+        ("logs/**", "prefix"),
+        ("src/*.py", "regex"),
+        ("\\#x", "regex"),
+        ("(x)", "basename"),
+    ],
+)
+def test_rules_are_classified_at_creation(pattern: str, kind: str) -> None:
+    rules = get_rules_from_git_pattern(pattern, pathlib.Path("/repo"))
+    assert rules[0].strategy.kind == kind
+
+
+@pytest.mark.os_posix
+def test_identical_rule_lines_compile_once_across_scopes() -> None:
+    """The same ``.gitignore`` lines in many directories share one scope-relative regex."""
+    rules: list[IgnoreRule] = []
+    for package in range(200):
+        for pattern in ("src/*.py", "src/*/?"):
+            rules.extend(get_rules_from_git_pattern(pattern, pathlib.Path(f"/mono/pkg{package}")))
+    _alternation.cache_clear()
+    engine = IndexedEngine(rules)
+    assert engine.last_match("/mono/pkg7/src/main.py", is_file=True) == 14
+    assert engine.last_match("/mono/pkg7/src/a/b", is_file=True) == 15
+    assert engine.last_match("/mono/pkg7/lib/main.py", is_file=True) == -1
+    assert _alternation.cache_info().currsize == 1
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize(
+    ("pattern_glob", "literal"),
+    [
+        ("**/*.egg-info/**/*", ".egg-info"),
+        ("dist-*/x", "dist-"),
+        ("*.py[cod]", ".py"),
+        ("[!a]bc", "bc"),
+        ("[]]ab", "ab"),
+        ("*/?", ""),
+        ("a[", ""),
+    ],
+)
+def test_required_literal(pattern_glob: str, literal: str) -> None:
+    assert required_literal(pattern_glob) == literal
+
+
+@pytest.mark.os_posix
+@pytest.mark.parametrize("seed", range(10))
+def test_literal_prefilter_reports_overlapping_literals(seed: int) -> None:
+    rng = random.Random(seed)
+    literals = ["".join(rng.choice("ab.") for _ in range(rng.randint(2, 4))) for _ in range(8)]
+    prefilter = _LiteralPrefilter(literals)
+    for _ in range(50):
+        path = "".join(rng.choice("ab./") for _ in range(rng.randint(0, 12)))
+        assert prefilter.found(path) == {literal for literal in literals if literal in path}
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("name", sorted(ENGINES))
+def test_engine_reports_the_deciding_rule(name: str, tmp_path: pathlib.Path) -> None:
+    """``match_with_rule`` (``check -v``) names the same rule whatever the engine."""
+    parser = igittigitt.IgnoreParser(engine=name)
+    parser.add_rule("*.log", tmp_path)
+    parser.add_rule("!keep.log", tmp_path)
+    parser.add_rule("keep.log", tmp_path / "sub")
+    ignored, rule = parser.match_with_rule(tmp_path / "sub" / "keep.log")
+    assert ignored
+    assert rule is not None
+    assert rule.pattern_original == "keep.log"
+    assert not parser.match(tmp_path / "keep.log")
+
+
+@pytest.mark.os_posix
+def test_generated_decision_function_is_shared_and_quotes_every_rule() -> None:
+    patterns = ["*.log", "it's", 'say"hi"', "back\\slash", "a'b/*.py", "!keep'.log", "dir'/", "*'*"]
+    rules = [rule for pattern in patterns for rule in get_rules_from_git_pattern(pattern, pathlib.Path("/re'po"))]
+    generated = GeneratedEngine(rules)
+    reference = LinearEngine(rules)
+    names = ["a.log", "it's", 'say"hi"', "back\\slash", "a'b/x.py", "keep'.log", "dir'", "x'y", "plain"]
+    for name in names:
+        for is_file in (True, False):
+            path = f"/re'po/sub/{name}"
+            assert generated.last_match(path, is_file) == reference.last_match(path, is_file), (path, is_file)
+    # built once per rule set: a rebuilt engine reuses the compiled function
+    assert GeneratedEngine(rules)._decide is generated._decide
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("parser_class", [igittigitt.IgnoreParser, igittigitt.IncludeParser])
+def test_generated_engine_behind_match(
+    parser_class: type[igittigitt.IgnoreParser | igittigitt.IncludeParser], tmp_path: pathlib.Path
+) -> None:
+    generated, reference = parser_class(engine="generated"), parser_class(engine="linear")
+    for parser in (generated, reference):
+        parser.add_rules(["*.log", "build/", "!keep.log", "docs/**/*.md", "src/"], tmp_path)
+        parser.add_rule("!*.tmp", tmp_path / "sub")
+    for name in ("a.log", "keep.log", "build/x.o", "docs/a/b.md", "src/main.py", "sub/a.tmp", "sub/b.log", "x.txt"):
+        assert generated.match(tmp_path / name, is_file=True) == reference.match(tmp_path / name, is_file=True)
+
+
+@pytest.mark.os_agnostic
+def test_negation_free_match_looks_up_no_rule(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    parser = igittigitt.IgnoreParser()
+    parser.add_rules(["*.log", "build/"], tmp_path)
+    parser.add_rule("!keep.log", tmp_path / "sub")
+    looked_up: list[str] = []
+    original = parser._last_matching_index
+
+    def counting(str_path: str, is_file: bool, *, exact: bool = True) -> int:
+        looked_up.append(str_path)
+        return original(str_path, is_file, exact=exact)
+
+    monkeypatch.setattr(parser, "_last_matching_index", counting)
+    base = igittigitt.posix_path(tmp_path)
+    assert parser.match_str(f"{base}/a/b.log", is_file=True)
+    assert parser.match_str(f"{base}/build/x/c.txt", is_file=True)
+    assert not parser.match_str(f"{base}/a/c.txt", is_file=True)
+    # only the excluded directory's rule is looked up (it is cached for its subtree)
+    assert looked_up == [f"{base}/build"]
+    # below the negation's scope the last matching rule decides as usual
+    assert not parser.match_str(f"{base}/sub/keep.log", is_file=True)
+    assert looked_up[-1] == f"{base}/sub/keep.log"
+    assert parser.match_with_rule(tmp_path / "a" / "b.log", is_file=True)[1] is parser.rules[0]
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("name", sorted(ENGINES))
+def test_engine_is_rebuilt_after_a_rule_change(name: str, tmp_path: pathlib.Path) -> None:
+    parser = igittigitt.IncludeParser(engine=name)
+    parser.add_rule("*.py", tmp_path)
+    assert not parser.match(tmp_path / "notes.txt")
+    parser.add_rule("*.txt", tmp_path)
+    assert parser.match(tmp_path / "notes.txt")
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("name", sorted(ENGINES))
+def test_matching_does_not_depend_on_the_translation_cache(
+    name: str, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The patterns are bound once the engine is built: with the translation
+    cache disabled, matching neither translates nor compiles."""
+    monkeypatch.setattr(engine_module, "_translation", engine_module._translation)
+    engine_module.set_pattern_cache_size(0)
+    parser = igittigitt.IncludeParser(engine=name)
+    parser.add_rules(["*.py", "src/*/x[0-9].txt", "docs/"], tmp_path)
+    paths = [tmp_path / "a.py", tmp_path / "src" / "m" / "x1.txt", tmp_path / "docs" / "a", tmp_path / "src"]
+    expected = [parser.match(path, is_file=True) for path in paths]
+    assert parser.match(tmp_path / "src", is_dir=True)
+
+    def fail(*_args: object, **_kwargs: object) -> object:
+        raise AssertionError("translated or compiled while matching")
+
+    monkeypatch.setattr(engine_module.wcmatch.glob, "translate", fail)
+    monkeypatch.setattr(engine_module.re, "compile", fail)
+    for _ in range(3):
+        assert [parser.match(path, is_file=True) for path in paths] == expected
+        assert parser.match(tmp_path / "src", is_dir=True)
+
+
+@pytest.mark.os_agnostic
+def test_unknown_engine_is_rejected() -> None:
+    with pytest.raises(ValueError, match="unknown engine"):
+        igittigitt.IgnoreParser(engine="does-not-exist")
@@ -0,0 +1,64 @@
+"""``parser.freeze()`` must give an immutable, compactly picklable rule snapshot
+whose ``from_ruleset`` parsers decide exactly like the parser it was taken from."""
+
+from __future__ import annotations
+
+import dataclasses
+import pickle
+from typing import TYPE_CHECKING
+
+import pytest
+
+import igittigitt
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_PATHS = ("a.log", "keep.log", "build/x.o", "build", "docs/a/b.md", "src/main.py", "sub/a.tmp", "sub/b.txt")
+
+
+def _parser(root: Path) -> igittigitt.IgnoreParser:
+    (root / ".gitignore").write_text("*.log\nbuild/\n!keep.log\n/docs/**/*.md\n", encoding="utf-8")
+    (root / "sub").mkdir()
+    (root / "sub" / ".gitignore").write_text("*.tmp\n", encoding="utf-8")
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(root, add_default_patterns=False)
+    return parser
+
+
+@pytest.mark.os_agnostic
+def test_unpickled_ruleset_decides_like_its_source(tmp_path: Path) -> None:
+    source = _parser(tmp_path)
+    data = pickle.dumps(source.freeze())
+    # regex sources, not compiled patterns; one string per rule file
+    assert b"_compile" not in data
+    assert data.count(str(tmp_path / "sub" / ".gitignore").encode()) == 1
+
+    ruleset = pickle.loads(data)  # noqa: S301 - our own snapshot
+    for parser_class in (igittigitt.IgnoreParser, igittigitt.IncludeParser):
+        loaded = parser_class.from_ruleset(ruleset)
+        assert loaded.rules == source.rules
+        # nothing is compiled before the first match
+        assert all(getattr(rule, "_regex", None) is None for rule in loaded.rules)
+
+    loaded = igittigitt.IgnoreParser.from_ruleset(ruleset, engine="linear")
+    for path in _PATHS:
+        assert loaded.match_with_rule(tmp_path / path, is_file=True) == source.match_with_rule(
+            tmp_path / path, is_file=True
+        )
+    assert all(rule._regex is not None for rule in loaded.rules)
+
+
+@pytest.mark.os_agnostic
+def test_ruleset_is_immutable_and_independent_of_its_parser(tmp_path: Path) -> None:
+    source = _parser(tmp_path)
+    ruleset = source.freeze()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        ruleset.rules = ()  # type: ignore[misc]
+    assert isinstance(ruleset.rules, tuple)
+
+    source.add_rule("*.txt", tmp_path)
+    assert len(ruleset) == len(source.rules) - 1
+    first = igittigitt.IgnoreParser.from_ruleset(ruleset)
+    first.add_rule("*.py", tmp_path)
+    assert not igittigitt.IgnoreParser.from_ruleset(ruleset).match(tmp_path / "src" / "main.py", is_file=True)
@@ -98,6 +98,9 @@ def _assert_matches_git(tmp_path: Path, gitignores: dict[str, str], files: list[
 
     parser = igittigitt.IgnoreParser()
     parser.parse_rule_files(base_dir=tmp_path, add_default_patterns=False)
+    # reads the rule files on demand, along each queried path's ancestors
+    lazy_parser = igittigitt.IgnoreParser()
+    lazy_parser.parse_rule_files(base_dir=tmp_path, add_default_patterns=False, lazy=True)
 
     mismatches: list[str] = []
     for rel in rel_paths:
@@ -105,6 +108,8 @@ def _assert_matches_git(tmp_path: Path, gitignores: dict[str, str], files: list[
         theirs = rel in oracle
         if mine != theirs:
             mismatches.append(f"{rel}: igittigitt={mine} git={theirs}")
+        if lazy_parser.match(tmp_path / rel) != theirs:
+            mismatches.append(f"{rel}: igittigitt(lazy)={not theirs} git={theirs}")
     assert not mismatches, "disagreement with git:\n" + "\n".join(mismatches)
 
 
@@ -0,0 +1,126 @@
+"""``replace_rule_file`` / ``remove_rules_from`` / ``add_rules`` must decide like
+a parser built from scratch, while keeping the warm decisions outside the scope
+of the changed rules."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+import igittigitt
+from igittigitt import igittigitt as core
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_PATHS = (
+    "a.log",
+    "keep.log",
+    "build/x.o",
+    "build/keep.log",
+    "docs/a.md",
+    "docs/api/b.md",
+    "sub/a.tmp",
+    "sub/deep/b.txt",
+    "sub/deep/c.log",
+    "src/main.py",
+)
+
+
+def _repo(root: Path) -> Path:
+    (root / ".gitignore").write_text("*.log\nbuild/\n!keep.log\n", encoding="utf-8")
+    for directory in ("sub/deep", "docs/api", "src", "build"):
+        (root / directory).mkdir(parents=True)
+    (root / "sub" / ".gitignore").write_text("*.tmp\ndeep/\n", encoding="utf-8")
+    (root / "docs" / ".gitignore").write_text("api/\n", encoding="utf-8")
+    return root
+
+
+def _decisions(parser: igittigitt.IgnoreParser | igittigitt.IncludeParser, root: Path) -> list[bool]:
+    return [parser.match_str(igittigitt.posix_path(root / path), is_file=True) for path in _PATHS]
+
+
+def _fresh_ignore(root: Path) -> igittigitt.IgnoreParser:
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(root, add_default_patterns=False)
+    return parser
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("lazy", [False, True])
+def test_edited_rule_file_decides_like_a_fresh_parser(tmp_path: Path, lazy: bool) -> None:
+    root = _repo(tmp_path)
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(root, add_default_patterns=False, lazy=lazy)
+    parser.add_rules(["*.py", "!src/main.py"], root)
+    _decisions(parser, root)
+
+    (root / "sub" / ".gitignore").write_text("!deep/\n*.txt\n", encoding="utf-8")
+    parser.replace_rule_file(root / "sub" / ".gitignore")
+    fresh = _fresh_ignore(root)
+    fresh.add_rules(["*.py", "!src/main.py"], root)
+    assert _decisions(parser, root) == _decisions(fresh, root)
+    assert [str(rule) for rule in parser.rules] == [str(rule) for rule in fresh.rules]
+
+    assert parser.remove_rules_from(root / "docs" / ".gitignore") == 1
+    (root / "docs" / ".gitignore").unlink()
+    fresh = _fresh_ignore(root)
+    fresh.add_rules(["*.py", "!src/main.py"], root)
+    assert _decisions(parser, root) == _decisions(fresh, root)
+    for path in _PATHS:
+        assert parser.match_with_rule(root / path, is_file=True) == fresh.match_with_rule(root / path, is_file=True)
+
+
+@pytest.mark.os_posix
+def test_only_decisions_below_the_changed_scope_are_dropped(tmp_path: Path) -> None:
+    root = _repo(tmp_path)
+    parser = _fresh_ignore(root)
+    _decisions(parser, root)
+    base = igittigitt.posix_path(root)
+    warm = {key: value for key, value in parser._dir_cache.items() if not key.startswith(f"{base}/sub/")}
+    assert f"{base}/sub/deep" in parser._dir_cache
+
+    dropped = [rule.pattern_original for rule in parser.rules].index("deep/")
+
+    (root / "sub" / ".gitignore").write_text("*.tmp\n", encoding="utf-8")
+    parser.replace_rule_file(root / "sub" / ".gitignore")
+    assert f"{base}/sub/deep" not in parser._dir_cache
+    # sub/.gitignore lost its "deep/" rule: the later rule indices moved down
+    assert parser._dir_cache == {
+        key: None if value is None else (value[0] - (value[0] > dropped), value[1]) for key, value in warm.items()
+    }
+
+
+@pytest.mark.os_agnostic
+def test_include_parser_keeps_its_decisions_consistent(tmp_path: Path) -> None:
+    parser = igittigitt.IncludeParser()
+    parser.add_rules(["*.md", "src/"], tmp_path)
+    rule_file = tmp_path / "include.txt"
+    rule_file.write_text("sub/deep/\n", encoding="utf-8")
+    parser.parse_rule_file(rule_file, base_dir=tmp_path)
+    _decisions(parser, tmp_path)
+
+    rule_file.write_text("*.log\n!keep.log\n", encoding="utf-8")
+    parser.replace_rule_file(rule_file, base_dir=tmp_path)
+    fresh = igittigitt.IncludeParser()
+    fresh.add_rules(["*.md", "src/"], tmp_path)
+    fresh.parse_rule_file(rule_file, base_dir=tmp_path)
+    assert _decisions(parser, tmp_path) == _decisions(fresh, tmp_path)
+
+
+@pytest.mark.os_posix
+def test_bulk_add_invalidates_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[set[str]] = []
+    original = core._BaseParser._invalidate_scopes
+
+    def counting(self: core._BaseParser, scopes: set[str], renumber: object) -> None:
+        calls.append(scopes)
+        original(self, scopes, renumber)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(core._BaseParser, "_invalidate_scopes", counting)
+    parser = igittigitt.IgnoreParser()
+    parser.add_rules(["/build/", "/docs/*.md", "/src/tmp/"], tmp_path)
+    assert len(calls) == 1
+    # the scopes of the new rules: their literal leading directories
+    assert calls[0] == {igittigitt.posix_path(tmp_path / name) for name in ("", "docs", "src")}
@@ -0,0 +1,67 @@
+"""``check --jobs`` / ``filter --jobs`` must decide exactly like the single
+process - in input order by default, as the same set with ``--unordered``."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from igittigitt.adapters.cli import cli
+from igittigitt.adapters.cli.commands import _pool
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from click.testing import CliRunner
+
+_NAMES = ("a.log", "a.txt", "build/", "build/keep.log", "keep.log", "sub/x.tmp", "sub/y.txt", "src/main.py")
+_INPUT = "".join(f"{index}/{name}\n" for index in range(40) for name in _NAMES)
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # small chunks and a tight in-flight bound, so a few hundred paths exercise
+    # many chunks and the back-pressure path
+    monkeypatch.setattr(_pool, "_CHUNK_PATHS", 7)
+    (tmp_path / ".gitignore").write_text("*.log\nbuild/\n!keep.log\n", encoding="utf-8")
+    (tmp_path / "0" / "sub").mkdir(parents=True)
+    (tmp_path / "0" / "sub" / ".gitignore").write_text("*.tmp\n", encoding="utf-8")
+    return tmp_path
+
+
+def _run(cli_runner: CliRunner, production_factory: Callable[[], object], *args: str) -> tuple[int, str]:
+    result = cli_runner.invoke(
+        cli, ["--set", "performance.max_in_flight_chunks=2", *args], input=_INPUT, obj=production_factory
+    )
+    return result.exit_code, result.stdout
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize(
+    "args",
+    [
+        ("filter",),
+        ("filter", "--include", "-r", "*.txt", "-r", "build/"),
+        ("check", "--stdin", "-v"),
+        ("check", "--stdin", "-v", "-n"),
+    ],
+)
+def test_jobs_decide_like_one_process_in_input_order(
+    cli_runner: CliRunner, production_factory: Callable[[], object], repo: Path, args: tuple[str, ...]
+) -> None:
+    command = (*args, "-C", str(repo))
+    expected = _run(cli_runner, production_factory, *command)
+    assert expected[1]
+    assert _run(cli_runner, production_factory, *command, "--jobs", "3") == expected
+
+
+@pytest.mark.os_agnostic
+def test_unordered_jobs_write_the_same_paths(
+    cli_runner: CliRunner, production_factory: Callable[[], object], repo: Path
+) -> None:
+    code, expected = _run(cli_runner, production_factory, "filter", "-C", str(repo))
+    unordered = _run(cli_runner, production_factory, "filter", "-C", str(repo), "-j", "3", "--unordered")
+    assert unordered[0] == code
+    assert sorted(unordered[1].splitlines()) == sorted(expected.splitlines())
@@ -0,0 +1,124 @@
+"""The batch APIs (``match_many`` / ``iter_match_many``) must decide exactly like
+one ``match`` call per path - in any input order, with or without known types."""
+
+from __future__ import annotations
+
+import os
+import random
+from typing import TYPE_CHECKING
+
+import pytest
+
+import igittigitt
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    _Parser = igittigitt.IgnoreParser | igittigitt.IncludeParser
+
+
+def _build_tree(root: Path) -> list[Path]:
+    for directory in ("src/pkg", "build/out", "logs", "docs/keep"):
+        (root / directory).mkdir(parents=True)
+    for file in ("src/main.py", "src/pkg/deep.py", "src/debug.log", "build/out/a.o", "logs/keep.log", "docs/guide.md"):
+        (root / file).write_text("x", encoding="utf-8")
+    return [*sorted(root.rglob("*")), root / "missing.log", root / "missing"]
+
+
+def _ignore_parser(root: Path) -> igittigitt.IgnoreParser:
+    parser = igittigitt.IgnoreParser()
+    for pattern in ("*.log", "build/", "!logs/keep.log", "docs/*", "!docs/keep"):
+        parser.add_rule(pattern, root)
+    return parser
+
+
+def _include_parser(root: Path) -> igittigitt.IncludeParser:
+    parser = igittigitt.IncludeParser()
+    for pattern in ("*.py", "docs/", "!docs/guide.md", "logs/*.log"):
+        parser.add_rule(pattern, root)
+    return parser
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("make_parser", [_ignore_parser, _include_parser])
+def test_match_many_agrees_with_match(make_parser: Callable[[Path], _Parser], tmp_path: Path) -> None:
+    paths = _build_tree(tmp_path)
+    random.Random(3).shuffle(paths)
+    parser = make_parser(tmp_path)
+    expected = [parser.match(path) for path in paths]
+
+    assert parser.match_many(paths) == expected
+    assert parser.match_many(str(path) for path in paths) == expected
+    assert parser.match_many(paths, as_bytes=True) == bytearray(expected)
+    assert [decision for decision, _index in parser.iter_match_many(paths)] == expected
+
+
+@pytest.mark.os_agnostic
+def test_known_types_skip_the_filesystem(tmp_path: Path) -> None:
+    """With ``is_file`` given, nothing needs to exist - a trailing name is what the caller says."""
+    parser = _ignore_parser(tmp_path)
+    paths = [tmp_path / "build", tmp_path / "build", tmp_path / "build" / "x.txt", tmp_path / "logs" / "keep.log"]
+    assert parser.match_many(paths, is_file=[True, False, True, True]) == [False, True, True, False]
+
+
+@pytest.mark.os_agnostic
+def test_iter_match_many_reports_the_deciding_rule(tmp_path: Path) -> None:
+    parser = _ignore_parser(tmp_path)
+    paths = [tmp_path / "a.log", tmp_path / "logs" / "keep.log", tmp_path / "build" / "deep" / "x.txt", tmp_path / "x"]
+    results = list(parser.iter_match_many(paths, is_file=[True, True, True, True]))
+    assert results == [(True, 0), (False, 2), (True, 1), (False, -1)]
+    assert parser.rules[results[1][1]].pattern_original == "!logs/keep.log"
+
+
+@pytest.mark.os_agnostic
+def test_mismatched_types_are_rejected(tmp_path: Path) -> None:
+    parser = _ignore_parser(tmp_path)
+    with pytest.raises(ValueError, match="zip"):
+        parser.match_many([tmp_path / "a", tmp_path / "b"], is_file=[True])
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("make_parser", [_ignore_parser, _include_parser])
+def test_match_str_agrees_with_match(make_parser: Callable[[Path], _Parser], tmp_path: Path) -> None:
+    """The string fast path (used by ``check`` / ``filter``) decides like ``match``."""
+    parser = make_parser(tmp_path)
+    for path in _build_tree(tmp_path):
+        assert parser.match_str(igittigitt.posix_path(path)) == parser.match(path), path
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("make_parser", [_ignore_parser, _include_parser])
+def test_type_hints_agree_with_stat(
+    make_parser: Callable[[Path], _Parser], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Hints, ``os.DirEntry`` objects and a trailing ``/`` decide like the ``stat``-ed path."""
+    paths = [path for path in _build_tree(tmp_path) if path.exists()]
+    parser = make_parser(tmp_path)
+    expected = [parser.match(path) for path in paths]
+    entries = [entry for path in paths for entry in os.scandir(path.parent) if entry.name == path.name]
+    kinds = [path.is_dir() for path in paths]
+
+    monkeypatch.setattr(os.path, "isfile", _no_stat)
+    monkeypatch.setattr(os.path, "isdir", _no_stat)
+    assert [parser.match(path, is_dir=kind) for path, kind in zip(paths, kinds, strict=True)] == expected
+    assert [parser.match(path, is_file=not kind) for path, kind in zip(paths, kinds, strict=True)] == expected
+    assert [parser.match(entry) for entry in entries] == expected
+    assert [parser.match(f"{path}/") for path, kind in zip(paths, kinds, strict=True) if kind] == [
+        decision for decision, kind in zip(expected, kinds, strict=True) if kind
+    ]
+    assert parser.match_many(entries) == expected
+    assert parser.match_many(paths, is_dir=kinds) == expected
+
+
+def _no_stat(_path: object) -> bool:
+    raise AssertionError("the path was stat-ed despite a type hint")
+
+
+@pytest.mark.os_agnostic
+def test_conflicting_type_hints_are_rejected(tmp_path: Path) -> None:
+    parser = _ignore_parser(tmp_path)
+    with pytest.raises(ValueError, match="not both"):
+        parser.match(tmp_path / "a", is_dir=True, is_file=False)
+    with pytest.raises(ValueError, match="not both"):
+        parser.match_many([tmp_path / "a"], is_file=[True], is_dir=[False])
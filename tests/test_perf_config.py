@@ -25,6 +25,7 @@ def test_performance_settings_defaults_are_evaluated_values() -> None:
     assert s.pattern_cache_max == 4096
     assert s.stdin_chunk_bytes == 65536
     assert s.max_token_bytes == 1 << 20
+    assert s.engine == "indexed"
 
 
 @pytest.mark.os_agnostic
@@ -67,3 +68,25 @@ def test_set_max_token_bytes_tightens_the_guard(
     )
     assert result.exit_code != 0
     assert "exceeds 8 bytes" in result.output
+
+
+@pytest.mark.os_agnostic
+def test_set_engine_combined_reports_the_same_rule(
+    cli_runner: CliRunner, production_factory: Factory, tmp_path: Path
+) -> None:
+    """The combined engine is selectable per run and `check -v` names the same rule."""
+    (tmp_path / ".gitignore").write_text("*.log\n!keep.log\n", encoding="utf-8")
+    result = cli_runner.invoke(
+        cli,
+        ["--set", "performance.engine=combined", "check", "-C", str(tmp_path), "-v", "a.log", "keep.log"],
+        obj=production_factory,
+    )
+    assert result.stdout.splitlines() == [f"{tmp_path / '.gitignore'}:1:*.log\ta.log"]
+
+
+@pytest.mark.os_agnostic
+def test_set_pattern_cache_size_is_still_importable_from_the_core_module() -> None:
+    from igittigitt import engine
+    from igittigitt.igittigitt import set_pattern_cache_size
+
+    assert set_pattern_cache_size is engine.set_pattern_cache_size
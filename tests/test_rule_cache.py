@@ -0,0 +1,200 @@
+"""The on-disk rule cache must skip parsing and glob translation for unchanged
+rule files - and must never change a decision."""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+
+import igittigitt
+from igittigitt import engine, rule_cache
+from igittigitt import igittigitt as core
+from igittigitt.adapters.cli import cli
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from click.testing import CliRunner
+
+_RULES = "*.log\nbuild/\n!keep.log\n/docs/**/*.md\n"
+
+
+def _rule_file(root: Path, text: str = _RULES) -> Path:
+    rule_file = root / ".gitignore"
+    rule_file.write_text(text, encoding="utf-8")
+    os.utime(rule_file, (1_000_000_000, 1_000_000_000))  # not "racily" recent
+    return rule_file
+
+
+def _fail(*_args: object, **_kwargs: object) -> object:
+    raise AssertionError("the rule file was parsed / translated despite a cache hit")
+
+
+@pytest.mark.os_agnostic
+def test_unchanged_rule_file_skips_parsing_and_translation(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _rule_file(tmp_path)
+    cache = igittigitt.RuleFileCache(tmp_path / "cache")
+    first = igittigitt.IgnoreParser(rule_cache=cache)
+    first.parse_rule_files(tmp_path, add_default_patterns=False)
+
+    monkeypatch.setattr(core, "get_rules_from_git_pattern", _fail)
+    monkeypatch.setattr(engine.wcmatch.glob, "translate", _fail)
+    engine._translation.cache_clear()
+    engine._alternation.cache_clear()
+
+    second = igittigitt.IgnoreParser(rule_cache=cache)
+    second.parse_rule_files(tmp_path, add_default_patterns=False)
+    assert [str(rule) for rule in second.rules] == [str(rule) for rule in first.rules]
+    assert [rule.source_line_number for rule in second.rules] == [rule.source_line_number for rule in first.rules]
+    for path in ("a.log", "keep.log", "build/x", "docs/a/b.md", "src/main.py"):
+        assert second.match(tmp_path / path, is_file=True) == first.match(tmp_path / path, is_file=True)
+
+
+@pytest.mark.os_agnostic
+def test_changed_rule_file_is_parsed_again(tmp_path: Path) -> None:
+    rule_file = _rule_file(tmp_path)
+    cache = igittigitt.RuleFileCache(tmp_path / "cache")
+    igittigitt.IgnoreParser(rule_cache=cache).parse_rule_file(rule_file)
+    _rule_file(tmp_path, "*.tmp\n")
+    parser = igittigitt.IgnoreParser(rule_cache=cache)
+    parser.parse_rule_file(rule_file)
+    assert [rule.pattern_original for rule in parser.rules] == ["*.tmp"]
+
+
+@pytest.mark.os_agnostic
+def test_corrupt_cache_entry_falls_back_to_parsing(tmp_path: Path) -> None:
+    rule_file = _rule_file(tmp_path)
+    cache = igittigitt.RuleFileCache(tmp_path / "cache")
+    igittigitt.IgnoreParser(rule_cache=cache).parse_rule_file(rule_file)
+    (entry,) = (tmp_path / "cache").iterdir()
+    entry.write_text('{"rules": 3', encoding="utf-8")
+    parser = igittigitt.IgnoreParser(rule_cache=cache)
+    parser.parse_rule_file(rule_file)
+    assert parser.match(tmp_path / "a.log", is_file=True)
+
+
+@pytest.mark.os_agnostic
+def test_cache_entry_primes_only_its_own_globs(tmp_path: Path) -> None:
+    rule_file = _rule_file(tmp_path)
+    cache = igittigitt.RuleFileCache(tmp_path / "cache")
+    igittigitt.IgnoreParser(rule_cache=cache).parse_rule_file(rule_file)
+    (entry_path,) = (tmp_path / "cache").iterdir()
+    entry = json.loads(entry_path.read_text(encoding="utf-8"))
+    foreign = f"{tmp_path.as_posix()}/foreign"
+    entry["regex"][foreign] = "^.*$"
+    entry_path.write_text(json.dumps(entry), encoding="utf-8")
+    engine._translation.cache_clear()
+    assert cache.load(str(rule_file), str(rule_file.parent)) is not None
+    assert engine.translate_glob(foreign) != "^.*$"
+
+
+@pytest.mark.os_agnostic
+def test_cache_entry_of_another_wcmatch_version_is_not_used(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    rule_file = _rule_file(tmp_path)
+    cache = igittigitt.RuleFileCache(tmp_path / "cache")
+    igittigitt.IgnoreParser(rule_cache=cache).parse_rule_file(rule_file)
+    assert cache.load(str(rule_file), str(rule_file.parent)) is not None
+    monkeypatch.setattr(rule_cache, "_WCMATCH_VERSION", "0.0")
+    assert cache.load(str(rule_file), str(rule_file.parent)) is None
+
+
+@pytest.mark.os_agnostic
+def test_writing_prunes_entries_of_other_versions(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    rule_file = _rule_file(tmp_path)
+    directory = tmp_path / "cache"
+    igittigitt.IgnoreParser(rule_cache=igittigitt.RuleFileCache(directory)).parse_rule_file(rule_file)
+    (old_entry,) = directory.iterdir()
+    unrelated = directory / "notes.json"
+    unrelated.write_text("{}", encoding="utf-8")
+
+    monkeypatch.setattr(rule_cache, "_WCMATCH_VERSION", "0.0")
+    igittigitt.IgnoreParser(rule_cache=igittigitt.RuleFileCache(directory)).parse_rule_file(rule_file)
+    assert not old_entry.exists()
+    assert unrelated.exists()
+    assert len(list(directory.glob("*.json"))) == 2
+
+
+@pytest.mark.os_agnostic
+def test_entries_beyond_the_cap_go_least_recently_used_first(tmp_path: Path) -> None:
+    directory = tmp_path / "cache"
+    rule_files = []
+    for number in range(6):
+        (tmp_path / str(number)).mkdir()
+        rule_files.append(_rule_file(tmp_path / str(number)))
+    cache = igittigitt.RuleFileCache(directory, max_entries=4)
+    for number, rule_file in enumerate(rule_files[:4]):
+        cache.store(str(rule_file), str(rule_file.parent), [rule_cache.CachedRule("/x/*.log", "*.log", False, True, 1)])
+        os.utime(cache._entry_path(str(rule_file), str(rule_file.parent)), (number, number))
+    # a hit makes the oldest entry the most recently used one
+    assert cache.load(str(rule_files[0]), str(rule_files[0].parent)) is not None
+
+    # a fresh writer prunes on its first write, then every ``max_entries // 2`` writes
+    writer = igittigitt.RuleFileCache(directory, max_entries=4)
+    for rule_file in rule_files[4:]:
+        igittigitt.IgnoreParser(rule_cache=writer).parse_rule_file(rule_file)
+    assert len(list(directory.iterdir())) == 5
+    writer.prune()
+    kept = [cache.load(str(rule_file), str(rule_file.parent)) is not None for rule_file in rule_files]
+    assert kept == [True, False, False, True, True, True]
+
+
+@pytest.mark.os_agnostic
+def test_primed_translations_share_the_bounded_translation_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(engine, "_translation", engine._translation)
+    engine.set_pattern_cache_size(2)
+    engine.prime_translations({f"/primed/{index}": f"^/primed/{index}$" for index in range(10)})
+    assert engine._translation.cache_info().currsize == 2
+    assert not engine._PRIMING
+    assert engine.translate_glob("/primed/9") == "^/primed/9$"
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("enabled", [True, False])
+def test_cli_caches_under_xdg_cache_home(
+    enabled: bool,
+    cli_runner: CliRunner,
+    production_factory: Callable[[], object],
+    tmp_path: Path,
+    isolated_rule_cache: Path,
+) -> None:
+    _rule_file(tmp_path)
+    args = ["--set", f"performance.rule_cache={str(enabled).lower()}", "check", "-C", str(tmp_path), "a.log"]
+    for _run in range(2):
+        result = cli_runner.invoke(cli, args, obj=production_factory)
+        assert result.stdout.split() == ["a.log"]
+    entries = list((isolated_rule_cache / "igittigitt").glob("*.json"))
+    assert len(entries) == (1 if enabled else 0)
+
+
+@pytest.mark.os_agnostic
+def test_adaptive_rule_order_is_kept_next_to_the_rule_cache(tmp_path: Path) -> None:
+    _rule_file(tmp_path, "*.log\n*.tmp\n*.pyc\n")
+    cache = igittigitt.RuleFileCache(tmp_path / "cache")
+
+    def parser(*extra: str) -> igittigitt.IgnoreParser:
+        fresh = igittigitt.IgnoreParser(engine="adaptive", rule_cache=cache)
+        fresh.parse_rule_files(tmp_path, add_default_patterns=False)
+        fresh.add_rules(extra, tmp_path)
+        return fresh
+
+    with parser() as first:
+        for number in range(20):
+            assert first.match(tmp_path / f"{number}.log", is_file=True)
+    log, pyc = first.rules[0].pattern_glob, first.rules[2].pattern_glob
+    assert cache.load_rule_order(first._rule_identity()) == {log: 20}
+    # a fresh parser over the same rules tries the hot rule first
+    learned = parser()._rule_engine()
+    assert isinstance(learned, engine.AdaptiveEngine)
+    assert learned.hits == {log: 20}
+    assert learned._blocks[0].order[0][1] == log
+
+    # a different rule set is stored under its own key
+    second = parser("*.bak")
+    assert second.match(tmp_path / "a.pyc", is_file=True)
+    second.save_rule_order()
+    assert cache.load_rule_order(second._rule_identity())[pyc] == 1
+    assert cache.load_rule_order(first._rule_identity()) == {log: 20}
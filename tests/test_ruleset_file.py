@@ -0,0 +1,149 @@
+"""Precompiled ruleset files (``igittigitt compile`` / ``--ruleset``) must load
+without parsing, translating or classifying anything - and decide exactly like
+the parser they were compiled from."""
+
+from __future__ import annotations
+
+import struct
+from typing import TYPE_CHECKING
+
+import pytest
+
+import igittigitt
+from igittigitt import engine, ruleset_file
+from igittigitt import igittigitt as core
+from igittigitt.adapters.cli import cli
+from igittigitt.adapters.cli.exit_codes import ExitCode
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from click.testing import CliRunner
+
+_PATHS = ("a.log", "keep.log", "build/x.o", "build", "docs/a/b.md", "src/main.py", "src/tmp/x", "sub/a.tmp")
+
+
+def _fail(*_args: object, **_kwargs: object) -> object:
+    raise AssertionError("the ruleset was parsed / translated / classified again")
+
+
+def _compiled_parser(root: Path) -> igittigitt.IgnoreParser:
+    (root / ".gitignore").write_text("*.log\nbuild/\n!keep.log\n/docs/**/*.md\n", encoding="utf-8")
+    (root / "sub").mkdir()
+    (root / "sub" / ".gitignore").write_text("*.tmp\n", encoding="utf-8")
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(root, add_default_patterns=False)
+    parser.add_rule("src/tmp/", root)
+    return parser
+
+
+@pytest.mark.os_agnostic
+def test_loaded_ruleset_decides_like_its_source(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    source = _compiled_parser(tmp_path)
+    source.save_ruleset(tmp_path / "rules.igc", tmp_path)
+
+    monkeypatch.setattr(core, "get_rules_from_git_pattern", _fail)
+    monkeypatch.setattr(core, "classify_glob", _fail)
+    monkeypatch.setattr(engine.wcmatch.glob, "translate", _fail)
+    engine._translation.cache_clear()
+    engine._alternation.cache_clear()
+
+    for loaded in (igittigitt.IgnoreParser(), igittigitt.IncludeParser()):
+        assert loaded.load_ruleset(tmp_path / "rules.igc", base_dir=tmp_path) == str(tmp_path)
+        assert [str(rule) for rule in loaded.rules] == [str(rule) for rule in source.rules]
+        assert [rule.strategy for rule in loaded.rules] == [rule.strategy for rule in source.rules]
+        assert [(rule.source_file, rule.source_line_number) for rule in loaded.rules] == [
+            (rule.source_file, rule.source_line_number) for rule in source.rules
+        ]
+    loaded = igittigitt.IgnoreParser()
+    loaded.load_ruleset(tmp_path / "rules.igc")
+    for path in _PATHS:
+        assert loaded.match_with_rule(tmp_path / path, is_file=True) == source.match_with_rule(
+            tmp_path / path, is_file=True
+        )
+
+
+def _out_of_range_glob(data: bytes) -> bytes:
+    """Point the first rule's glob past the end of the string table."""
+    (n_strings,) = struct.unpack_from("<I", data, 8)
+    first_rule = 24 + (n_strings + 1) * 4
+    return data[:first_rule] + struct.pack("<I", n_strings + 1000) + data[first_rule + 4 :]
+
+
+_MANGLED: dict[str, Callable[[bytes], bytes]] = {
+    "empty": lambda data: b"",
+    "magic": lambda data: b"GIT!" + data[4:],
+    "format": lambda data: data[:4] + struct.pack("<H", 99) + data[6:],
+    "index": _out_of_range_glob,
+    "truncated": lambda data: data[: len(data) // 2],
+}
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("damage", sorted(_MANGLED))
+def test_invalid_ruleset_files_are_rejected(tmp_path: Path, damage: str) -> None:
+    _compiled_parser(tmp_path).save_ruleset(tmp_path / "rules.igc", tmp_path)
+    target = tmp_path / "rules.igc"
+    target.write_bytes(_MANGLED[damage](target.read_bytes()))
+    with pytest.raises(igittigitt.RulesetFormatError):
+        igittigitt.IgnoreParser().load_ruleset(target)
+
+
+@pytest.mark.os_agnostic
+def test_ruleset_of_another_version_or_directory_is_rejected(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _compiled_parser(tmp_path).save_ruleset(tmp_path / "rules.igc", tmp_path)
+    with pytest.raises(igittigitt.RulesetFormatError, match="compiled for"):
+        igittigitt.IgnoreParser().load_ruleset(tmp_path / "rules.igc", base_dir=tmp_path / "sub")
+    monkeypatch.setattr(ruleset_file, "version", "0.0.0")
+    with pytest.raises(igittigitt.RulesetFormatError, match="compiled by igittigitt"):
+        igittigitt.IgnoreParser().load_ruleset(tmp_path / "rules.igc")
+
+
+@pytest.mark.os_posix
+def test_ruleset_is_published_atomically_with_the_usual_permissions(tmp_path: Path) -> None:
+    parser = _compiled_parser(tmp_path)
+    target = tmp_path / "rules.igc"
+    target.write_bytes(b"stale")
+    parser.save_ruleset(target, tmp_path)
+    parser.save_ruleset(target, tmp_path)
+    assert sorted(path.name for path in tmp_path.glob("rules.igc*")) == ["rules.igc"]
+    assert target.stat().st_mode & 0o777 == 0o666 & ~ruleset_file._umask()
+    assert igittigitt.IgnoreParser().load_ruleset(target) == str(tmp_path)
+
+
+@pytest.mark.os_agnostic
+def test_lazy_parser_cannot_be_saved(tmp_path: Path) -> None:
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(tmp_path, add_default_patterns=False, lazy=True)
+    with pytest.raises(ValueError, match="lazily"):
+        parser.save_ruleset(tmp_path / "rules.igc", tmp_path)
+
+
+@pytest.mark.os_agnostic
+def test_cli_compile_then_check_and_filter_with_ruleset(
+    cli_runner: CliRunner, production_factory: Callable[[], object], tmp_path: Path
+) -> None:
+    _compiled_parser(tmp_path)
+    output = str(tmp_path / "rules.igc")
+    result = cli_runner.invoke(cli, ["compile", "-C", str(tmp_path), "-o", output], obj=production_factory)
+    assert result.exit_code == 0, result.output
+    # the scan is off as soon as a ruleset is given: a later .gitignore change is not seen
+    (tmp_path / ".gitignore").write_text("*.txt\n", encoding="utf-8")
+
+    result = cli_runner.invoke(
+        cli, ["check", "-C", str(tmp_path), "--ruleset", output, "a.log", "a.txt", "sub/a.tmp"], obj=production_factory
+    )
+    assert result.exit_code == ExitCode.SUCCESS
+    assert result.stdout.split() == ["a.log", "sub/a.tmp"]
+
+    result = cli_runner.invoke(
+        cli, ["filter", "-C", str(tmp_path), "--ruleset", output], input="a.log\na.txt\n", obj=production_factory
+    )
+    assert result.stdout.split() == ["a.txt"]
+
+    result = cli_runner.invoke(
+        cli, ["check", "-C", str(tmp_path / "sub"), "--ruleset", output, "a.log"], obj=production_factory
+    )
+    assert result.exit_code == 2
+    assert "compiled for" in result.output
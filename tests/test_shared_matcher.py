@@ -0,0 +1,67 @@
+"""``SharedMatcher`` must decide like a parser from any number of threads, and a
+``publish`` must reach later queries without disturbing the running ones."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import pytest
+
+import igittigitt
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_NAMES = ("a.log", "keep.log", "build/x.o", "src/main.py", "src/tmp/x", "docs/a.md")
+
+
+def _paths(root: Path) -> list[str]:
+    return [igittigitt.posix_path(root / f"d{index}" / name) for index in range(50) for name in _NAMES]
+
+
+@pytest.mark.os_agnostic
+def test_threads_decide_like_one_parser(tmp_path: Path) -> None:
+    source = igittigitt.IgnoreParser()
+    for rule in ("*.log", "!keep.log", "build/", "src/tmp/"):
+        source.add_rule(rule, tmp_path)
+    paths = _paths(tmp_path)
+    expected = [source.match_str(path, is_file=True) for path in paths]
+    matcher = igittigitt.SharedMatcher(igittigitt.IgnoreParser, source.freeze())
+
+    def decide(_worker: int) -> list[bool]:
+        return [matcher.match_str(path, is_file=True) for path in paths]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(result == expected for result in pool.map(decide, range(32)))
+
+
+@pytest.mark.os_agnostic
+def test_publish_reaches_later_queries_only(tmp_path: Path) -> None:
+    source = igittigitt.IncludeParser()
+    source.add_rule("*.py", tmp_path)
+    matcher = igittigitt.SharedMatcher(igittigitt.IncludeParser, source.freeze())
+    path = igittigitt.posix_path(tmp_path / "docs" / "a.md")
+    started = threading.Event()
+    published = threading.Event()
+    decisions: list[bool] = []
+
+    def in_flight() -> None:
+        parser = matcher.parser()
+        decisions.append(parser.match_str(path, is_file=True))
+        started.set()
+        published.wait()
+        # the query begun before the publish still decides on the old rules
+        decisions.append(parser.match_str(path, is_file=True))
+        decisions.append(matcher.match_str(path, is_file=True))
+
+    thread = threading.Thread(target=in_flight)
+    thread.start()
+    started.wait()
+    source.add_rule("*.md", tmp_path)
+    assert matcher.publish(source.freeze()) == matcher.version == 1
+    published.set()
+    thread.join()
+    assert decisions == [False, False, True]
+    assert matcher.ruleset == source.freeze()
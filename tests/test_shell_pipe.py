@@ -113,3 +113,28 @@ def test_filter_handles_sigpipe_from_head(tmp_path: Path) -> None:
     _, flt_err = flt.communicate()
     assert head_out.strip() == "file0.txt"
     assert "Traceback (most recent call last)" not in flt_err
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX pipes")
+def test_check_as_a_co_process(tmp_path: Path) -> None:
+    """One long-lived `check --stdin -v -n`: every path written gets its record
+    back before the next one is sent (no output held back until EOF)."""
+    _tree(tmp_path)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "igittigitt", "check", "-C", str(tmp_path), "--stdin", "-v", "-n"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+        env=_env(),
+    )
+    assert proc.stdin is not None
+    assert proc.stdout is not None
+    records: list[str] = []
+    for path in ("a.log", "a.txt", "build/x.o"):
+        proc.stdin.write(path + "\n")
+        proc.stdin.flush()
+        records.append(proc.stdout.readline())
+    proc.stdin.close()
+    assert proc.wait(timeout=30) == 0
+    rule_file = tmp_path / ".gitignore"
+    assert records == [f"{rule_file}:1:*.log\ta.log\n", "::\ta.txt\n", f"{rule_file}:2:build/\tbuild/x.o\n"]
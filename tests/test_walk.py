@@ -0,0 +1,254 @@
+"""The pruning walker (``walk`` / ``iter_files``) must keep exactly what ``match``
+keeps, and must never list a directory the rules drop."""
+
+from __future__ import annotations
+
+import os
+import pathlib
+from typing import TYPE_CHECKING
+
+import pytest
+
+import igittigitt
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    _Parser = igittigitt.IgnoreParser | igittigitt.IncludeParser
+
+
+def _build_tree(root: Path) -> None:
+    for directory in ("src/pkg", "build/out/deep", "node_modules/lib", "logs", "docs/keep"):
+        (root / directory).mkdir(parents=True)
+    for file in (
+        "src/main.py",
+        "src/pkg/deep.py",
+        "src/debug.log",
+        "build/out/a.o",
+        "build/out/deep/b.o",
+        "node_modules/lib/index.js",
+        "logs/keep.log",
+        "logs/old.log",
+        "docs/guide.md",
+        "docs/keep/notes.md",
+        "readme.md",
+    ):
+        (root / file).write_text("x", encoding="utf-8")
+
+
+def _all_paths(root: Path) -> list[str]:
+    return [
+        str(pathlib.Path(dirpath, name))
+        for dirpath, dirnames, filenames in os.walk(root)
+        for name in dirnames + filenames
+    ]
+
+
+_IGNORE_RULES = ("*.log", "build/", "node_modules", "!logs/keep.log", "docs/*", "!docs/keep")
+_INCLUDE_RULES = ("*.py", "docs/", "!docs/guide.md", "logs/keep.log")
+
+
+def _parser(kind: str, root: Path) -> _Parser:
+    parser: _Parser = igittigitt.IgnoreParser() if kind == "ignore" else igittigitt.IncludeParser()
+    for pattern in _IGNORE_RULES if kind == "ignore" else _INCLUDE_RULES:
+        parser.add_rule(pattern, root)
+    return parser
+
+
+def _kept(parser: _Parser, path: str) -> bool:
+    return not parser.match(path) if isinstance(parser, igittigitt.IgnoreParser) else parser.match(path)
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("kind", ["ignore", "include"])
+def test_iter_files_agrees_with_match(kind: str, tmp_path: Path) -> None:
+    _build_tree(tmp_path)
+    parser = _parser(kind, tmp_path)
+    every = _all_paths(tmp_path)
+    files = {path for path in every if pathlib.Path(path).is_file()}
+
+    assert set(parser.iter_files(tmp_path)) == {path for path in files if _kept(parser, path)}
+    assert set(parser.iter_files(tmp_path, include_dirs=True)) == {path for path in every if _kept(parser, path)}
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("kind", ["ignore", "include"])
+def test_dropped_directories_are_never_listed(kind: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _build_tree(tmp_path)
+    parser = _parser(kind, tmp_path)
+    listed: list[str] = []
+    scandir = os.scandir
+
+    def recording_scandir(path: str) -> Iterator[os.DirEntry[str]]:
+        listed.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", recording_scandir)
+    list(parser.iter_files(tmp_path))
+    assert listed
+    assert all(_kept(parser, path) for path in listed[1:])
+
+
+@pytest.mark.os_agnostic
+def test_walk_is_os_walk_compatible(tmp_path: Path) -> None:
+    """Same shape and order as ``os.walk``; pruning ``dirnames`` in place stops the descent."""
+    _build_tree(tmp_path)
+    parser = igittigitt.IgnoreParser()
+    assert [
+        (dirpath, sorted(dirnames), sorted(filenames)) for dirpath, dirnames, filenames in parser.walk(tmp_path)
+    ] == [(dirpath, sorted(dirnames), sorted(filenames)) for dirpath, dirnames, filenames in os.walk(tmp_path)]
+
+    visited: list[str] = []
+    for dirpath, dirnames, _filenames in igittigitt.walk(tmp_path, parser):
+        visited.append(os.path.relpath(dirpath, tmp_path))
+        dirnames[:] = [name for name in dirnames if name != "src"]
+    assert "src" not in visited
+    assert str(pathlib.Path("build", "out")) in visited
+
+
+@pytest.mark.os_agnostic
+def test_walk_reads_the_gitignore_files_by_default(tmp_path: Path) -> None:
+    _build_tree(tmp_path)
+    (tmp_path / ".gitignore").write_text("build/\n*.log\n", encoding="utf-8")
+    (tmp_path / "logs" / ".gitignore").write_text("!keep.log\n", encoding="utf-8")
+    kept = {
+        pathlib.Path(dirpath, name).relative_to(tmp_path).as_posix()
+        for dirpath, _dirnames, filenames in igittigitt.walk(tmp_path)
+        for name in filenames
+    }
+    assert "logs/keep.log" in kept
+    assert "logs/old.log" not in kept
+    assert not any(path.startswith("build/") for path in kept)
+
+
+# --- rule file discovery (parse_rule_files) -----------------------------------
+
+
+@pytest.mark.os_agnostic
+def test_discovery_never_lists_ignored_directories(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _build_tree(tmp_path)
+    (tmp_path / ".gitignore").write_text("node_modules/\n", encoding="utf-8")
+    (tmp_path / "node_modules" / "lib" / ".gitignore").write_text("*.js\n", encoding="utf-8")
+    (tmp_path / "src" / ".gitignore").write_text("*.log\n", encoding="utf-8")
+    listed: list[str] = []
+    scandir = os.scandir
+
+    def recording_scandir(path: str) -> Iterator[os.DirEntry[str]]:
+        listed.append(pathlib.Path(path).relative_to(tmp_path).as_posix())
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", recording_scandir)
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(tmp_path, add_default_patterns=False)
+
+    assert not any(path.startswith("node_modules") for path in listed)
+    assert [rule.pattern_original for rule in parser.rules] == ["node_modules/", "*.log"]
+
+
+@pytest.mark.os_agnostic
+def test_discovery_skips_nested_repositories(tmp_path: Path) -> None:
+    _build_tree(tmp_path)
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".gitignore").write_text("*.o\n", encoding="utf-8")
+    (tmp_path / "docs" / ".git").write_text("gitdir: elsewhere\n", encoding="utf-8")
+    (tmp_path / "docs" / ".gitignore").write_text("*.md\n", encoding="utf-8")
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(tmp_path, add_default_patterns=False)
+    assert [rule.pattern_original for rule in parser.rules] == ["*.o"]
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("lazy", [False, True])
+def test_discovery_reads_rule_files_in_dot_directories(tmp_path: Path, lazy: bool) -> None:
+    # behavior change: the former recursive glob skipped hidden directories
+    (tmp_path / "a" / ".venv" / "build").mkdir(parents=True)
+    (tmp_path / "a" / ".venv" / ".gitignore").write_text("build/\n", encoding="utf-8")
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(tmp_path, add_default_patterns=False, lazy=lazy)
+    assert parser.match(tmp_path / "a" / ".venv" / "build" / "m.py", is_file=True)
+    assert not parser.match(tmp_path / "a" / ".venv" / "m.py", is_file=True)
+
+
+@pytest.mark.os_agnostic
+def test_discovery_collects_several_rule_file_names(tmp_path: Path) -> None:
+    _build_tree(tmp_path)
+    (tmp_path / ".gitignore").write_text("build/\n", encoding="utf-8")
+    (tmp_path / ".dockerignore").write_text("docs/\n", encoding="utf-8")
+    (tmp_path / "src" / ".dockerignore").write_text("*.log\n", encoding="utf-8")
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(tmp_path, filename=(".gitignore", ".dockerignore"), add_default_patterns=False)
+    assert [rule.pattern_original for rule in parser.rules] == ["build/", "docs/", "*.log"]
+
+
+@pytest.mark.os_agnostic
+def test_lazy_discovery_reads_only_the_queried_ancestors(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _build_tree(tmp_path)
+    for directory in ("", "src", "src/pkg", "docs", "logs"):
+        (tmp_path / directory / ".gitignore").write_text("*.tmp\n", encoding="utf-8")
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(tmp_path, add_default_patterns=False, lazy=True)
+    parser.add_rule("!keep.tmp", tmp_path)
+    assert parser.rules[0].pattern_original == "!keep.tmp"
+
+    listed: list[str] = []
+    monkeypatch.setattr(os, "scandir", listed.append)
+    assert parser.match(tmp_path / "src" / "pkg" / "a.tmp", is_file=True)
+    assert not parser.match(tmp_path / "src" / "pkg" / "keep.tmp", is_file=True)
+    assert not listed
+    sources = {pathlib.Path(str(rule.source_file)).parent for rule in parser.rules if rule.source_file is not None}
+    assert sources == {tmp_path, tmp_path / "src", tmp_path / "src" / "pkg"}
+    # the rule added after the lazy call keeps its precedence over the rule files read later
+    assert parser.rules[-1].pattern_original == "!keep.tmp"
+
+
+@pytest.mark.os_agnostic
+def test_lazy_directory_memo_is_bounded_and_reads_each_rule_file_once(tmp_path: Path) -> None:
+    _build_tree(tmp_path)
+    for directory in ("", "src", "src/pkg", "docs", "logs"):
+        (tmp_path / directory / ".gitignore").write_text(f"/{directory or 'root'}.tmp\n*.o\n", encoding="utf-8")
+    eager = igittigitt.IgnoreParser()
+    eager.parse_rule_files(tmp_path, add_default_patterns=False)
+    lazy = igittigitt.IgnoreParser(dir_cache_max=2)
+    lazy.parse_rule_files(tmp_path, add_default_patterns=False, lazy=True)
+    paths = [tmp_path / directory / name for directory in ("src/pkg", "docs", "logs", "src") for name in ("a.o", "b.c")]
+    for path in paths * 2:  # the second round re-enters evicted directories
+        assert lazy.match(path, is_file=True) == eager.match(path, is_file=True)
+        assert len(lazy._lazy_dirs) <= 2
+    assert sorted(map(str, lazy.rules)) == sorted(map(str, eager.rules))
+
+
+@pytest.mark.os_agnostic
+@pytest.mark.parametrize("edit", ["replace", "remove"])
+@pytest.mark.parametrize("ignored", ["sub/", "sub/.gitignore"])
+def test_lazy_discovery_reads_rule_files_a_rule_change_unignores(tmp_path: Path, edit: str, ignored: str) -> None:
+    (tmp_path / "sub").mkdir()
+    root_rules = tmp_path / ".gitignore"
+    root_rules.write_text(f"{ignored}\n", encoding="utf-8")
+    (tmp_path / "sub" / ".gitignore").write_text("*.log\n", encoding="utf-8")
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(tmp_path, add_default_patterns=False, lazy=True)
+    assert parser.match(tmp_path / "sub" / "a.txt", is_file=True) == (ignored == "sub/")
+    assert [rule.pattern_original for rule in parser.rules] == [ignored]
+
+    if edit == "replace":
+        root_rules.write_text("*.tmp\n", encoding="utf-8")
+        parser.replace_rule_file(root_rules)
+    else:
+        parser.remove_rules_from(root_rules)
+    assert parser.match(tmp_path / "sub" / "a.log", is_file=True)
+    assert not parser.match(tmp_path / "sub" / "a.txt", is_file=True)
+    assert [rule.pattern_original for rule in parser.rules] == (["*.tmp", "*.log"] if edit == "replace" else ["*.log"])
+
+
+@pytest.mark.os_agnostic
+def test_lazy_discovery_stops_at_ignored_directories(tmp_path: Path) -> None:
+    _build_tree(tmp_path)
+    (tmp_path / ".gitignore").write_text("build/\n", encoding="utf-8")
+    (tmp_path / "build" / ".gitignore").write_text("!out/\n", encoding="utf-8")
+    parser = igittigitt.IgnoreParser()
+    parser.parse_rule_files(tmp_path, add_default_patterns=False, lazy=True)
+    assert parser.match(tmp_path / "build" / "out" / "a.o")
+    assert [rule.pattern_original for rule in parser.rules] == ["build/"]
+    with pytest.raises(ValueError, match="already called"):
+        parser.parse_rule_files(tmp_path, lazy=True)